@@ -9,5 +9,6 @@ urlpatterns = [
     # Explicit dashboards
     path('admin/', views.DashboardView.as_view(), name='admin'),
     path('hr/', views.HRDashboardView.as_view(), name='hr'),
+    path('hr/forecast/', views.WorkforceForecastView.as_view(), name='forecast'),
     path('me/', views.UserDashboardView.as_view(), name='user'),
 ]
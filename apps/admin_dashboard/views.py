@@ -5,10 +5,13 @@ from django.contrib import messages
 from django.core.management import call_command
 from django.contrib.auth import get_user_model
 from django.utils import timezone
-from django.db.models import Count, Q
+from django.db.models import Count
+from apps.employees.forecast import DIMENSIONS, MEASURES, workforce_forecast
 from apps.employees.models import Employee
 from apps.leaves.models import LeaveRequest, EmployeeLeaveBalance
-from apps.leaves.utils import approvals_scope_q_for_user
+from apps.employees.scope import approval_scope
+from apps.roles.resolver import has_role
+from hr_project.exports import EXPORT_FORMATS, rows_response
 
 User = get_user_model()
 
@@ -17,8 +20,7 @@ class ITAdminOnlyMixin(UserPassesTestMixin):
     def test_user_passes(self, user):
         return user.is_authenticated and (
             user.is_superuser or 
-            user.groups.filter(name='IT Admin').exists() or 
-            user.groups.filter(name='HR Admin').exists()
+            has_role(user, 'IT Admin', 'HR Admin')
         )
 
     def test_func(self):
@@ -29,8 +31,8 @@ class DashboardView(LoginRequiredMixin, View):
     """Main dashboard - accessible to all authenticated users, shows role-based content"""
     def get(self, request):
         user = request.user
-        is_it_admin = user.is_superuser or user.groups.filter(name='IT Admin').exists()
-        is_hr_admin = user.groups.filter(name='HR Admin').exists()
+        is_it_admin = user.is_superuser or has_role(user, 'IT Admin')
+        is_hr_admin = has_role(user, 'HR Admin')
         
         # Calculate statistics
         total_employees = Employee.objects.count()
@@ -54,9 +56,9 @@ class DashboardView(LoginRequiredMixin, View):
             my_balances = list(EmployeeLeaveBalance.objects.filter(employee=emp, year=year).select_related('leave_type')[:5])
         
         # If user is a supervisor, show pending approvals count
-        scope_q = approvals_scope_q_for_user(user)
-        if scope_q != Q(pk__in=[]):
-            approvals_count = LeaveRequest.objects.filter(scope_q, status='pending').count()
+        scope = approval_scope(user)
+        if scope:
+            approvals_count = LeaveRequest.objects.filter(scope.q('employee_id'), status='pending').count()
         
         context = {
             'total_employees': total_employees,
@@ -78,10 +80,10 @@ class DashboardRouterView(LoginRequiredMixin, View):
     def get(self, request):
         user = request.user
         # IT/Admin users go to existing admin dashboard
-        if user.is_superuser or user.groups.filter(name__in=['IT Admin']).exists():
+        if user.is_superuser or has_role(user, 'IT Admin'):
             return redirect('admin_dashboard:admin')
         # HR users (both HR Admin and HR) go to HR dashboard
-        if user.groups.filter(name__in=['HR Admin', 'HR']).exists():
+        if has_role(user, 'HR Admin', 'HR'):
             return redirect('admin_dashboard:hr')
         # Everyone else -> user dashboard
         return redirect('admin_dashboard:user')
@@ -91,7 +93,7 @@ class HROnlyMixin(UserPassesTestMixin):
     def test_user_passes(self, user):
         return user.is_authenticated and (
             user.is_superuser or
-            user.groups.filter(name__in=['HR Admin', 'HR']).exists()
+            has_role(user, 'HR Admin', 'HR')
         )
 
     def test_func(self):
@@ -124,6 +126,40 @@ class HRDashboardView(LoginRequiredMixin, HROnlyMixin, View):
         return render(request, 'admin_dashboard/hr.html', context)
 
 
+class WorkforceForecastView(LoginRequiredMixin, HROnlyMixin, View):
+    """Retirements and contract ends per year for the next ten years, per direction or grade"""
+    def get(self, request):
+        measures, dimensions = [m[0] for m in MEASURES], [d[0] for d in DIMENSIONS]
+        measure = request.GET.get('measure') if request.GET.get('measure') in measures else measures[0]
+        dimension = request.GET.get('dimension') if request.GET.get('dimension') in dimensions else dimensions[0]
+        forecast = workforce_forecast()
+
+        fmt = request.GET.get('format')
+        if fmt:
+            if fmt not in EXPORT_FORMATS:
+                messages.error(request, f'Unsupported export format "{fmt}".')
+                return redirect('admin_dashboard:forecast')
+            return rows_response(
+                f'previsions-{measure}-{dimension}-{forecast.first_year}.{fmt}', forecast.header(dimension),
+                forecast.export_rows(measure, dimension), fmt, title=measure,
+            )
+
+        totals = forecast.totals(measure)
+        context = {
+            'measures': MEASURES,
+            'dimensions': DIMENSIONS,
+            'measure': measure,
+            'dimension': dimension,
+            'years': forecast.years,
+            'first_year': forecast.first_year,
+            'rows': forecast.rows(measure, dimension),
+            'totals': totals,
+            'per_year': list(zip(forecast.years, totals.counts)),
+            'peak': max(totals.counts),
+        }
+        return render(request, 'admin_dashboard/forecast.html', context)
+
+
 class UserDashboardView(LoginRequiredMixin, View):
     """Dashboard for normal users showing personal info and quick actions."""
     def get(self, request):
@@ -142,9 +178,9 @@ class UserDashboardView(LoginRequiredMixin, View):
             my_balances = list(EmployeeLeaveBalance.objects.filter(employee=emp, year=year).select_related('leave_type')[:5])
 
         # If user is a supervisor, show pending approvals count in their scope
-        scope_q = approvals_scope_q_for_user(user)
-        if scope_q != Q(pk__in=[]):
-            approvals_count = LeaveRequest.objects.filter(scope_q, status='pending').count()
+        scope = approval_scope(user)
+        if scope:
+            approvals_count = LeaveRequest.objects.filter(scope.q('employee_id'), status='pending').count()
 
         context = {
             'employee': emp,
@@ -11,6 +11,7 @@ from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from apps.employees.models import Employee
+from apps.roles.resolver import get_roles
 
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
@@ -27,7 +28,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['is_superuser'] = user.is_superuser
         
         # Add groups/roles
-        token['groups'] = list(user.groups.values_list('name', flat=True))
+        token['groups'] = sorted(get_roles(user))
         
         # Add employee info if available
         try:
@@ -82,7 +83,7 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
                 'last_name': user.last_name,
                 'is_staff': user.is_staff,
                 'is_superuser': user.is_superuser,
-                'groups': list(user.groups.values_list('name', flat=True)),
+                'groups': sorted(get_roles(user)),
             }
         }
         
@@ -202,7 +203,7 @@ def get_current_user(request):
         'last_name': user.last_name,
         'is_staff': user.is_staff,
         'is_superuser': user.is_superuser,
-        'groups': list(user.groups.values_list('name', flat=True)),
+        'groups': sorted(get_roles(user)),
         'permissions': list(user.user_permissions.values_list('codename', flat=True)),
     }
     
@@ -8,12 +8,13 @@ from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 from .forms import UserRegistrationForm, AccountSettingsForm, ProfilePictureForm
 from django.contrib.auth.models import User, Group
+from apps.employees.supervisors import supervisor_chain
 
 
 class ProfileView(LoginRequiredMixin, View):
     def get(self, request):
         user = request.user
-        groups = list(user.groups.values_list('name', flat=True))
+        groups = sorted(request.roles)
         employee = getattr(user, 'employee_profile', None)
         history = []
         next_grade = []
@@ -40,24 +41,8 @@ class ProfileView(LoginRequiredMixin, View):
                     time_in_grade = ", ".join(parts)
             except Exception:
                 time_in_grade = None
-            # Compute supervisors M+1 and M+2
-            try:
-                m1 = None
-                m2 = None
-                from apps.employees.models.employee import Employee as Emp
-                # Determine chain based on where employee is attached
-                if employee.service_id:
-                    m1 = Emp.objects.filter(service_id=employee.service_id, position__position_type='chef_service').first()
-                    m2 = Emp.objects.filter(division_id=employee.division_id, position__position_type='chef_division').first() if employee.division_id else Emp.objects.filter(direction_id=employee.direction_id, position__position_type='chef_direction').first()
-                elif employee.division_id:
-                    m1 = Emp.objects.filter(division_id=employee.division_id, position__position_type='chef_division').first()
-                    m2 = Emp.objects.filter(direction_id=employee.direction_id, position__position_type='chef_direction').first()
-                elif employee.direction_id:
-                    m1 = Emp.objects.filter(direction_id=employee.direction_id, position__position_type='chef_direction').first()
-                    m2 = None
-                supervisors = {'m1': m1, 'm2': m2}
-            except Exception:
-                supervisors = {'m1': None, 'm2': None}
+            # Supervisors M+1 and M+2, from the cached supervisor map
+            supervisors = supervisor_chain(employee)
         return render(request, 'authentication/profile.html', {
             'user_obj': user,
             'groups': groups,
@@ -91,7 +76,7 @@ class RegisterView(View):
 class ITAdminOnlyMixin(UserPassesTestMixin):
     def test_func(self):
         return self.request.user.is_authenticated and (
-            self.request.user.is_superuser or self.request.user.groups.filter(name='IT Admin').exists()
+            self.request.user.is_superuser or self.request.roles.has('IT Admin')
         )
 
 
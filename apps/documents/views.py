@@ -7,7 +7,9 @@ from django.contrib.auth.models import User
 from django.template.loader import render_to_string
 from apps.employees.models import Employee
 from apps.leaves.models import LeaveRequest
-from apps.leaves.utils import find_supervisors_for, approvals_scope_q_for_user
+from apps.employees.scope import approval_scope
+from apps.leaves.utils import find_supervisors_for
+from apps.roles.resolver import has_role
 from django.db.models import Q
 from django.template import Template, Context
 import datetime
@@ -22,7 +24,7 @@ except ImportError:
 
 
 def user_is_hr_or_admin(user: User) -> bool:
-    return user.is_superuser or user.groups.filter(name__in=['IT Admin', 'HR Admin', 'HR']).exists()
+    return user.is_superuser or has_role(user, 'IT Admin', 'HR Admin', 'HR')
 
 
 class AttestationTravailView(LoginRequiredMixin, View):
@@ -48,10 +50,8 @@ class DecisionCongeView(LoginRequiredMixin, View):
             allowed = True
         elif hasattr(request.user, 'employee_profile') and leave.employee_id == request.user.employee_profile.id:
             allowed = True
-        else:
-            scope_q = approvals_scope_q_for_user(request.user)
-            if scope_q != Q(pk__in=[]) and LeaveRequest.objects.filter(scope_q, pk=leave.id).exists():
-                allowed = True
+        elif leave.employee_id in approval_scope(request.user):
+            allowed = True
         if not allowed:
             return HttpResponseForbidden('Not allowed')
 
@@ -277,10 +277,8 @@ class DecisionCongePDFView(LoginRequiredMixin, View):
             allowed = True
         elif hasattr(request.user, 'employee_profile') and leave.employee_id == request.user.employee_profile.id:
             allowed = True
-        else:
-            scope_q = approvals_scope_q_for_user(request.user)
-            if scope_q != Q(pk__in=[]) and LeaveRequest.objects.filter(scope_q, pk=leave.id).exists():
-                allowed = True
+        elif leave.employee_id in approval_scope(request.user):
+            allowed = True
         if not allowed:
             return HttpResponseForbidden('Not allowed')
 
@@ -342,7 +340,7 @@ class AdminDocumentGeneratorView(UserPassesTestMixin, View):
     """View for IT Admin/HR Admin to generate documents for any employee"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(name__in=['IT Admin', 'HR Admin']).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request):
         search_query = request.GET.get('search', '').strip()
@@ -1,66 +1,189 @@
 """
 Async Redis caching utilities for high-performance operations under load
+
+Cache reads and writes go through a native ``redis.asyncio`` client with its
+own connection pool per event loop, instead of ``sync_to_async`` wrappers
+that funnel every call through the worker's single sync thread. Keys are
+built with ``cache.make_key`` and values are encoded by the django_redis
+client's own serializer/compressor, so both paths read each other's entries.
 """
+from django.conf import settings
 from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
 from django.db.models import QuerySet
 from asgiref.sync import sync_to_async
+from redis import asyncio as aioredis
 from typing import Optional, List, Any, Callable
 import asyncio
+import logging
+import time
+import weakref
 
+# Keys, TTLs, generation tags and invalidation are shared with the sync module
+from .cache import (
+    CacheKeys,
+    CacheTTL,
+    CacheEntry,
+    LOCK_TIMEOUT,
+    LOCK_WAIT,
+    LOCK_POLL_INTERVAL,
+    MISS,
+    TAG_KEY,
+    remember_locally,
+    STATS_KEY,
+    count_cache_event,
+    local_cache,
+    lock_key,
+    unwrap_entry,
+    wrap_entry,
+    uses_local_tier,
+    invalidate_employee_cache,
+    invalidate_org_cache,
+    invalidate_taxonomy_cache,
+    invalidate_user_cache,
+    clear_all_cache,
+)
 
-class CacheKeys:
-    """Cache key constants - shared with sync cache.py"""
-    # Employee caching
-    EMPLOYEE_LIST = 'employees:list:all'
-    EMPLOYEE_DETAIL = 'employees:detail:{id}'
-    EMPLOYEE_BY_DIRECTION = 'employees:direction:{id}'
-    
-    # Organizational structure
-    DIRECTIONS_ALL = 'org:directions:all'
-    DIVISIONS_ALL = 'org:divisions:all'
-    DIVISIONS_BY_DIRECTION = 'org:divisions:direction:{id}'
-    SERVICES_ALL = 'org:services:all'
-    SERVICES_BY_DIRECTION = 'org:services:direction:{id}'
-    SERVICES_BY_DIVISION = 'org:services:division:{id}'
-    DEPARTEMENTS_ALL = 'org:departements:all'
-    FILIERES_ALL = 'org:filieres:all'
-    FILIERES_BY_DEPARTEMENT = 'org:filieres:departement:{id}'
-    
-    # Grades and Positions
-    GRADES_ALL = 'taxonomy:grades:all'
-    POSITIONS_ALL = 'taxonomy:positions:all'
-    
-    # User permissions
-    USER_GROUPS = 'user:groups:{id}'
-    USER_PERMISSIONS = 'user:permissions:{id}'
+logger = logging.getLogger(__name__)
+
+# redis.asyncio connections are bound to the loop that opened them
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_redis(alias: str = 'default') -> aioredis.Redis:
+    """Return the asyncio Redis client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None:
+        config = settings.CACHES[alias]
+        pool_kwargs = dict(config.get('OPTIONS', {}).get('CONNECTION_POOL_KWARGS', {}))
+        # Wait for a free connection instead of failing once max_connections is reached
+        pool = aioredis.BlockingConnectionPool.from_url(
+            config['LOCATION'],
+            timeout=pool_kwargs.get('socket_timeout', 5),
+            **pool_kwargs
+        )
+        client = aioredis.Redis(connection_pool=pool)
+        _clients[loop] = client
+    return client
+
+
+def _timeout_ms(timeout) -> Optional[int]:
+    """Django cache timeout -> PX milliseconds (None = no expiry), like django_redis"""
+    if timeout is DEFAULT_TIMEOUT:
+        timeout = cache.default_timeout
+    return None if timeout is None else int(timeout * 1000)
+
+
+async def aget_cache(key: str, default: Any = None) -> Any:
+    """Async cache.get"""
+    value = await get_async_redis().get(cache.make_key(key))
+    return default if value is None else cache.client.decode(value)
+
+
+async def aset_cache(key: str, value: Any, timeout=DEFAULT_TIMEOUT, nx: bool = False) -> bool:
+    """Async cache.set (``nx=True`` only writes a missing key)"""
+    px = _timeout_ms(timeout)
+    if px is not None and px <= 0:
+        if nx:
+            return False
+        await adelete_cache(key)
+        return False
+    return bool(await get_async_redis().set(
+        cache.make_key(key), cache.client.encode(value), px=px, nx=nx
+    ))
+
+
+async def aadd_cache(key: str, value: Any, timeout=DEFAULT_TIMEOUT) -> bool:
+    """Async cache.add"""
+    return await aset_cache(key, value, timeout, nx=True)
+
+
+async def adelete_cache(key: str) -> bool:
+    """Async cache.delete"""
+    return bool(await get_async_redis().delete(cache.make_key(key)))
+
+
+async def acache_tag(name: str) -> int:
+    """Async cache.cache_tag"""
+    tag_key = TAG_KEY.format(name=name)
+    use_local = uses_local_tier(tag_key, local=True)
+    if use_local:
+        generation = local_cache.get(tag_key)
+        if generation is not None:
+            return generation
 
+    generation = int(await aget_cache(tag_key) or 0)
+    if use_local:
+        local_cache.set(tag_key, generation)
+    return generation
 
-class CacheTTL:
-    """Cache time-to-live constants (in seconds)"""
-    SHORT = 60 * 5  # 5 minutes
-    MEDIUM = 60 * 15  # 15 minutes
-    LONG = 60 * 60  # 1 hour
-    VERY_LONG = 60 * 60 * 24  # 24 hours
 
+async def atagged_key(cache_key: str) -> str:
+    """Async cache.tagged_key"""
+    family, _, rest = cache_key.partition(':')
+    return f'{family}:v{await acache_tag(family)}:{rest}'
 
-# Convert sync cache operations to async
-aget_cache = sync_to_async(cache.get, thread_sensitive=True)
-aset_cache = sync_to_async(cache.set, thread_sensitive=True)
-adelete_cache = sync_to_async(cache.delete, thread_sensitive=True)
 
-# For delete_pattern, we need to use django_redis directly
-@sync_to_async
-def adelete_pattern(pattern: str):
-    """Async delete by pattern using django-redis"""
-    from django_redis import get_redis_connection
+async def arecord_cache_event(key: str, outcome: str):
+    """Async cache.record_cache_event: counters are flushed with the asyncio client"""
+    pending = count_cache_event(key, outcome)
+    if not pending:
+        return
     try:
-        conn = get_redis_connection("default")
-        keys = conn.keys(pattern)
-        if keys:
-            conn.delete(*keys)
-    except Exception:
-        # Fallback: just pass if redis client unavailable
-        pass
+        async with get_async_redis().pipeline(transaction=False) as pipe:
+            for name, count in pending.items():
+                pipe.hincrby(cache.make_key(STATS_KEY), name, count)
+            await pipe.execute()
+    except Exception as exc:
+        logger.debug('Could not flush cache stats: %s', exc)
+
+
+async def _aread_through(key: str, compute: Callable, ttl: int, use_local: bool,
+                         stale_ttl: Optional[int] = None) -> Any:
+    """Async twin of cache._read_through (``compute`` is a coroutine function)"""
+    if use_local:
+        value = local_cache.get(key, MISS)
+        if value is not MISS:
+            await arecord_cache_event(key, 'local')
+            return value
+
+    raw = await aget_cache(key)
+    value, fresh = unwrap_entry(raw)
+    if fresh:
+        if use_local and isinstance(raw, CacheEntry):
+            remember_locally(key, raw)
+        await arecord_cache_event(key, 'hit')
+        return value
+
+    await arecord_cache_event(key, 'miss' if value is MISS else 'stale')
+    if await aadd_cache(lock_key(key), 1, LOCK_TIMEOUT):
+        try:
+            value = await compute()
+            entry, timeout = wrap_entry(value, ttl, stale_ttl)
+            await aset_cache(key, entry, timeout)
+        finally:
+            await adelete_cache(lock_key(key))
+        if use_local:
+            remember_locally(key, entry)
+        return value
+
+    if value is not MISS:
+        # Someone else is refreshing: serve the stale value meanwhile
+        return value
+
+    # Cold miss while another worker recomputes: wait without blocking the loop
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        value, _ = unwrap_entry(await aget_cache(key))
+        if value is not MISS:
+            return value
+
+    value = await compute()
+    entry, timeout = wrap_entry(value, ttl, stale_ttl)
+    await aset_cache(key, entry, timeout)
+    return value
 
 
 async def get_cached_queryset_async(
@@ -68,27 +191,25 @@ async def get_cached_queryset_async(
     queryset_func: Callable,
     ttl: int = CacheTTL.MEDIUM,
     select_related: Optional[List[str]] = None,
-    prefetch_related: Optional[List[str]] = None
+    prefetch_related: Optional[List[str]] = None,
+    local: Optional[bool] = None,
+    stale_ttl: Optional[int] = None
 ) -> List[Any]:
     """
     Async version of get_cached_queryset for non-blocking cache operations
     
     Args:
         cache_key: Unique cache key
-        queryset_func: Async function that returns the queryset
+        queryset_func: Function that returns the queryset
         ttl: Time to live in seconds
         select_related: List of related fields to select
         prefetch_related: List of related fields to prefetch
+        local: Use the in-process tier (default: based on LOCAL_CACHE_PREFIXES)
+        stale_ttl: Seconds a stale result may be served during a refresh (default: ttl / 2)
     
     Returns:
         List of model instances
     """
-    # Try to get from cache first (non-blocking)
-    cached_data = await aget_cache(cache_key)
-    
-    if cached_data is not None:
-        return cached_data
-    
     # Execute queryset (convert sync ORM to async)
     @sync_to_async
     def execute_query():
@@ -103,18 +224,18 @@ async def get_cached_queryset_async(
         # Materialize the queryset
         return list(queryset)
     
-    result = await execute_query()
-    
-    # Cache the result (non-blocking)
-    await aset_cache(cache_key, result, ttl)
-    
-    return result
+    use_local = uses_local_tier(cache_key, local)
+    key = await atagged_key(cache_key)
+    result = await _aread_through(key, execute_query, ttl, use_local, stale_ttl)
+    return list(result) if use_local else result
 
 
 async def get_cached_value_async(
     cache_key: str,
     value_func: Callable,
-    ttl: int = CacheTTL.MEDIUM
+    ttl: int = CacheTTL.MEDIUM,
+    local: Optional[bool] = None,
+    stale_ttl: Optional[int] = None
 ) -> Any:
     """
     Async version of get_cached_value for non-blocking cache operations
@@ -123,67 +244,73 @@ async def get_cached_value_async(
         cache_key: Unique cache key
         value_func: Async or sync function that computes the value
         ttl: Time to live in seconds
+        local: Use the in-process tier (default: based on LOCAL_CACHE_PREFIXES)
+        stale_ttl: Seconds a stale value may be served during a refresh (default: ttl / 2)
     
     Returns:
         Cached or computed value
     """
-    cached_value = await aget_cache(cache_key)
-    
-    if cached_value is not None:
-        return cached_value
-    
     # Execute value function
     if asyncio.iscoroutinefunction(value_func):
-        value = await value_func()
+        compute = value_func
     else:
-        value = await sync_to_async(value_func)()
-    
-    await aset_cache(cache_key, value, ttl)
+        compute = sync_to_async(value_func)
     
-    return value
+    key = await atagged_key(cache_key)
+    return await _aread_through(key, compute, ttl, uses_local_tier(cache_key, local), stale_ttl)
 
 
 async def invalidate_employee_cache_async(employee_id: Optional[int] = None):
     """Async invalidate employee-related cache"""
-    await adelete_cache(CacheKeys.EMPLOYEE_LIST)
-    
-    if employee_id:
-        await adelete_cache(CacheKeys.EMPLOYEE_DETAIL.format(id=employee_id))
+    await sync_to_async(invalidate_employee_cache)(employee_id)
 
 
 async def invalidate_org_cache_async():
     """Async invalidate organizational structure cache"""
-    await adelete_pattern('org:*')
+    await sync_to_async(invalidate_org_cache)()
 
 
 async def invalidate_taxonomy_cache_async():
     """Async invalidate grades and positions cache"""
-    await adelete_cache(CacheKeys.GRADES_ALL)
-    await adelete_cache(CacheKeys.POSITIONS_ALL)
+    await sync_to_async(invalidate_taxonomy_cache)()
 
 
 async def invalidate_user_cache_async(user_id: int):
     """Async invalidate user-specific cache"""
-    await adelete_cache(CacheKeys.USER_GROUPS.format(id=user_id))
-    await adelete_cache(CacheKeys.USER_PERMISSIONS.format(id=user_id))
+    await sync_to_async(invalidate_user_cache)(user_id)
 
 
 async def clear_all_cache_async():
     """Async clear all application cache"""
-    await sync_to_async(cache.clear)()
+    await sync_to_async(clear_all_cache)()
 
 
 # Batch cache operations for efficiency
 async def get_many_async(keys: List[str]) -> dict:
-    """Get multiple cache keys in one operation"""
-    return await sync_to_async(cache.get_many)(keys)
+    """Get multiple cache keys in one MGET round trip"""
+    if not keys:
+        return {}
+    physical = {cache.make_key(key): key for key in keys}
+    values = await get_async_redis().mget(list(physical))
+    return {
+        physical[pkey]: cache.client.decode(value)
+        for pkey, value in zip(physical, values)
+        if value is not None
+    }
 
 
 async def set_many_async(data: dict, ttl: int = CacheTTL.MEDIUM):
-    """Set multiple cache keys in one operation"""
-    await sync_to_async(cache.set_many)(data, ttl)
+    """Set multiple cache keys in one pipelined round trip"""
+    if not data:
+        return
+    px = _timeout_ms(ttl)
+    async with get_async_redis().pipeline(transaction=False) as pipe:
+        for key, value in data.items():
+            pipe.set(cache.make_key(key), cache.client.encode(value), px=px)
+        await pipe.execute()
 
 
 async def delete_many_async(keys: List[str]):
     """Delete multiple cache keys in one operation"""
-    await sync_to_async(cache.delete_many)(keys)
+    if keys:
+        await get_async_redis().delete(*(cache.make_key(key) for key in keys))
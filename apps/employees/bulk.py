@@ -0,0 +1,209 @@
+"""
+Bulk employee operations: org transfers and grade promotions
+
+Restructurings and promotion campaigns change hundreds of employees at once.
+Each operation loads the selected employees in one query, applies the change
+in memory and hands the changed ones to
+``Employee.objects.bulk_update_with_history``: one transaction, one
+``bulk_update``, one ``bulk_create`` of history rows and a single round of
+cache invalidation. With ``dry_run`` nothing is written and the returned
+``BulkResult`` only describes the diff.
+"""
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from .models import Direction, Division, Employee, Service
+
+BULK_OPERATIONS = (
+    ('transfer', 'Mutation (direction / division / service)'),
+    ('promotion', 'Avancement (grade / échelle / échelon)'),
+    ('service_move', 'Rattachement d\'un service'),
+)
+MAX_ECHELON = 10
+
+ORG_FIELDS = ['direction', 'division', 'service']
+GRADE_FIELDS = ['grade', 'echelle', 'echelon', 'hors_echelle']
+
+
+class BulkChange(NamedTuple):
+    employee: Employee
+    changes: Dict[str, Dict]  # Employee.tracked_changes() format
+
+    @property
+    def described(self) -> List[Tuple[str, object, object]]:
+        """``(label, old, new)`` per changed field, foreign keys by name"""
+        from .directory import name_maps
+        names = name_maps()
+        rows = []
+        for field, change in self.changes.items():
+            model_field = Employee._meta.get_field(field)
+            old, new = change['from'], change['to']
+            if model_field.is_relation:
+                lookup = names.get(model_field.attname, {})
+                old, new = lookup.get(old, old), lookup.get(new, new)
+            rows.append((model_field.verbose_name, old, new))
+        return rows
+
+
+class BulkResult:
+    """Outcome (or preview, with ``dry_run``) of a bulk operation"""
+
+    def __init__(self, operation: str, dry_run: bool):
+        self.operation = operation
+        self.dry_run = dry_run
+        self.matched = 0
+        self.changes: List[BulkChange] = []
+        self.skipped: List[Tuple[Employee, str]] = []
+        self.history_created = 0
+        self.service_change: Optional[Dict[str, object]] = None  # service_move: the service re-parented
+
+    @property
+    def changed(self) -> int:
+        return len(self.changes)
+
+    @property
+    def unchanged(self) -> int:
+        return self.matched - self.changed - len(self.skipped)
+
+
+def resolve_unit(direction: Optional[Direction] = None, division: Optional[Division] = None,
+                 service: Optional[Service] = None) -> Tuple[Direction, Optional[Division], Optional[Service]]:
+    """Full ``(direction, division, service)`` of the most specific unit given.
+
+    Parents are derived from the child; a parent given explicitly must match.
+    """
+    if service is not None:
+        parent_division = service.division
+        parent_direction = parent_division.direction if parent_division else service.direction
+        if division is not None and division != parent_division:
+            raise ValidationError(f'Le service {service.name} n\'appartient pas à la division {division.name}.')
+        division = parent_division
+        if direction is not None and direction != parent_direction:
+            raise ValidationError(f'Le service {service.name} n\'appartient pas à la direction {direction.name}.')
+        direction = parent_direction
+    if division is not None:
+        if direction is not None and direction.pk != division.direction_id:
+            raise ValidationError(f'La division {division.name} n\'appartient pas à la direction {direction.name}.')
+        direction = division.direction
+    if direction is None:
+        raise ValidationError('Choisissez une direction, une division ou un service de destination.')
+    return direction, division, service
+
+
+def _apply(operation: str, queryset, fields: List[str], change: Callable[[Employee], Optional[str]],
+           dry_run: bool = False, note: str = '', effective_date=None, created_by=None,
+           before_write: Optional[Callable[[], None]] = None) -> BulkResult:
+    """Run ``change`` (which edits an employee in place, or returns why it cannot) on ``queryset``"""
+    result = BulkResult(operation, dry_run)
+    employees = list(queryset.order_by('pk'))
+    result.matched = len(employees)
+    changed = []
+    for employee in employees:
+        reason = change(employee)
+        if reason:
+            result.skipped.append((employee, reason))
+            continue
+        changes = employee.tracked_changes(fields)
+        if changes:
+            result.changes.append(BulkChange(employee, changes))
+            changed.append(employee)
+    if dry_run:
+        return result
+    with transaction.atomic():
+        if before_write:
+            before_write()
+        entries = Employee.objects.bulk_update_with_history(
+            changed, fields, note=note or 'Opération groupée', effective_date=effective_date, created_by=created_by,
+        )
+    result.history_created = len(entries)
+    return result
+
+
+def transfer_employees(queryset, direction: Optional[Direction] = None, division: Optional[Division] = None,
+                       service: Optional[Service] = None, **options) -> BulkResult:
+    """Move the employees of ``queryset`` to a direction, division or service.
+
+    Moving to a direction clears division and service, moving to a division
+    clears the service. ``options``: ``dry_run``, ``note``, ``effective_date``,
+    ``created_by``.
+    """
+    direction, division, service = resolve_unit(direction, division, service)
+
+    def change(employee):
+        employee.direction, employee.division, employee.service = direction, division, service
+
+    return _apply('transfer', queryset, ORG_FIELDS, change, **options)
+
+
+def promote_employees(queryset, grade=None, echelle: Optional[int] = None, echelon: Optional[int] = None,
+                      echelon_step: Optional[int] = None, hors_echelle: Optional[bool] = None,
+                      **options) -> BulkResult:
+    """Change the grade, échelle and/or échelon of the employees of ``queryset``.
+
+    ``None`` leaves a value as it is. ``echelon_step`` advances each
+    employee's own échelon; employees without one, or who would pass
+    échelon 10, are skipped. Going hors échelle clears the échelle and
+    setting an échelle ends hors échelle.
+    """
+    if echelon is not None and echelon_step is not None:
+        raise ValidationError('Indiquez un échelon ou un nombre d\'échelons, pas les deux.')
+    if hors_echelle and echelle is not None:
+        raise ValidationError('Un employé ne peut pas avoir à la fois une échelle et être hors échelle.')
+    if all(value is None for value in (grade, echelle, echelon, echelon_step, hors_echelle)):
+        raise ValidationError('Aucun changement demandé.')
+
+    def change(employee):
+        new_echelon = employee.echelon if echelon is None else echelon
+        if echelon_step is not None:
+            if employee.echelon is None:
+                return 'Aucun échelon actuel'
+            new_echelon = employee.echelon + echelon_step
+            if not 1 <= new_echelon <= MAX_ECHELON:
+                return f'Échelon {new_echelon} hors limites (1-{MAX_ECHELON})'
+        if grade is not None:
+            employee.grade = grade
+        if hors_echelle is not None:
+            employee.hors_echelle = hors_echelle
+        if echelle is not None:
+            employee.echelle, employee.hors_echelle = echelle, False
+        elif employee.hors_echelle:
+            employee.echelle = None
+        employee.echelon = new_echelon
+
+    return _apply('promotion', queryset, GRADE_FIELDS, change, **options)
+
+
+def move_service(service: Service, direction: Optional[Direction] = None, division: Optional[Division] = None,
+                 **options) -> BulkResult:
+    """Re-attach ``service`` to another division (or directly to a direction); its employees follow.
+
+    The service row is updated without ``Service.save`` so that its signals
+    (org cache, search reindex) do not run on top of the bulk update; the
+    org cache is invalidated once the transaction commits.
+    """
+    from .cache import invalidate_org_cache
+
+    if (direction is None) == (division is None):
+        raise ValidationError('Un service est rattaché soit à une direction, soit à une division.')
+    siblings = Service.objects.filter(code=service.code).exclude(pk=service.pk)
+    if siblings.filter(division=division, direction=direction).exists():
+        raise ValidationError(f'Le code {service.code} est déjà utilisé dans l\'unité de destination.')
+    target_direction = division.direction if division is not None else direction
+    previous = service.division or service.direction
+
+    def reattach():
+        Service.objects.filter(pk=service.pk).update(direction=direction, division=division)
+        service.direction, service.division = direction, division
+        transaction.on_commit(invalidate_org_cache)
+
+    def change(employee):
+        employee.direction, employee.division = target_direction, division
+
+    result = _apply(
+        'service_move', Employee.objects.filter(service=service), ORG_FIELDS, change,
+        before_write=reattach, **options
+    )
+    result.service_change = {'service': service, 'from': previous, 'to': division or direction}
+    return result
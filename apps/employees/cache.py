@@ -1,18 +1,44 @@
 """
 Redis caching utilities for HR application
+
+Reads go through two tiers: a small in-process LRU (``local_cache``) for
+rarely-changing org/taxonomy data, then Redis. Invalidations of the local
+tier are broadcast over Redis pub/sub so every worker drops its copy.
+
+Every key family (the part of a CacheKeys value before the first ``:``) is
+namespaced by a generation counter, see ``cache_tag``/``bump_tag``. Bumping a
+tag invalidates the whole family in O(1) without scanning the keyspace; the
+orphaned entries simply expire with their TTL.
+
+Redis entries are wrapped in ``CacheEntry`` so that ``None`` results can be
+cached (negative caching) and so entries outlive their freshness: once stale,
+one worker recomputes under a short lock while the others keep serving the
+stale value instead of stampeding the database.
 """
+from django.conf import settings
 from django.core.cache import cache
 from django.db.models import QuerySet
-from typing import Optional, List, Any
-import json
+from typing import Optional, List, Any, Iterable, NamedTuple
+from collections import OrderedDict
+import logging
+import os
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
 
 
 class CacheKeys:
     """Cache key constants"""
     # Employee caching
     EMPLOYEE_LIST = 'employees:list:all'
+    EMPLOYEE_DIRECTORY = 'employees:directory'  # Redis hash, see directory.py
+    EMPLOYEE_DIRECTORY_REV = 'employees:directory:rev'
     EMPLOYEE_DETAIL = 'employees:detail:{id}'
     EMPLOYEE_BY_DIRECTION = 'employees:direction:{id}'
+    SUPERVISOR_MAP = 'employees:supervisors'  # see supervisors.py
+    SCOPE_BITS = 'employees:scope:{level}:{id}:r{revision}'  # see scope.py
     
     # Organizational structure
     ORG_DIRECTIONS_ALL = 'org:directions:all'
@@ -27,10 +53,18 @@ class CacheKeys:
     DEPARTEMENTS_ALL = 'org:departements:all'
     FILIERES_ALL = 'org:filieres:all'
     FILIERES_BY_DEPARTEMENT = 'org:filieres:departement:{id}'
+    DIRECTION_NAMES = 'org:directions:names:display'
+    DIVISION_NAMES = 'org:divisions:names:display'
+    SERVICE_NAMES = 'org:services:names:display'
+    ORG_TREE = 'org:tree'  # see orgtree.py
     
     # Grades and Positions
     GRADES_ALL = 'taxonomy:grades:all'
     POSITIONS_ALL = 'taxonomy:positions:all'
+    GRADE_NAMES = 'taxonomy:grades:names:display'
+    POSITION_NAMES = 'taxonomy:positions:names:display'
+    POSITION_TYPES = 'taxonomy:positions:types'
+    PROGRESSION_RULES = 'taxonomy:progression:rules:active'
     
     # User permissions
     USER_GROUPS = 'user:groups:{id}'
@@ -43,11 +77,341 @@ class CacheTTL:
     MEDIUM = 60 * 15  # 15 minutes
     LONG = 60 * 60  # 1 hour
     VERY_LONG = 60 * 60 * 24  # 24 hours
+    NEGATIVE = 60  # Cached "nothing found" results
+
+
+# Key families served from the in-process tier. Only families whose
+# invalidation is broadcast (see publish_invalidation) may be listed here.
+LOCAL_CACHE_PREFIXES = ('org:', 'taxonomy:')
+INVALIDATION_CHANNEL = 'hr_app:cache:invalidate'
+
+
+class LocalCache:
+    """Bounded in-process LRU cache with per-entry TTL (thread-safe)"""
+
+    def __init__(self, max_entries: int = 512, ttl: int = 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None):
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_prefix(self, prefix: str):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+local_cache = LocalCache(
+    max_entries=getattr(settings, 'LOCAL_CACHE_MAX_ENTRIES', 512),
+    ttl=getattr(settings, 'LOCAL_CACHE_TTL', 60),
+)
+
+_listener_lock = threading.Lock()
+_listener_pid = None
+_listener_ready = threading.Event()
+
+
+def _invalidation_listener():
+    """Subscribe to the invalidation channel and drop matching local entries.
+
+    While disconnected the local tier is bypassed (``_listener_ready`` is
+    cleared) and flushed on reconnect, since messages may have been missed.
+    """
+    from django_redis import get_redis_connection
+    backoff = 1
+    while True:
+        try:
+            pubsub = get_redis_connection("default").pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(INVALIDATION_CHANNEL)
+            local_cache.clear()
+            _listener_ready.set()
+            backoff = 1
+            for message in pubsub.listen():
+                if message.get('type') != 'message':
+                    continue
+                prefix = message['data']
+                if isinstance(prefix, bytes):
+                    prefix = prefix.decode('utf-8')
+                local_cache.delete_prefix(prefix)
+        except Exception as exc:
+            logger.warning('Cache invalidation listener disconnected: %s', exc)
+        _listener_ready.clear()
+        local_cache.clear()
+        time.sleep(backoff)
+        backoff = min(backoff * 2, 30)
+
+
+def ensure_invalidation_listener() -> bool:
+    """Start the pub/sub listener for this process if needed.
+
+    Returns True once the listener is subscribed, i.e. when it is safe to
+    serve values from the local tier.
+    """
+    global _listener_pid
+    if _listener_pid != os.getpid():
+        with _listener_lock:
+            if _listener_pid != os.getpid():
+                _listener_pid = os.getpid()
+                _listener_ready.clear()
+                local_cache.clear()
+                threading.Thread(
+                    target=_invalidation_listener,
+                    name='cache-invalidation-listener',
+                    daemon=True,
+                ).start()
+    return _listener_ready.is_set()
+
+
+def uses_local_tier(cache_key: str, local: Optional[bool] = None) -> bool:
+    """Whether ``cache_key`` should be served from the in-process tier"""
+    if local is None:
+        local = cache_key.startswith(LOCAL_CACHE_PREFIXES)
+    return local and ensure_invalidation_listener()
+
+
+def publish_invalidation(prefix: str):
+    """Drop ``prefix`` from the local tier of every worker (this one included)"""
+    local_cache.delete_prefix(prefix)
+    try:
+        from django_redis import get_redis_connection
+        get_redis_connection("default").publish(INVALIDATION_CHANNEL, prefix)
+    except Exception as exc:
+        # Other workers fall back to the local TTL
+        logger.warning('Could not publish cache invalidation for %s: %s', prefix, exc)
+
+
+# Generation tags
+TAG_FAMILIES = ('employees', 'org', 'taxonomy', 'user')
+TAG_KEY = 'tag:{name}'
+TAG_TIME_KEY = 'tag:{name}:at'  # Unix time of the last bump (Last-Modified of conditional GETs)
+
+
+def cache_tag(name: str) -> int:
+    """Return the current generation of a key family"""
+    tag_key = TAG_KEY.format(name=name)
+    use_local = uses_local_tier(tag_key, local=True)
+    if use_local:
+        generation = local_cache.get(tag_key)
+        if generation is not None:
+            return generation
+
+    # A family that was never bumped is at generation 0
+    generation = int(cache.get(tag_key) or 0)
+    if use_local:
+        local_cache.set(tag_key, generation)
+    return generation
+
+
+def tag_modified(name: str) -> int:
+    """Unix time of a family's last bump (of the first read, if it was never bumped)"""
+    time_key = TAG_TIME_KEY.format(name=name)
+    use_local = uses_local_tier(time_key, local=True)
+    if use_local:
+        modified = local_cache.get(time_key)
+        if modified is not None:
+            return modified
+
+    modified = cache.get(time_key)
+    if modified is None:
+        cache.add(time_key, int(time.time()), timeout=None)
+        modified = cache.get(time_key) or int(time.time())
+    if use_local:
+        local_cache.set(time_key, modified)
+    return modified
+
+
+def bump_tag(name: str) -> int:
+    """Invalidate every key of a family by moving to the next generation"""
+    from django_redis import get_redis_connection
+    tag_key = TAG_KEY.format(name=name)
+    # Raw INCR is atomic, creates the key on first bump and never expires it;
+    # django_redis decodes the stored integer transparently on cache.get
+    generation = get_redis_connection("default").incr(cache.make_key(tag_key))
+    cache.set(TAG_TIME_KEY.format(name=name), int(time.time()), timeout=None)
+    publish_invalidation(tag_key)
+    publish_invalidation(f'{name}:')
+    return generation
+
+
+def tagged_key(cache_key: str) -> str:
+    """Physical key for a CacheKeys value: ``org:directions:all`` -> ``org:v3:directions:all``"""
+    family, _, rest = cache_key.partition(':')
+    return f'{family}:v{cache_tag(family)}:{rest}'
+
+
+# Stampede protection
+TTL_JITTER = 0.1  # Spread expiries of entries written together by up to +10%
+LOCK_TIMEOUT = 30  # Max seconds a recompute may hold the refresh lock
+LOCK_WAIT = 5  # Max seconds a cold miss waits for another worker's recompute
+LOCK_POLL_INTERVAL = 0.05
+
+MISS = object()
+
+
+class CacheEntry(NamedTuple):
+    """Envelope stored in Redis: the value (``None`` allowed) and its soft expiry"""
+    value: Any
+    fresh_until: float
+
+
+def jittered_ttl(ttl: int) -> int:
+    return ttl + random.randint(0, int(ttl * TTL_JITTER))
+
+
+def wrap_entry(value: Any, ttl: int, stale_ttl: Optional[int] = None):
+    """Return ``(entry, timeout)``: fresh for ``ttl``, kept ``stale_ttl`` longer"""
+    if value is None:
+        ttl = min(ttl, CacheTTL.NEGATIVE)
+    ttl = jittered_ttl(ttl)
+    if stale_ttl is None:
+        stale_ttl = ttl // 2
+    return CacheEntry(value, time.time() + ttl), ttl + stale_ttl
+
+
+def unwrap_entry(raw: Any):
+    """Return ``(value, is_fresh)``; value is ``MISS`` when nothing is cached"""
+    if raw is None:
+        return MISS, False
+    if isinstance(raw, CacheEntry):
+        return raw.value, raw.fresh_until > time.time()
+    # Plain value written by an older release
+    return raw, True
+
+
+def lock_key(key: str) -> str:
+    return f'lock:{key}'
+
+
+def remember_locally(key: str, entry: CacheEntry):
+    # Never keep a value locally past its freshness in Redis
+    local_cache.set(key, entry.value, max(0, int(entry.fresh_until - time.time())))
+
+
+# Hit/miss counters (read by ``manage.py cache_report --watch``). Counted
+# in-process and added to a Redis hash at most every STATS_FLUSH_INTERVAL.
+STATS_KEY = 'stats:cache'
+STATS_FLUSH_INTERVAL = 5
+STATS_OUTCOMES = ('local', 'hit', 'stale', 'miss')
+
+_stats_lock = threading.Lock()
+_stats = {}
+_stats_flushed_at = time.monotonic()
+
+
+def count_cache_event(key: str, outcome: str) -> Optional[dict]:
+    """Count a read-through outcome (one of STATS_OUTCOMES) for the key's family.
+
+    Returns the counters to add to Redis once STATS_FLUSH_INTERVAL has
+    passed (the caller flushes them), else None.
+    """
+    global _stats, _stats_flushed_at
+    field = f'{key.partition(":")[0]}:{outcome}'
+    with _stats_lock:
+        _stats[field] = _stats.get(field, 0) + 1
+        if time.monotonic() - _stats_flushed_at < STATS_FLUSH_INTERVAL:
+            return None
+        pending, _stats, _stats_flushed_at = _stats, {}, time.monotonic()
+    return pending
+
+
+def record_cache_event(key: str, outcome: str):
+    """Count a read-through outcome, flushing the counters when due (async code: ``arecord_cache_event``)"""
+    pending = count_cache_event(key, outcome)
+    if not pending:
+        return
+    try:
+        from django_redis import get_redis_connection
+        pipe = get_redis_connection("default").pipeline(transaction=False)
+        for name, count in pending.items():
+            pipe.hincrby(cache.make_key(STATS_KEY), name, count)
+        pipe.execute()
+    except Exception as exc:
+        logger.debug('Could not flush cache stats: %s', exc)
+
+
+def _read_through(key: str, compute, ttl: int, use_local: bool,
+                  stale_ttl: Optional[int] = None) -> Any:
+    """Local tier -> Redis -> single-flight recompute (see module docstring)"""
+    if use_local:
+        value = local_cache.get(key, MISS)
+        if value is not MISS:
+            record_cache_event(key, 'local')
+            return value
+
+    raw = cache.get(key)
+    value, fresh = unwrap_entry(raw)
+    if fresh:
+        if use_local and isinstance(raw, CacheEntry):
+            remember_locally(key, raw)
+        record_cache_event(key, 'hit')
+        return value
+
+    record_cache_event(key, 'miss' if value is MISS else 'stale')
+    if cache.add(lock_key(key), 1, LOCK_TIMEOUT):
+        try:
+            value = compute()
+            entry, timeout = wrap_entry(value, ttl, stale_ttl)
+            cache.set(key, entry, timeout)
+        finally:
+            cache.delete(lock_key(key))
+        if use_local:
+            remember_locally(key, entry)
+        return value
+
+    if value is not MISS:
+        # Someone else is refreshing: serve the stale value meanwhile
+        return value
+
+    # Cold miss while another worker recomputes: wait for its result
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        value, _ = unwrap_entry(cache.get(key))
+        if value is not MISS:
+            return value
+
+    value = compute()
+    entry, timeout = wrap_entry(value, ttl, stale_ttl)
+    cache.set(key, entry, timeout)
+    return value
 
 
 def get_cached_queryset(cache_key: str, queryset_func, ttl: int = CacheTTL.MEDIUM, 
                         select_related: Optional[List[str]] = None,
-                        prefetch_related: Optional[List[str]] = None) -> QuerySet:
+                        prefetch_related: Optional[List[str]] = None,
+                        local: Optional[bool] = None,
+                        stale_ttl: Optional[int] = None) -> QuerySet:
     """
     Get a cached queryset or execute the query and cache it
     
@@ -57,94 +421,96 @@ def get_cached_queryset(cache_key: str, queryset_func, ttl: int = CacheTTL.MEDIU
         ttl: Time to live in seconds
         select_related: List of related fields to select
         prefetch_related: List of related fields to prefetch
+        local: Use the in-process tier (default: based on LOCAL_CACHE_PREFIXES)
+        stale_ttl: Seconds a stale result may be served during a refresh (default: ttl / 2)
     
     Returns:
         QuerySet result
     """
-    cached_data = cache.get(cache_key)
-    
-    if cached_data is not None:
-        return cached_data
-    
-    # Execute queryset
-    queryset = queryset_func()
-    
-    # Apply optimizations
-    if select_related:
-        queryset = queryset.select_related(*select_related)
-    if prefetch_related:
-        queryset = queryset.prefetch_related(*prefetch_related)
-    
-    # Convert to list to cache the actual data
-    result = list(queryset)
-    
-    # Cache the result
-    cache.set(cache_key, result, ttl)
-    
-    return result
+    def compute():
+        # Execute queryset
+        queryset = queryset_func()
+        
+        # Apply optimizations
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+        
+        # Convert to list to cache the actual data
+        return list(queryset)
+
+    use_local = uses_local_tier(cache_key, local)
+    result = _read_through(tagged_key(cache_key), compute, ttl, use_local, stale_ttl)
+    # Shallow copy so callers cannot reorder a list shared by the local tier
+    return list(result) if use_local else result
 
 
-def get_cached_value(cache_key: str, value_func, ttl: int = CacheTTL.MEDIUM) -> Any:
+def get_cached_value(cache_key: str, value_func, ttl: int = CacheTTL.MEDIUM,
+                     local: Optional[bool] = None,
+                     stale_ttl: Optional[int] = None) -> Any:
     """
     Get a cached value or compute it and cache it
     
+    ``None`` results are cached too, for at most CacheTTL.NEGATIVE seconds.
+    
     Args:
         cache_key: Unique cache key
         value_func: Function that computes the value
         ttl: Time to live in seconds
+        local: Use the in-process tier (default: based on LOCAL_CACHE_PREFIXES)
+        stale_ttl: Seconds a stale value may be served during a refresh (default: ttl / 2)
     
     Returns:
         Cached or computed value
     """
-    cached_value = cache.get(cache_key)
-    
-    if cached_value is not None:
-        return cached_value
-    
-    value = value_func()
-    cache.set(cache_key, value, ttl)
-    
-    return value
+    return _read_through(tagged_key(cache_key), value_func, ttl,
+                         uses_local_tier(cache_key, local), stale_ttl)
 
 
 def invalidate_employee_cache(employee_id: Optional[int] = None):
-    """Invalidate employee-related cache"""
-    cache.delete(CacheKeys.EMPLOYEE_LIST)
-    
-    if employee_id:
-        cache.delete(CacheKeys.EMPLOYEE_DETAIL.format(id=employee_id))
+    """Invalidate employee-related cache
+
+    With an id, only that employee's detail entry is dropped and its row in
+    the directory snapshot is patched; without one the whole family goes.
+    """
+    if not employee_id:
+        bump_tag('employees')
+        return
+    from django.db import transaction
+    from .directory import patch_directory
+    cache.delete(tagged_key(CacheKeys.EMPLOYEE_DETAIL.format(id=employee_id)))
+    # Read the row once it is committed (runs immediately in autocommit)
+    transaction.on_commit(lambda: patch_directory(employee_id))
 
 
 def invalidate_org_cache():
     """Invalidate organizational structure cache"""
-    from django_redis import get_redis_connection
-    try:
-        conn = get_redis_connection("default")
-        # Delete all keys matching org:*
-        keys = conn.keys('hr_app:org:*')  # Include KEY_PREFIX
-        if keys:
-            conn.delete(*keys)
-    except Exception:
-        # Fallback: delete known keys individually
-        cache.delete(CacheKeys.DIRECTIONS_ALL)
-        cache.delete(CacheKeys.DIVISIONS_ALL)
-        cache.delete(CacheKeys.SERVICES_ALL)
-        cache.delete(CacheKeys.DEPARTEMENTS_ALL)
-        cache.delete(CacheKeys.FILIERES_ALL)
+    bump_tag('org')
 
 
 def invalidate_taxonomy_cache():
     """Invalidate grades and positions cache"""
-    cache.delete(CacheKeys.GRADES_ALL)
-    cache.delete(CacheKeys.POSITIONS_ALL)
+    bump_tag('taxonomy')
 
 
 def invalidate_user_cache(user_id: int):
     """Invalidate user-specific cache"""
-    cache.delete(CacheKeys.USER_GROUPS.format(id=user_id))
-    cache.delete(CacheKeys.USER_PERMISSIONS.format(id=user_id))
+    invalidate_users_cache([user_id])
+
+
+def invalidate_users_cache(user_ids: Iterable[int]):
+    """Invalidate the user-specific cache of several users in one round trip"""
+    keys = [
+        tagged_key(key.format(id=user_id))
+        for user_id in set(user_ids)
+        for key in (CacheKeys.USER_GROUPS, CacheKeys.USER_PERMISSIONS)
+    ]
+    if keys:
+        cache.delete_many(keys)
 
 
 def clear_all_cache():
-    """Clear all application cache"""
-    cache.clear()
+    """Clear all application cache (sessions share the Redis database and are kept)"""
+    for name in TAG_FAMILIES:
+        bump_tag(name)
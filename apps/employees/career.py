@@ -0,0 +1,73 @@
+"""
+Stored career metrics
+
+``Employee.grade_since`` (start of the current grade) and
+``Employee.retires_on`` (legal retirement date) materialise the
+``grade_start_date`` and ``retirement_date`` properties so the directory can
+filter and sort on them in SQL and in the columnar snapshot.
+
+``retires_on`` only depends on the row (date of birth, retirement age) and is
+written by ``Employee.save``. ``grade_since`` also depends on the latest grade
+change in EmploymentHistory: ``Employee.save`` writes it for new employees and
+when the hire or titularisation date changes, and ``refresh_career_metrics``
+rewrites it when history rows are written or deleted (see signals.py) and
+backfills both columns (``manage.py refresh_career_metrics``).
+"""
+import datetime
+from typing import Optional
+
+from django.db.models import OuterRef, QuerySet, Subquery
+
+CAREER_FIELDS = ('grade_since', 'retires_on')
+# Columns each stored metric is derived from (besides EmploymentHistory)
+CAREER_SOURCES = {
+    'grade_since': ('hire_date', 'titularisation_date'),
+    'retires_on': ('date_of_birth', 'retirement_age'),
+}
+
+
+def add_years(date: datetime.date, years: int) -> datetime.date:
+    try:
+        return date.replace(year=date.year + years)
+    except ValueError:
+        # Feb 29 -> Feb 28 in a non-leap year
+        return date.replace(month=2, day=28, year=date.year + years)
+
+
+def retirement_date_for(date_of_birth: Optional[datetime.date], retirement_age) -> Optional[datetime.date]:
+    if not date_of_birth:
+        return None
+    return add_years(date_of_birth, int(retirement_age))
+
+
+def grade_since_for(latest_grade_change: Optional[datetime.date], titularisation_date, hire_date):
+    """Start of the current grade: the latest grade change, else titularisation, else hiring"""
+    return latest_grade_change or titularisation_date or hire_date
+
+
+def latest_grade_change():
+    """Subquery: effective date of an employee's latest grade change (``OuterRef('pk')``)"""
+    from .models import EmploymentHistory
+    return Subquery(
+        EmploymentHistory.objects.filter(employee=OuterRef('pk'), change_type='grade')
+        .order_by('-effective_date', '-created_at').values('effective_date')[:1]
+    )
+
+
+def refresh_career_metrics(queryset: Optional[QuerySet] = None, batch_size: int = 1000) -> int:
+    """Recompute stored career metrics, writing only those that changed; returns the count"""
+    if queryset is None:
+        from .models import Employee
+        queryset = Employee.objects.all()
+    model = queryset.model
+    rows = queryset.order_by('pk').annotate(latest_grade_change=latest_grade_change()).values_list(
+        'pk', 'grade_since', 'retires_on', 'latest_grade_change', 'titularisation_date', 'hire_date',
+        'date_of_birth', 'retirement_age',
+    )
+    changed = []
+    for pk, grade_since, retires_on, latest, titularised, hired, born, age in rows.iterator(chunk_size=batch_size):
+        metrics = (grade_since_for(latest, titularised, hired), retirement_date_for(born, age))
+        if metrics != (grade_since, retires_on):
+            changed.append(model(pk=pk, grade_since=metrics[0], retires_on=metrics[1]))
+    model.objects.bulk_update(changed, CAREER_FIELDS, batch_size=batch_size)
+    return len(changed)
@@ -1,44 +1,152 @@
-from typing import Iterable, Optional
+import datetime
+from typing import Dict, Iterable, Optional, Tuple
 from django.db.models import QuerySet
-from django.core.cache import cache
+from django.utils import timezone
 from ..models import Employee
-from ..cache import get_cached_queryset, CacheKeys, CacheTTL
+from ..cache import get_cached_value, CacheKeys, CacheTTL
+from ..career import add_years
+from ..directory import SORT_COLUMNS, DirectorySnapshot, get_directory
+from ..eligibility import ELIGIBILITY_BASES
 
 
-def list_employees() -> QuerySet[Employee]:
-    """Get all employees with optimized caching and select_related.
+def list_employees() -> DirectorySnapshot:
+    """Get the columnar employee directory (cached, patched row by row on save).
 
-    Returns a list (materialized queryset) — callers in views expect an iterable and
-    apply additional filters on it. We provide a callable to the cache helper.
+    Callers select pks with ``DirectorySnapshot.select`` and hydrate only the
+    page they render with ``load_employees``.
     """
-    return get_cached_queryset(
-        CacheKeys.EMPLOYEE_LIST,
-        lambda: Employee.objects.all(),
-        ttl=CacheTTL.MEDIUM,
-        select_related=['direction', 'division', 'service', 'departement', 'filiere', 'grade', 'position'],
-        prefetch_related=['user__groups']
-    )
+    return get_directory()
+
+
+def _int_or_none(value):
+    try:
+        return int(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _date_or_none(value):
+    try:
+        return datetime.date.fromisoformat(value).isoformat() if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def employee_list_filters(params, user=None, roles=None) -> Tuple[Dict[str, object], bool, Dict[str, object]]:
+    """Directory filters of the employee list for query ``params`` and ``user``'s scope.
+
+    Returns ``(filters, visible, selected)``: ``filters`` are column lookups
+    (``DirectorySnapshot.select`` and ``Employee.objects.filter`` both accept
+    them), ``visible`` is False when nothing may be shown, and ``selected``
+    holds the parsed search/status/org/career parameters and the ``sort``
+    column (``-`` prefixed when descending; empty for directory order).
+    Career bounds are ISO dates compared with the stored ``grade_since`` and
+    ``retires_on`` columns. Without a ``user`` (exports from the command
+    line) no scope applies.
+    """
+    filters = {}
+    visible = True
+
+    # Scope restriction for regular users
+    # IT Admin and Superuser: see all
+    # HR Admin: see all (but only in their direction for non-admins)
+    # Regular users and Managers: see only people in the same direction
+    if user is not None and user.is_authenticated and not user.is_superuser and not roles.has('IT Admin'):
+        emp = getattr(user, 'employee_profile', None)
+
+        # Check if HR Admin - they can see everyone
+        is_hr_admin = roles.has('HR Admin')
+
+        if not is_hr_admin:
+            # Regular users and managers: restrict to same direction only
+            if emp and emp.direction_id:
+                filters['direction_id'] = emp.direction_id
+            elif emp:
+                # No direction: restrict to none except self
+                filters['user_id'] = user.id
+            else:
+                visible = False
+
+    # Search functionality (support both 'search' and 'q' parameters)
+    search_query = (params.get('search') or params.get('q') or '').strip()
+
+    # Filter by status
+    status_filter = params.get('status', '')
+    if status_filter:
+        filters['status'] = status_filter
+
+    # Organizational filters
+    direction_id = _int_or_none(params.get('direction'))
+    division_id = _int_or_none(params.get('division'))
+    service_id = _int_or_none(params.get('service'))
+
+    for column, value in (('direction_id', direction_id), ('division_id', division_id), ('service_id', service_id)):
+        if value is not None:
+            if filters.get(column, value) != value:
+                visible = False
+            filters[column] = value
+
+    # Career metrics: years in the current grade and retirement window
+    today = timezone.localdate()
+    years_in_grade_min = _int_or_none(params.get('years_in_grade_min'))
+    years_in_grade_max = _int_or_none(params.get('years_in_grade_max'))
+    retirement_from = _date_or_none(params.get('retirement_from'))
+    retirement_to = _date_or_none(params.get('retirement_to'))
+    if years_in_grade_min is not None:
+        filters['grade_since__lte'] = add_years(today, -years_in_grade_min).isoformat()
+    if years_in_grade_max is not None:
+        filters['grade_since__gt'] = add_years(today, -(years_in_grade_max + 1)).isoformat()
+    if retirement_from:
+        filters['retires_on__gte'] = retirement_from
+    if retirement_to:
+        filters['retires_on__lte'] = retirement_to
+
+    sort = params.get('sort', '')
+    if sort.lstrip('-') not in SORT_COLUMNS:
+        sort = ''
+
+    selected = {
+        'search_query': search_query,
+        'status_filter': status_filter,
+        'direction_id': direction_id,
+        'division_id': division_id,
+        'service_id': service_id,
+        'years_in_grade_min': years_in_grade_min,
+        'years_in_grade_max': years_in_grade_max,
+        'retirement_from': retirement_from,
+        'retirement_to': retirement_to,
+        'sort': sort,
+    }
+    return filters, visible, selected
+
+
+def eligibility_filters(params) -> Dict[str, object]:
+    """Arguments of ``EligibilityReport.select`` (besides the employees) for query ``params``"""
+    basis = params.get('basis', 'any')
+    return {
+        'grade_id': _int_or_none(params.get('grade')),
+        'target_grade_id': _int_or_none(params.get('target_grade')),
+        'start': _date_or_none(params.get('eligible_from')),
+        'end': _date_or_none(params.get('eligible_to')),
+        'basis': basis if basis in dict(ELIGIBILITY_BASES) else 'any',
+    }
 
 
 def get_employee(pk: int) -> Optional[Employee]:
     """Get a single employee with caching.
 
-    We cache the materialized instance. If not present, fetch from DB and cache it.
+    We cache the materialized instance. Missing employees are cached as ``None``
+    (briefly) so repeated lookups of a bad id do not hit the database.
     """
-    cache_key = CacheKeys.EMPLOYEE_DETAIL.format(id=pk)
+    def fetch():
+        try:
+            return Employee.objects.select_related(
+                'direction', 'division', 'service', 'departement', 'filiere', 'grade', 'position', 'user'
+            ).prefetch_related('user__groups').get(pk=pk)
+        except Employee.DoesNotExist:
+            return None
 
-    employee = cache.get(cache_key)
-    if employee is not None:
-        return employee
-
-    try:
-        employee = Employee.objects.select_related(
-            'direction', 'division', 'service', 'departement', 'filiere', 'grade', 'position', 'user'
-        ).prefetch_related('user__groups').get(pk=pk)
-        cache.set(cache_key, employee, CacheTTL.MEDIUM)
-        return employee
-    except Employee.DoesNotExist:
-        return None
+    return get_cached_value(CacheKeys.EMPLOYEE_DETAIL.format(id=pk), fetch, CacheTTL.MEDIUM)
 
 
 def create_employee(**data) -> Employee:
@@ -0,0 +1,261 @@
+"""
+Columnar snapshot of the employee directory
+
+The list page only needs ids, names, org/grade/position ids, status and the
+career and contract dates (ISO strings) to scope, filter, sort and paginate
+(text search goes through apps.employees.search). Those columns are kept in
+a Redis hash (one field per employee, JSON-encoded row) so saving an
+employee patches a single field instead of dropping the whole directory.
+Each worker keeps a decoded copy and reloads it only when the directory
+revision changes, so a cache hit costs one small GET.
+"""
+import json
+import logging
+import operator
+import threading
+import time
+import zlib
+from functools import cached_property
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from django.core.cache import cache
+from redis.exceptions import WatchError
+
+from .cache import (
+    CacheKeys, CacheTTL, get_cached_value, lock_key, tagged_key, LOCK_POLL_INTERVAL, LOCK_TIMEOUT, LOCK_WAIT,
+)
+from .listing import EmployeeRow
+from .models import Employee, Direction, Division, Service, Grade, Position
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = (
+    'id', 'employee_id', 'first_name', 'last_name', 'email', 'ppr', 'cin', 'phone',
+    'direction_id', 'division_id', 'service_id', 'grade_id', 'position_id',
+    'status', 'user_id', 'created_at',
+    'grade_since', 'retires_on', 'titularisation_date', 'contract_end_date',
+)
+DATE_COLUMNS = ('grade_since', 'retires_on', 'titularisation_date', 'contract_end_date')
+SORT_COLUMNS = DATE_COLUMNS
+
+# Range lookups ``select`` accepts besides equality (``retires_on__lte``...)
+LOOKUPS = {'gt': operator.gt, 'gte': operator.ge, 'lt': operator.lt, 'lte': operator.le}
+
+BUILT_FIELD = '__built__'  # Marks a complete hash (patches never create it)
+
+
+def _encode_row(row: Sequence) -> str:
+    return json.dumps(row, separators=(',', ':'))
+
+
+def _load_rows(pks: Optional[Iterable[int]] = None) -> List[list]:
+    """Rows in COLUMNS order, ``created_at`` as a POSIX timestamp and dates as ISO strings (JSON-safe)"""
+    qs = Employee.objects.order_by()
+    if pks is not None:
+        qs = qs.filter(pk__in=list(pks))
+    created = COLUMNS.index('created_at')
+    dates = [COLUMNS.index(name) for name in DATE_COLUMNS]
+    rows = []
+    for row in qs.values_list(*COLUMNS):
+        row = list(row)
+        row[created] = row[created].timestamp() if row[created] else 0
+        for i in dates:
+            row[i] = row[i].isoformat() if row[i] else None
+        rows.append(row)
+    return rows
+
+
+class DirectorySnapshot:
+    """Immutable column store, rows sorted like Employee.Meta.ordering (-created_at)"""
+
+    def __init__(self, rows: Iterable[Sequence]):
+        created = COLUMNS.index('created_at')
+        rows = sorted(rows, key=lambda r: (r[created], r[0]), reverse=True)
+        self.columns: Dict[str, tuple] = {
+            name: tuple(r[i] for r in rows) for i, name in enumerate(COLUMNS)
+        }
+        self.ids = self.columns['id']
+        self.revision: Optional[str] = None  # Shared directory revision it was read at (None: not shared)
+        self._derived = {}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def derived(self, key, compute):
+        """``compute(self)``, memoised on this snapshot under ``key``.
+
+        Snapshots are immutable and replaced on every directory change, so a
+        value derived from one (report, forecast) is current for as long as
+        the snapshot is.
+        """
+        try:
+            return self._derived[key]
+        except KeyError:
+            value = self._derived[key] = compute(self)
+            return value
+
+    def select(self, filters: Optional[Dict[str, object]] = None) -> List[int]:
+        """Return employee pks in directory order.
+
+        ``filters`` maps a column to the value it must equal, or
+        ``column__gt/gte/lt/lte`` to a bound (rows without a value never
+        match a range).
+        """
+        rows = range(len(self.ids))
+        for key, value in (filters or {}).items():
+            column, _, lookup = key.partition('__')
+            values = self.columns[column]
+            if lookup:
+                compare = LOOKUPS[lookup]
+                rows = [i for i in rows if values[i] is not None and compare(values[i], value)]
+            else:
+                rows = [i for i in rows if values[i] == value]
+        return [self.ids[i] for i in rows]
+
+    @cached_property
+    def positions(self) -> Dict[int, int]:
+        """Row index of each pk"""
+        return {pk: i for i, pk in enumerate(self.ids)}
+
+    def order(self, pks: Sequence[int], column: str, descending: bool = False) -> List[int]:
+        """``pks`` sorted on ``column`` (stable; rows without a value last)"""
+        values, positions = self.columns[column], self.positions
+        present = [pk for pk in pks if values[positions[pk]] is not None]
+        missing = [pk for pk in pks if values[positions[pk]] is None]
+        return sorted(present, key=lambda pk: values[positions[pk]], reverse=descending) + missing
+
+
+def name_maps() -> Dict[str, Dict[int, str]]:
+    """Names per org/taxonomy id column, from the org/taxonomy caches"""
+    def names(model):
+        return lambda: dict(model.objects.values_list('id', 'name'))
+
+    return {
+        'direction_id': get_cached_value(CacheKeys.DIRECTION_NAMES, names(Direction), CacheTTL.LONG),
+        'division_id': get_cached_value(CacheKeys.DIVISION_NAMES, names(Division), CacheTTL.LONG),
+        'service_id': get_cached_value(CacheKeys.SERVICE_NAMES, names(Service), CacheTTL.LONG),
+        'grade_id': get_cached_value(CacheKeys.GRADE_NAMES, names(Grade), CacheTTL.LONG),
+        'position_id': get_cached_value(CacheKeys.POSITION_NAMES, names(Position), CacheTTL.LONG),
+    }
+
+
+_local_lock = threading.Lock()
+_local_snapshot = None  # (hash key, revision, DirectorySnapshot)
+
+
+# Rows cached under an older column layout are never decoded with this one
+_LAYOUT = format(zlib.crc32(','.join(COLUMNS).encode()), 'x')
+
+
+def _keys():
+    return (
+        cache.make_key(tagged_key(f'{CacheKeys.EMPLOYEE_DIRECTORY}:{_LAYOUT}')),
+        cache.make_key(CacheKeys.EMPLOYEE_DIRECTORY_REV),
+    )
+
+
+def _build(conn, hash_key: str, rev_key: str):
+    """Load and publish a full snapshot (caller holds the build lock); the revision is None when nothing was published"""
+    try:
+        with conn.pipeline() as pipe:
+            # A patch committed while the rows load bumps the revision: the
+            # publish is then abandoned rather than overwriting the patched row
+            pipe.watch(rev_key)
+            rows = _load_rows()
+            pipe.multi()
+            pipe.delete(hash_key)
+            mapping = {str(row[0]): _encode_row(row) for row in rows}
+            mapping[BUILT_FIELD] = '1'
+            pipe.hset(hash_key, mapping=mapping)
+            pipe.expire(hash_key, CacheTTL.VERY_LONG)
+            pipe.incr(rev_key)
+            try:
+                revision = pipe.execute()[-1]
+            except WatchError:
+                return DirectorySnapshot(rows), None
+    finally:
+        cache.delete(lock_key(hash_key))
+    return DirectorySnapshot(rows), str(revision).encode()
+
+
+def _wait_for_build(conn, hash_key: str, rev_key: str):
+    """Wait for another worker's publish: ``(raw hash, revision)``, or None after LOCK_WAIT"""
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        if conn.hexists(hash_key, BUILT_FIELD):
+            # Revision first: a patch landing in between only makes the next read reload
+            revision = conn.get(rev_key)
+            raw = conn.hgetall(hash_key)
+            if BUILT_FIELD.encode() in raw:
+                return raw, revision
+    return None
+
+
+def get_directory() -> DirectorySnapshot:
+    """Return the directory snapshot, loading or building it as needed"""
+    global _local_snapshot
+    from django_redis import get_redis_connection
+    try:
+        conn = get_redis_connection("default")
+        hash_key, rev_key = _keys()
+        revision = conn.get(rev_key)
+        local = _local_snapshot
+        if local and local[0] == hash_key and revision is not None and local[1] == revision:
+            return local[2]
+
+        raw = conn.hgetall(hash_key)
+        if BUILT_FIELD.encode() not in raw:
+            if cache.add(lock_key(hash_key), 1, LOCK_TIMEOUT):
+                snapshot, revision = _build(conn, hash_key, rev_key)
+                if revision is None:
+                    return snapshot
+                raw = None
+            elif local:
+                # Another worker is publishing: serve our previous copy meanwhile
+                return local[2]
+            else:
+                published = _wait_for_build(conn, hash_key, rev_key)
+                if published is None:
+                    return DirectorySnapshot(_load_rows())
+                raw, revision = published
+        if raw is not None:
+            raw.pop(BUILT_FIELD.encode())
+            snapshot = DirectorySnapshot(json.loads(v) for v in raw.values())
+    except Exception as exc:
+        logger.warning('Employee directory cache unavailable: %s', exc)
+        return DirectorySnapshot(_load_rows())
+
+    snapshot.revision = revision.decode() if revision is not None else None
+    with _local_lock:
+        _local_snapshot = (hash_key, revision, snapshot)
+    return snapshot
+
+
+def patch_directory(employee_id: int):
+    """Rewrite (or drop, if deleted) one employee's row in the shared snapshot"""
+    from django_redis import get_redis_connection
+    try:
+        conn = get_redis_connection("default")
+        hash_key, rev_key = _keys()
+        if not conn.hexists(hash_key, BUILT_FIELD):
+            # Nothing to patch (expired or never built): just make workers
+            # drop their local copy so the next read rebuilds
+            conn.incr(rev_key)
+            return
+        rows = _load_rows([employee_id])
+        pipe = conn.pipeline()
+        if rows:
+            pipe.hset(hash_key, str(employee_id), _encode_row(rows[0]))
+        else:
+            pipe.hdel(hash_key, str(employee_id))
+        pipe.incr(rev_key)
+        pipe.execute()
+    except Exception as exc:
+        logger.warning('Could not patch employee directory row %s: %s', employee_id, exc)
+
+
+def load_employees(pks: Sequence[int]) -> List[EmployeeRow]:
+    """Load one page of pks as listing rows, preserving order"""
+    by_pk = {row.id: row for row in Employee.objects.for_listing().filter(pk__in=list(pks))}
+    return [by_pk[pk] for pk in pks if pk in by_pk]
@@ -0,0 +1,198 @@
+"""
+Promotion eligibility of the whole workforce
+
+``Employee.next_grade_eligibility`` answers for one employee (two queries
+plus per-rule date arithmetic). ``eligibility_report`` answers for everyone
+at once: the active progression rules come from the taxonomy cache, the
+employees from the directory snapshot (grade, direction, status and the
+stored ``grade_since``), and the with-exam / without-exam dates are computed
+one grade at a time over the ISO date column, without touching the database.
+
+The report is memoised on the directory snapshot, per taxonomy generation.
+A grade change (history entry or employee save) replaces the snapshot and a
+rule change bumps the taxonomy tag, so the next call after either
+recomputes.
+"""
+import datetime
+from collections import defaultdict
+from typing import Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from .cache import CacheKeys, CacheTTL, cache_tag, get_cached_value
+from .directory import DirectorySnapshot, get_directory, name_maps
+from .models import GradeProgressionRule
+
+# Statuses whose time in grade counts towards promotion
+ELIGIBLE_STATUSES = ('active', 'on_leave', 'detached')
+ELIGIBILITY_BASES = (
+    ('any', 'Avec ou sans examen'),
+    ('with_exam', 'Avec examen'),
+    ('without_exam', 'Sans examen'),
+)
+
+EXPORT_COLUMNS = (
+    ('Matricule', 'employee_id'),
+    ('Nom complet', 'full_name'),
+    ('Direction', 'direction'),
+    ('Grade', 'grade'),
+    ('Grade visé', 'target_grade'),
+    ('Dans le grade depuis', 'grade_since'),
+    ('Éligible avec examen', 'with_exam_date'),
+    ('Éligible sans examen', 'without_exam_date'),
+)
+
+
+class EligibilityRule(NamedTuple):
+    id: int
+    source_grade_id: int
+    target_grade_id: int
+    years_with_exam: Optional[int]
+    years_without_exam: Optional[int]
+
+
+class EligibilityEntry(NamedTuple):
+    """One employee and one rule of their grade; dates are ISO strings"""
+    employee_id: int  # pk
+    rule: EligibilityRule
+    grade_since: str
+    with_exam_date: Optional[str]
+    without_exam_date: Optional[str]
+
+    def date(self, basis: str = 'any') -> Optional[str]:
+        """Eligibility date on ``basis`` (the earlier of the two for ``any``)"""
+        if basis == 'with_exam':
+            return self.with_exam_date
+        if basis == 'without_exam':
+            return self.without_exam_date
+        dates = [d for d in (self.with_exam_date, self.without_exam_date) if d]
+        return min(dates) if dates else None
+
+
+def active_rules() -> List[EligibilityRule]:
+    """Active progression rules (taxonomy cache)"""
+    return get_cached_value(
+        CacheKeys.PROGRESSION_RULES,
+        lambda: [EligibilityRule(*row) for row in GradeProgressionRule.objects.filter(is_active=True).values_list(
+            'id', 'source_grade_id', 'target_grade_id', 'years_with_exam', 'years_without_exam'
+        ).order_by('source_grade_id', 'target_grade_id')],
+        CacheTTL.LONG,
+    )
+
+
+def shift_years(dates: Sequence[str], years: Optional[int]) -> List[Optional[str]]:
+    """ISO ``dates`` moved ``years`` later (Feb 29 -> Feb 28), all None without ``years``"""
+    if years is None:
+        return [None] * len(dates)
+    shifted = []
+    for date in dates:
+        year = int(date[:4]) + years
+        rest = date[4:]
+        if rest == '-02-29' and not (year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)):
+            rest = '-02-28'
+        shifted.append(f'{year:04d}{rest}')
+    return shifted
+
+
+class EligibilityReport:
+    """Eligibility entries of every employee holding a grade that has active rules"""
+
+    def __init__(self, directory: DirectorySnapshot, rules: Sequence[EligibilityRule]):
+        self.directory = directory
+        rules_by_grade = defaultdict(list)
+        for rule in rules:
+            rules_by_grade[rule.source_grade_id].append(rule)
+
+        columns = directory.columns
+        grades, statuses, since = columns['grade_id'], columns['status'], columns['grade_since']
+        rows_by_grade = defaultdict(list)
+        for i, grade_id in enumerate(grades):
+            if grade_id in rules_by_grade and statuses[i] in ELIGIBLE_STATUSES and since[i]:
+                rows_by_grade[grade_id].append(i)
+
+        ids = directory.ids
+        self.entries: List[EligibilityEntry] = []
+        for grade_id, rows in rows_by_grade.items():
+            starts = [since[i] for i in rows]
+            employees = [ids[i] for i in rows]
+            for rule in rules_by_grade[grade_id]:
+                self.entries.extend(map(
+                    EligibilityEntry, employees, [rule] * len(rows), starts,
+                    shift_years(starts, rule.years_with_exam), shift_years(starts, rule.years_without_exam),
+                ))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def select(self, employee_ids: Optional[set] = None, grade_id: Optional[int] = None,
+               target_grade_id: Optional[int] = None, start: Optional[str] = None, end: Optional[str] = None,
+               basis: str = 'any') -> List[int]:
+        """Indexes of the matching entries, soonest eligibility date first.
+
+        ``employee_ids`` restricts to some employees (scope, org filters);
+        ``start`` / ``end`` are inclusive ISO bounds on the ``basis`` date.
+        Entries without a date on ``basis`` only match when no window is given.
+        """
+        selected = []
+        for index, entry in enumerate(self.entries):
+            if employee_ids is not None and entry.employee_id not in employee_ids:
+                continue
+            if grade_id is not None and entry.rule.source_grade_id != grade_id:
+                continue
+            if target_grade_id is not None and entry.rule.target_grade_id != target_grade_id:
+                continue
+            date = entry.date(basis)
+            if start or end:
+                if date is None or (start and date < start) or (end and date > end):
+                    continue
+            elif basis != 'any' and date is None:
+                continue
+            selected.append((date or '9999', index))
+        selected.sort()
+        return [index for _, index in selected]
+
+    def rows(self, indexes: Sequence[int]) -> List[Dict[str, object]]:
+        """Display rows (names from the directory and taxonomy caches)"""
+        names = name_maps()
+        columns, positions = self.directory.columns, self.directory.positions
+        grades, directions = names['grade_id'], names['direction_id']
+        rows = []
+        for index in indexes:
+            entry = self.entries[index]
+            i = positions[entry.employee_id]
+            rows.append({
+                'pk': entry.employee_id,
+                'employee_id': columns['employee_id'][i],
+                'full_name': f"{columns['first_name'][i]} {columns['last_name'][i]}",
+                'direction': directions.get(columns['direction_id'][i], ''),
+                'grade': grades.get(entry.rule.source_grade_id, ''),
+                'target_grade': grades.get(entry.rule.target_grade_id, ''),
+                'grade_since': _date(entry.grade_since),
+                'with_exam_date': _date(entry.with_exam_date),
+                'without_exam_date': _date(entry.without_exam_date),
+            })
+        return rows
+
+    def export_rows(self, indexes: Sequence[int], chunk_size: int = 2000) -> Iterator[tuple]:
+        """``rows`` in EXPORT_COLUMNS order, built ``chunk_size`` at a time"""
+        keys = [key for _, key in EXPORT_COLUMNS]
+        for start in range(0, len(indexes), chunk_size):
+            for row in self.rows(indexes[start:start + chunk_size]):
+                yield tuple(row[key] for key in keys)
+
+
+def _date(value: Optional[str]) -> Optional[datetime.date]:
+    return datetime.date.fromisoformat(value) if value else None
+
+
+def next_quarter(today: datetime.date) -> Tuple[datetime.date, datetime.date]:
+    """First and last day of the calendar quarter after ``today``'s"""
+    month = (today.month - 1) // 3 * 3 + 4  # 4, 7, 10 or 13
+    start = datetime.date(today.year + (month > 12), (month - 1) % 12 + 1, 1)
+    following = datetime.date(start.year + (start.month == 10), (start.month + 2) % 12 + 1, 1)
+    return start, following - datetime.timedelta(days=1)
+
+
+def eligibility_report() -> EligibilityReport:
+    """Report for the current directory and rules (memoised on the snapshot until either changes)"""
+    return get_directory().derived(
+        ('eligibility', cache_tag('taxonomy')), lambda directory: EligibilityReport(directory, active_rules())
+    )
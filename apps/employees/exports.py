@@ -0,0 +1,51 @@
+"""
+Employee directory export (see ``hr_project.exports``)
+
+Exports apply the employee list's filters and scope
+(``employee_list_filters``) so a download matches what the list shows.
+"""
+from hr_project.exports import ExportDataset
+
+from .models import Employee
+from .search import search_queryset
+
+EMPLOYEE_EXPORT_COLUMNS = (
+    ('Matricule', 'employee_id'),
+    ('PPR', 'ppr'),
+    ('CIN', 'cin'),
+    ('Prénom', 'first_name'),
+    ('Nom', 'last_name'),
+    ('Email', 'email'),
+    ('Téléphone', 'phone'),
+    ('Date de naissance', 'date_of_birth'),
+    ('Direction', 'direction__name'),
+    ('Division', 'division__name'),
+    ('Service', 'service__name'),
+    ('Département', 'departement__name'),
+    ('Filière', 'filiere__name'),
+    ('Fonction', 'position__name'),
+    ('Grade', 'grade__name'),
+    ('Échelle', 'echelle'),
+    ('Échelon', 'echelon'),
+    ('Hors Échelle', 'hors_echelle'),
+    ('Type de contrat', 'contract_type'),
+    ('Date de recrutement', 'hire_date'),
+    ('Date début contrat', 'contract_start_date'),
+    ('Date fin contrat', 'contract_end_date'),
+    ('Date de titularisation', 'titularisation_date'),
+    ('Dans le grade depuis', 'grade_since'),
+    ('Statut', 'status'),
+    ('Âge de retraite', 'retirement_age'),
+    ('Date de retraite', 'retires_on'),
+)
+
+
+def employee_dataset(filters=None, visible=True, search_query='') -> ExportDataset:
+    """Employees matching list ``filters`` (and the full-text ``search_query``)"""
+    queryset = Employee.objects.filter(**(filters or {})) if visible else Employee.objects.none()
+    if search_query:
+        queryset = search_queryset(queryset, search_query)
+    return ExportDataset('employees', queryset, EMPLOYEE_EXPORT_COLUMNS, labels={
+        'status': dict(Employee.STATUS_CHOICES),
+        'contract_type': dict(Employee.CONTRACT_TYPE_CHOICES),
+    })
@@ -0,0 +1,110 @@
+"""
+Retirement and contract-end forecast
+
+Planning looks ten years ahead: how many people retire, and how many
+contracts end, each year per direction and per grade. ``Employee.retirement_date``
+answers for one person; ``workforce_forecast`` answers for everyone from the
+directory snapshot, which already carries the stored ``retires_on``, the
+``contract_end_date``, the status and the org/grade ids (one query when it
+is cold). Each date column is reduced to a column of years once, then
+counted per ``(id, year)`` pair with ``Counter``.
+
+Like the eligibility report, a forecast is memoised on the snapshot: it is
+recomputed only after an employee changed.
+"""
+from collections import Counter, defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from django.utils import timezone
+
+from .directory import DirectorySnapshot, get_directory, name_maps
+
+FORECAST_YEARS = 10
+# Employees still in service (retired and inactive ones are out of the forecast)
+FORECAST_STATUSES = ('active', 'on_leave', 'detached', 'suspended')
+
+# (name, label, directory date column)
+MEASURES = (
+    ('retirements', 'Départs à la retraite', 'retires_on'),
+    ('contract_ends', 'Fins de contrat', 'contract_end_date'),
+)
+# (name, label, directory id column)
+DIMENSIONS = (
+    ('direction', 'Direction', 'direction_id'),
+    ('grade', 'Grade', 'grade_id'),
+)
+
+
+class ForecastRow:
+    """Counts of one direction or grade: ``overdue`` (before the first year), then one per year"""
+
+    def __init__(self, key: Optional[int], name: str, overdue: int, counts: List[int]):
+        self.key = key
+        self.name = name
+        self.overdue = overdue
+        self.counts = counts
+
+    @property
+    def total(self) -> int:
+        return self.overdue + sum(self.counts)
+
+
+class WorkforceForecast:
+    """Yearly retirements and contract ends from ``first_year``, overall and per dimension"""
+
+    def __init__(self, directory: DirectorySnapshot, first_year: int, years: int = FORECAST_YEARS):
+        self.years = list(range(first_year, first_year + years))
+        last_year = self.years[-1]
+        columns = directory.columns
+        in_service = [status in FORECAST_STATUSES for status in columns['status']]
+
+        # (measure, dimension or None) -> {id: [overdue, year 1, ..., year n]}
+        self._counts: Dict[Tuple[str, Optional[str]], Dict[Optional[int], List[int]]] = {}
+        for measure, _, date_column in MEASURES:
+            # 0 for rows outside the forecast (no date, not in service, too far)
+            year_column = [
+                min(int(date[:4]), last_year + 1) if date and keep else 0
+                for date, keep in zip(columns[date_column], in_service)
+            ]
+            groups = [(None, None)] + [(dimension, columns[id_column]) for dimension, _, id_column in DIMENSIONS]
+            for dimension, ids in groups:
+                pairs = zip(ids, year_column) if ids is not None else ((None, year) for year in year_column)
+                series = defaultdict(lambda: [0] * (len(self.years) + 1))
+                for (key, year), count in Counter(pairs).items():
+                    if 0 < year <= last_year:
+                        series[key][max(year - first_year + 1, 0)] += count
+                self._counts[(measure, dimension)] = dict(series)
+
+    @property
+    def first_year(self) -> int:
+        return self.years[0]
+
+    def totals(self, measure: str) -> ForecastRow:
+        counts = self._counts[(measure, None)].get(None, [0] * (len(self.years) + 1))
+        return ForecastRow(None, 'Total', counts[0], counts[1:])
+
+    def rows(self, measure: str, dimension: str) -> List[ForecastRow]:
+        """One row per direction or grade with at least one event, by name"""
+        id_column = dict((name, column) for name, _, column in DIMENSIONS)[dimension]
+        names = name_maps()[id_column]
+        rows = [
+            ForecastRow(key, names.get(key, '—') if key is not None else '—', counts[0], counts[1:])
+            for key, counts in self._counts[(measure, dimension)].items()
+        ]
+        return sorted(rows, key=lambda row: row.name)
+
+    def header(self, dimension: str) -> List[str]:
+        label = dict((name, label) for name, label, _ in DIMENSIONS)[dimension]
+        return [label, f'Avant {self.first_year}'] + [str(year) for year in self.years] + ['Total']
+
+    def export_rows(self, measure: str, dimension: str) -> Iterator[list]:
+        """``rows`` then the totals, in ``header`` order"""
+        for row in self.rows(measure, dimension) + [self.totals(measure)]:
+            yield [row.name, row.overdue] + row.counts + [row.total]
+
+
+def workforce_forecast(first_year: Optional[int] = None) -> WorkforceForecast:
+    """Forecast from ``first_year`` (default: this year), memoised on the directory snapshot"""
+    if first_year is None:
+        first_year = timezone.localdate().year
+    return get_directory().derived(('forecast', first_year), lambda directory: WorkforceForecast(directory, first_year))
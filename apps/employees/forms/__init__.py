@@ -7,3 +7,5 @@ from .deployment_forms import (  # noqa: F401
     OrdreMissionForm,
     OrdreMissionReviewForm,
 )
+from .import_forms import EmployeeImportForm  # noqa: F401
+from .bulk_forms import EmployeeBulkForm  # noqa: F401
@@ -0,0 +1,115 @@
+from django import forms
+from django.utils import timezone
+
+from ..bulk import BULK_OPERATIONS, MAX_ECHELON
+from ..models import Direction, Division, Employee, Grade, Service
+
+HORS_ECHELLE_CHOICES = [('', 'Inchangé'), ('yes', 'Oui'), ('no', 'Non')]
+
+
+# Active units with the parents their labels show (Division/Service __str__)
+CHOICE_QUERYSETS = {
+    Direction: lambda: Direction.objects.filter(is_active=True),
+    Division: lambda: Division.objects.filter(is_active=True).select_related('direction'),
+    Service: lambda: Service.objects.filter(is_active=True).select_related('direction', 'division__direction'),
+    Grade: lambda: Grade.objects.all(),
+}
+
+
+def _select(model, label):
+    return forms.ModelChoiceField(
+        queryset=CHOICE_QUERYSETS[model](),
+        label=label,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+
+
+class EmployeeBulkForm(forms.Form):
+    """Selection, operation and target of a bulk employee operation (see bulk.py)"""
+    # Selection
+    search = forms.CharField(
+        label='Recherche', required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Nom, matricule, CIN...'})
+    )
+    status = forms.ChoiceField(
+        label='Statut', required=False, choices=[('', 'Tous')] + Employee.STATUS_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    direction = _select(Direction, 'Direction')
+    division = _select(Division, 'Division')
+    service = _select(Service, 'Service')
+    grade = _select(Grade, 'Grade')
+
+    operation = forms.ChoiceField(
+        label='Opération', choices=BULK_OPERATIONS,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    # Transfer / service move target
+    target_direction = _select(Direction, 'Direction de destination')
+    target_division = _select(Division, 'Division de destination')
+    target_service = _select(Service, 'Service de destination')
+    moved_service = _select(Service, 'Service à rattacher')
+    # Promotion
+    target_grade = _select(Grade, 'Nouveau grade')
+    target_echelle = forms.IntegerField(
+        label='Nouvelle échelle', required=False, min_value=1, max_value=11,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': '1-11'})
+    )
+    target_echelon = forms.IntegerField(
+        label='Nouvel échelon', required=False, min_value=1, max_value=MAX_ECHELON,
+        widget=forms.NumberInput(attrs={'class': 'form-control', 'placeholder': f'1-{MAX_ECHELON}'})
+    )
+    echelon_step = forms.IntegerField(
+        label='Avancer de n échelons', required=False, min_value=1, max_value=MAX_ECHELON - 1,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+    hors_echelle = forms.ChoiceField(
+        label='Hors échelle', required=False, choices=HORS_ECHELLE_CHOICES,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+
+    effective_date = forms.DateField(
+        label='Date effective', initial=timezone.localdate,
+        widget=forms.DateInput(attrs={'class': 'form-control', 'type': 'date'})
+    )
+    note = forms.CharField(
+        label='Note (historique)', required=False,
+        widget=forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Référence de la décision...'})
+    )
+
+    SELECTION_FIELDS = ('status', 'direction', 'division', 'service', 'grade')
+    PROMOTION_FIELDS = ('target_grade', 'target_echelle', 'target_echelon', 'echelon_step', 'hors_echelle')
+
+    def selection_fields(self):
+        return [self['search']] + [self[name] for name in self.SELECTION_FIELDS]
+
+    def promotion_fields(self):
+        return [self[name] for name in self.PROMOTION_FIELDS]
+
+    def clean(self):
+        cleaned_data = super().clean()
+        operation = cleaned_data.get('operation')
+        if operation in ('transfer', 'promotion'):
+            # Never apply an operation to the whole staff by accident
+            if not cleaned_data.get('search') and not any(cleaned_data.get(f) for f in self.SELECTION_FIELDS):
+                raise forms.ValidationError('Sélectionnez les employés concernés (au moins un critère).')
+        if operation == 'service_move':
+            if not cleaned_data.get('moved_service'):
+                self.add_error('moved_service', 'Choisissez le service à rattacher.')
+            if bool(cleaned_data.get('target_direction')) == bool(cleaned_data.get('target_division')):
+                self.add_error('target_division', 'Choisissez soit une division, soit une direction de rattachement.')
+        return cleaned_data
+
+    def selection(self):
+        """Filters of ``Employee.objects`` for the selected employees"""
+        filters = {}
+        for field in self.SELECTION_FIELDS:
+            value = self.cleaned_data.get(field)
+            if value:
+                filters[field] = value
+        return filters
+
+    @property
+    def hors_echelle_value(self):
+        return {'yes': True, 'no': False}.get(self.cleaned_data.get('hors_echelle'))
@@ -1,6 +1,7 @@
 from django import forms
 from django.utils import timezone
 from ..models import Employee, Direction, Division, Service, Grade, Position, Departement, Filiere
+from ..orgtree import org_tree
 
 
 class EmployeeForm(forms.ModelForm):
@@ -68,7 +69,18 @@ class EmployeeForm(forms.ModelForm):
             'titularisation_date': 'Date de titularisation',
             'status': 'Statut',
         }
-    
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.instance.pk:
+            # Left blank, the next matricule is taken from the sequence on save
+            self.fields['employee_id'].required = False
+            self.fields['employee_id'].widget.attrs['placeholder'] = 'Automatique si vide'
+        # Option labels from the cached org tree rather than a parent query per option
+        tree = org_tree()
+        for level in ('division', 'service', 'departement', 'filiere'):
+            self.fields[level].label_from_instance = lambda unit, level=level: tree.label(level, unit.pk)
+
     def clean_email(self):
         email = self.cleaned_data.get('email')
         qs = Employee.objects.filter(email=email)
@@ -80,6 +92,8 @@ class EmployeeForm(forms.ModelForm):
     
     def clean_employee_id(self):
         employee_id = self.cleaned_data.get('employee_id')
+        if not employee_id:
+            return employee_id
         qs = Employee.objects.filter(employee_id=employee_id)
         if self.instance.pk:
             qs = qs.exclude(pk=self.instance.pk)
@@ -122,13 +136,13 @@ class EmployeeForm(forms.ModelForm):
         if division and direction and division.direction_id != direction.id:
             self.add_error('division', "La division s�lectionn�e n�appartient pas � la direction choisie.")
         if service:
-            if service.division:
+            if service.division_id:
                 # Service under a division; ensure division/direction match
                 if division and service.division_id != division.id:
                     self.add_error('service', 'Le service s�lectionn� n�appartient pas � la division choisie.')
-                if direction and service.division.direction_id != direction.id:
+                if direction and org_tree().ancestor_id('service', service.pk, 'direction') != direction.id:
                     self.add_error('service', "Le service s�lectionn� n�appartient pas � la direction choisie.")
-            elif service.direction:
+            elif service.direction_id:
                 # Service attached directly to a direction; division should be empty or consistent
                 if division:
                     self.add_error('service', 'Ce service est rattach� directement � une direction; laissez la division vide.')
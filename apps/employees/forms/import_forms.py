@@ -0,0 +1,38 @@
+import os
+
+from django import forms
+
+from ..importer import DEFAULT_BATCH_SIZE
+
+IMPORT_EXTENSIONS = ('.csv', '.xlsx')
+
+
+class EmployeeImportForm(forms.Form):
+    file = forms.FileField(
+        label='Fichier (CSV ou XLSX)',
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control', 'accept': ','.join(IMPORT_EXTENSIONS)})
+    )
+    create_users = forms.BooleanField(
+        label='Créer les comptes utilisateurs',
+        required=False,
+        initial=True,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+    dry_run = forms.BooleanField(
+        label='Valider uniquement (aucune création)',
+        required=False,
+        widget=forms.CheckboxInput(attrs={'class': 'form-check-input'})
+    )
+    batch_size = forms.IntegerField(
+        label='Taille des lots',
+        initial=DEFAULT_BATCH_SIZE,
+        min_value=1,
+        max_value=5000,
+        widget=forms.NumberInput(attrs={'class': 'form-control'})
+    )
+
+    def clean_file(self):
+        upload = self.cleaned_data['file']
+        if os.path.splitext(upload.name)[1].lower() not in IMPORT_EXTENSIONS:
+            raise forms.ValidationError('Only .csv and .xlsx files can be imported.')
+        return upload
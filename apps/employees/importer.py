@@ -0,0 +1,500 @@
+"""
+Bulk employee import (CSV or XLSX)
+
+Creating employees one ``Employee.save()`` at a time costs an
+``employee_id`` lookup, a history SELECT, one ``get_or_create`` per leave
+type, a username probe loop and a cache invalidation per row. The importer
+streams the file instead, validates it in chunks against code maps loaded
+once, and writes each chunk with ``bulk_create``: users and their
+``Normal User`` membership, employees (search document and org path filled
+in), leave balances and an initial history entry. Signals do not fire for
+bulk inserts, so the FTS index is synced per batch and the employee caches
+are invalidated once, after the last batch.
+
+Rows are referenced by their line in the file; every rejected row gets a
+``RowError`` in the report and does not stop the import. A batch that fails
+at the database (e.g. a concurrent insert of the same CIN) is rolled back
+and all its rows are reported.
+"""
+import csv
+import datetime
+import io
+import os
+import unicodedata
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+
+from .models import (
+    Departement, Direction, Division, Employee, EmploymentHistory, Filiere, Grade, Position, Service,
+)
+from .sequences import allocate_employee_ids
+
+IMPORT_FIELDS = (
+    'first_name', 'last_name', 'cin', 'email', 'phone', 'date_of_birth', 'address',
+    'employee_id', 'ppr', 'retirement_age',
+    'direction', 'division', 'service', 'departement', 'filiere', 'position', 'grade',
+    'echelle', 'hors_echelle', 'echelon',
+    'contract_type', 'hire_date', 'contract_start_date', 'contract_end_date', 'titularisation_date',
+    'status',
+)
+REQUIRED_FIELDS = (
+    'first_name', 'last_name', 'cin', 'email', 'date_of_birth',
+    'direction', 'position', 'grade', 'hire_date',
+)
+# Columns holding codes of org units and taxonomy entries
+CODE_FIELDS = ('direction', 'division', 'service', 'departement', 'filiere', 'position', 'grade')
+DATE_FIELDS = ('date_of_birth', 'hire_date', 'contract_start_date', 'contract_end_date', 'titularisation_date')
+INT_FIELDS = ('retirement_age', 'echelle', 'echelon')
+UNIQUE_FIELDS = ('cin', 'email', 'employee_id', 'ppr')
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_PASSWORD = 'rabat2025'  # Same temporary password as EmployeeCreateView
+DATE_FORMATS = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y')
+TRUE_VALUES = {'1', 'true', 'oui', 'yes', 'x', 'o', 'y'}
+
+
+class ImportFormatError(Exception):
+    """The file cannot be read as an employee import (type, encoding or columns)"""
+
+
+class RowError(NamedTuple):
+    line: int
+    column: str
+    message: str
+
+
+class ImportReport:
+    def __init__(self, dry_run=False):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.users_created = 0
+        self.errors: List[RowError] = []
+
+    @property
+    def rejected_lines(self) -> int:
+        return len({error.line for error in self.errors})
+
+    def add(self, line: int, column: str, message: str):
+        self.errors.append(RowError(line, column, message))
+
+    def write_errors(self, stream):
+        """Write the error report as CSV (line, column, message)"""
+        writer = csv.writer(stream)
+        writer.writerow(RowError._fields)
+        writer.writerows(sorted(self.errors))
+
+
+# Reading
+
+def _normalize(header) -> str:
+    text = unicodedata.normalize('NFKD', str(header or '')).encode('ascii', 'ignore').decode()
+    return '_'.join(text.strip().lower().replace('-', ' ').split())
+
+
+def _header_aliases() -> Dict[str, str]:
+    """Normalised column names (field names and French labels) to field names"""
+    aliases = {}
+    for name in IMPORT_FIELDS:
+        field = Employee._meta.get_field(name)
+        aliases[_normalize(field.verbose_name)] = name
+        aliases[name] = name
+    return aliases
+
+
+def _map_header(header) -> List[Optional[str]]:
+    aliases = _header_aliases()
+    columns = [aliases.get(_normalize(h)) for h in header]
+    missing = [f for f in REQUIRED_FIELDS if f not in columns]
+    if missing:
+        raise ImportFormatError(f"Missing required column(s): {', '.join(missing)}")
+    return columns
+
+
+def _csv_rows(fileobj) -> Iterator[Tuple[int, list]]:
+    text = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    try:
+        sample = text.read(4096)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        text.seek(0)
+        reader = csv.reader(text, dialect)
+        for values in reader:
+            yield reader.line_num, values
+    except UnicodeDecodeError as exc:
+        raise ImportFormatError(f'The file is not UTF-8 encoded: {exc}')
+    finally:
+        text.detach()  # Leave the caller's file open
+
+
+def _xlsx_rows(fileobj) -> Iterator[Tuple[int, list]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFormatError('XLSX import requires openpyxl')
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ImportFormatError(f'Unreadable workbook: {exc}')
+    try:
+        for line, values in enumerate(workbook.active.iter_rows(values_only=True), start=1):
+            yield line, list(values)
+    finally:
+        workbook.close()
+
+
+def read_rows(fileobj, filename: str) -> Iterator[Tuple[int, Dict[str, object]]]:
+    """Yield ``(line, {field: raw value})`` for each non-empty data row, lazily"""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension in ('.csv', '.txt'):
+        rows = _csv_rows(fileobj)
+    elif extension in ('.xlsx', '.xlsm'):
+        rows = _xlsx_rows(fileobj)
+    else:
+        raise ImportFormatError(f'Unsupported file type "{extension}" (expected .csv or .xlsx)')
+
+    columns = None
+    for line, values in rows:
+        if not any(v not in (None, '') for v in values):
+            continue
+        if columns is None:
+            columns = _map_header(values)
+            continue
+        yield line, {column: value for column, value in zip(columns, values) if column}
+    if columns is None:
+        raise ImportFormatError('The file is empty')
+
+
+# Parsing
+
+def _text(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)  # Spreadsheets store identifiers as numbers
+    return str(value).strip()
+
+
+def _parse_date(value) -> Optional[datetime.date]:
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    text = _text(value)
+    if not text:
+        return None
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f'Invalid date "{text}" (expected YYYY-MM-DD or DD/MM/YYYY)')
+
+
+def _parse_int(value) -> Optional[int]:
+    text = _text(value)
+    if not text:
+        return None
+    try:
+        return int(text)
+    except ValueError:
+        raise ValueError(f'Invalid number "{text}"')
+
+
+def _parse_bool(value) -> bool:
+    if isinstance(value, bool):
+        return value
+    return _text(value).lower() in TRUE_VALUES
+
+
+class CodeMaps:
+    """Org unit and taxonomy ids by (case-insensitive) code, loaded once per import"""
+
+    def __init__(self):
+        def codes(queryset, *scope):
+            return {
+                (*(row[:-2]), row[-2].lower()): row[-1]
+                for row in queryset.values_list(*scope, 'code', 'id')
+            }
+        self.direction = codes(Direction.objects.all())
+        self.division = codes(Division.objects.all(), 'direction_id')
+        self.service_by_division = codes(Service.objects.filter(division__isnull=False), 'division_id')
+        self.service_by_direction = codes(Service.objects.filter(division__isnull=True), 'direction_id')
+        self.departement = codes(Departement.objects.all())
+        self.filiere = codes(Filiere.objects.all(), 'departement_id')
+        self.position = codes(Position.objects.all())
+        self.grade = codes(Grade.objects.all())
+
+    def resolve(self, codes: Dict[str, str]) -> Tuple[Dict[str, int], Dict[str, str]]:
+        """``({field_id: id}, {field: error})`` for the codes of one row"""
+        ids, errors = {}, {}
+
+        def lookup(field, mapping, key, scope=''):
+            value = mapping.get(key)
+            if value is None:
+                errors[field] = f'Unknown {field} code "{codes[field]}"{scope}'
+            ids[f'{field}_id'] = value
+            return value
+
+        def code(field):
+            return codes.get(field, '').lower()
+
+        direction = lookup('direction', self.direction, (code('direction'),)) if code('direction') else None
+        division = None
+        if code('division') and direction:
+            division = lookup('division', self.division, (direction, code('division')), ' in this direction')
+        if code('service') and direction:
+            if division:
+                lookup('service', self.service_by_division, (division, code('service')), ' in this division')
+            elif not code('division'):
+                lookup('service', self.service_by_direction, (direction, code('service')), ' in this direction')
+        departement = lookup('departement', self.departement, (code('departement'),)) if code('departement') else None
+        if code('filiere') and departement:
+            lookup('filiere', self.filiere, (departement, code('filiere')), ' in this département')
+        for field in ('position', 'grade'):
+            if code(field):
+                lookup(field, getattr(self, field), (code(field),))
+        return ids, errors
+
+
+# Importing
+
+class EmployeeImporter:
+    """Validate and create employees from a CSV/XLSX file in batches.
+
+    ``create_users`` provisions a login per employee (username from the full
+    name, temporary password, ``Normal User`` group) like EmployeeCreateView.
+    ``dry_run`` validates the whole file without writing anything.
+    """
+
+    def __init__(self, created_by=None, create_users=True, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+        self.created_by = created_by
+        self.create_users = create_users
+        self.batch_size = max(1, int(batch_size))
+        self.dry_run = dry_run
+
+    def run(self, fileobj, filename: str) -> ImportReport:
+        """Import every valid row; raises ImportFormatError when the file cannot be read"""
+        from .cache import invalidate_employee_cache
+        from apps.leaves.models import LeaveType
+
+        self.source = os.path.basename(filename)
+        self.report = ImportReport(dry_run=self.dry_run)
+        self.codes = CodeMaps()
+        self.seen = {field: set() for field in UNIQUE_FIELDS}
+        self.leave_types = list(LeaveType.objects.filter(is_active=True))
+        self.usernames = None
+        self.password_hash = None
+
+        chunk = []
+        for line, raw in read_rows(fileobj, filename):
+            self.report.rows += 1
+            chunk.append((line, raw))
+            if len(chunk) >= self.batch_size:
+                self._import_chunk(chunk)
+                chunk = []
+        if chunk:
+            self._import_chunk(chunk)
+
+        if self.report.created:
+            # Signals are bypassed by bulk_create: one invalidation for the whole file
+            invalidate_employee_cache()
+        return self.report
+
+    def _import_chunk(self, chunk):
+        valid = []
+        for line, raw in chunk:
+            employee = self._build(line, raw)
+            if employee is not None:
+                valid.append((line, employee))
+        valid = self._check_unique(valid)
+        if valid and not self.dry_run:
+            self._write(valid)
+
+    def _build(self, line: int, raw: Dict[str, object]) -> Optional[Employee]:
+        """Unsaved Employee for one row, or None after reporting its errors"""
+        errors = {}
+        values = {}
+        for field in IMPORT_FIELDS:
+            value = raw.get(field)
+            if field in REQUIRED_FIELDS and _text(value) == '' and not isinstance(value, datetime.date):
+                errors[field] = 'This field is required'
+                continue
+            try:
+                if field in DATE_FIELDS:
+                    values[field] = _parse_date(value)
+                elif field in INT_FIELDS:
+                    values[field] = _parse_int(value)
+                elif field == 'hors_echelle':
+                    values[field] = _parse_bool(value)
+                else:
+                    values[field] = _text(value)
+            except ValueError as exc:
+                errors[field] = str(exc)
+
+        codes = {field: values.pop(field, '') or '' for field in CODE_FIELDS}
+        ids, code_errors = self.codes.resolve(codes)
+        for field, message in code_errors.items():
+            errors.setdefault(field, message)
+
+        # Blank optional columns keep the model defaults
+        fields = {k: v for k, v in values.items() if v not in (None, '')}
+        if 'hors_echelle' in values:
+            fields['hors_echelle'] = values['hors_echelle']
+        for field in ('contract_type', 'status'):
+            if field in fields:
+                fields[field] = fields[field].lower()
+        employee = Employee(**fields, **ids)
+
+        exclude = set(CODE_FIELDS) | set(errors) | {'user', 'profile_picture', 'search_document', 'org_path'}
+        if not employee.employee_id:
+            exclude.add('employee_id')
+        try:
+            employee.clean_fields(exclude=exclude)
+        except ValidationError as exc:
+            for field, messages in exc.message_dict.items():
+                errors.setdefault(field, ' '.join(messages))
+
+        for field, message in errors.items():
+            self.report.add(line, field, message)
+        return None if errors else employee
+
+    def _check_unique(self, rows):
+        """Drop rows clashing with existing employees or earlier rows of the file"""
+        existing = {}
+        for field in UNIQUE_FIELDS:
+            values = {getattr(e, field) for _, e in rows if getattr(e, field)}
+            existing[field] = set(
+                Employee.objects.filter(**{f'{field}__in': values}).order_by().values_list(field, flat=True)
+            ) if values else set()
+
+        unique = []
+        for line, employee in rows:
+            clashes = []
+            for field in UNIQUE_FIELDS:
+                value = getattr(employee, field)
+                if not value:
+                    continue
+                if value in existing[field]:
+                    clashes.append((field, f'An employee with this {field} already exists'))
+                elif value in self.seen[field]:
+                    clashes.append((field, f'Duplicate {field} in the file'))
+            for field, message in clashes:
+                self.report.add(line, field, message)
+            if clashes:
+                continue
+            for field in UNIQUE_FIELDS:
+                if getattr(employee, field):
+                    self.seen[field].add(getattr(employee, field))
+            unique.append((line, employee))
+        return unique
+
+    # Writing
+
+    def _allocate_employee_ids(self, employees: List[Employee]):
+        """Number employees without a matricule from the sequence (one claim per batch)"""
+        pending = [e for e in employees if not e.employee_id]
+        while pending:
+            # Skip matricules given explicitly further up in the file
+            values = [v for v in allocate_employee_ids(len(pending)) if v not in self.seen['employee_id']]
+            for employee, value in zip(pending, values):
+                employee.employee_id = value
+                self.seen['employee_id'].add(value)
+            pending = pending[len(values):]
+
+    def _unique_username(self, employee: Employee) -> str:
+        if self.usernames is None:
+            self.usernames = set(User.objects.values_list('username', flat=True))
+        base = ''.join(employee.full_name.split()).lower()
+        username, i = base, 1
+        while username in self.usernames:
+            username = f'{base}{i}'
+            i += 1
+        self.usernames.add(username)
+        return username
+
+    def _create_users(self, employees: List[Employee]) -> int:
+        if self.password_hash is None:
+            self.password_hash = make_password(DEFAULT_PASSWORD)  # Hashed once, not per user
+            self.normal_user_group = Group.objects.filter(name='Normal User').values_list('id', flat=True).first()
+        users = [
+            User(
+                username=self._unique_username(e), email=e.email.strip().lower(),
+                first_name=e.first_name, last_name=e.last_name, password=self.password_hash,
+            ) for e in employees
+        ]
+        User.objects.bulk_create(users)
+        if users and users[0].pk is None:
+            # Backends without RETURNING (MySQL)
+            pks = dict(User.objects.filter(username__in=[u.username for u in users]).values_list('username', 'pk'))
+            for user in users:
+                user.pk = pks[user.username]
+        if self.normal_user_group:
+            membership = User.groups.through
+            membership.objects.bulk_create([
+                membership(user_id=user.pk, group_id=self.normal_user_group) for user in users
+            ])
+        for employee, user in zip(employees, users):
+            employee.user_id = user.pk
+        return len(users)
+
+    def _write(self, rows):
+        from apps.leaves.models import EmployeeLeaveBalance
+        from apps.leaves.utils import initial_balances
+        from .listing import org_path_for
+        from .search import document_for, sync_index
+
+        employees = [employee for _, employee in rows]
+        try:
+            with transaction.atomic():
+                self._allocate_employee_ids(employees)
+                users = self._create_users(employees) if self.create_users else 0
+                for employee in employees:
+                    employee.search_document = document_for(employee)
+                    employee.org_path = org_path_for(employee)
+                    # No grade change in the history yet: from titularisation/hire dates
+                    employee.grade_since = employee.grade_start_date
+                    employee.retires_on = employee.retirement_date
+                Employee.objects.bulk_create(employees)
+                if employees[0].pk is None:
+                    pks = dict(Employee.objects.filter(
+                        employee_id__in=[e.employee_id for e in employees]
+                    ).values_list('employee_id', 'pk'))
+                    for employee in employees:
+                        employee.pk = pks[employee.employee_id]
+
+                EmployeeLeaveBalance.objects.bulk_create(
+                    initial_balances(employees, self.leave_types), ignore_conflicts=True
+                )
+                EmploymentHistory.objects.bulk_create([
+                    EmploymentHistory(
+                        employee=e,
+                        change_type='contract' if e.contract_start_date else 'other',
+                        changes={'source': 'import', 'file': self.source},
+                        contract_start_date=e.contract_start_date,
+                        contract_end_date=e.contract_end_date,
+                        effective_date=e.hire_date,
+                        note=f'Imported from {self.source}',
+                        created_by=self.created_by,
+                    ) for e in employees
+                ])
+                sync_index([(e.pk, e.search_document) for e in employees])
+        except IntegrityError as exc:
+            for employee in employees:
+                employee.pk = employee.user_id = None
+            self.usernames = None  # Reload: this batch's usernames were rolled back
+            for line, _ in rows:
+                self.report.add(line, '', f'Batch rolled back: {exc}')
+            return
+        self.report.created += len(employees)
+        self.report.users_created += users
+
+
+def import_employees(fileobj, filename: str, **options) -> ImportReport:
+    return EmployeeImporter(**options).run(fileobj, filename)
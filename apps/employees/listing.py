@@ -0,0 +1,95 @@
+"""
+Lightweight employee rows for list pages
+
+``Employee.objects.for_listing()`` selects only the columns the list page
+renders and yields ``EmployeeRow`` objects instead of model instances: no
+joins beyond the position name, no ``address``/``profile_picture``/
+``search_document``, and no model ``__init__`` per row. The organisational
+path comes from the stored ``org_path`` column, written by ``Employee.save``
+and rewritten by ``refresh_org_paths`` when a direction, division or service
+is renamed.
+"""
+from typing import Optional
+
+from django.db.models import QuerySet
+from django.db.models.query import ValuesListIterable
+
+ORG_PATH_SEPARATOR = ' → '
+
+# Columns of an EmployeeRow, in slot order
+LISTING_FIELDS = (
+    'id', 'employee_id', 'first_name', 'last_name', 'email',
+    'org_path', 'position__name', 'status', 'created_at', 'grade_since', 'retires_on',
+)
+
+
+def build_org_path(direction: Optional[str], division: Optional[str], service: Optional[str]) -> str:
+    return ORG_PATH_SEPARATOR.join(name for name in (direction, division, service) if name)
+
+
+def org_path_for(employee) -> str:
+    """Organisational path of an (unsaved or saved) Employee, from the cached name maps"""
+    from .directory import name_maps
+    names = name_maps()
+    return build_org_path(
+        names['direction_id'].get(employee.direction_id),
+        names['division_id'].get(employee.division_id),
+        names['service_id'].get(employee.service_id),
+    )
+
+
+def refresh_org_paths(queryset: Optional[QuerySet] = None, batch_size: int = 1000) -> int:
+    """Recompute stored org paths, writing only those that changed; returns the count"""
+    if queryset is None:
+        from .models import Employee
+        queryset = Employee.objects.all()
+    model = queryset.model
+    rows = queryset.order_by('pk').values_list(
+        'pk', 'org_path', 'direction__name', 'division__name', 'service__name'
+    )
+    changed = []
+    for pk, current, *names in rows.iterator(chunk_size=batch_size):
+        path = build_org_path(*names)
+        if path != current:
+            changed.append(model(pk=pk, org_path=path))
+    model.objects.bulk_update(changed, ['org_path'], batch_size=batch_size)
+    return len(changed)
+
+
+class EmployeeRow:
+    """Read-only employee row with the attributes ``employees/list.html`` uses"""
+
+    __slots__ = ('id', 'employee_id', 'first_name', 'last_name', 'email',
+                 'org_path', 'position', 'status', 'created_at', 'grade_since', 'retires_on', 'status_labels')
+
+    def __init__(self, values, status_labels):
+        (self.id, self.employee_id, self.first_name, self.last_name, self.email,
+         self.org_path, self.position, self.status, self.created_at, self.grade_since, self.retires_on) = values
+        self.status_labels = status_labels
+
+    def __repr__(self):
+        return f'<EmployeeRow {self.id}: {self.employee_id}>'
+
+    @property
+    def pk(self):
+        return self.id
+
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}"
+
+    @property
+    def organizational_path(self):
+        return self.org_path
+
+    def get_status_display(self):
+        return self.status_labels.get(self.status, self.status)
+
+
+class EmployeeRowIterable(ValuesListIterable):
+    """Yield EmployeeRow objects from a ``values_list(*LISTING_FIELDS)`` queryset"""
+
+    def __iter__(self):
+        labels = dict(self.queryset.model.STATUS_CHOICES)
+        for values in super().__iter__():
+            yield EmployeeRow(values, labels)
@@ -0,0 +1,260 @@
+import time
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.employees.cache import STATS_KEY, STATS_OUTCOMES, TAG_FAMILIES
+
+
+# Bookkeeping keys written by apps.employees.cache
+INTERNAL_FAMILIES = {'tag': 'tags', 'lock': 'locks', 'stats': 'stats'}
+
+TTL_BUCKETS = (
+    (60, '< 1m'),
+    (5 * 60, '1-5m'),
+    (15 * 60, '5-15m'),
+    (60 * 60, '15m-1h'),
+    (6 * 60 * 60, '1-6h'),
+    (24 * 60 * 60, '6-24h'),
+    (None, '> 24h'),
+)
+SIZE_BUCKETS = (
+    (256, '< 256B'),
+    (4 * 1024, '256B-4K'),
+    (64 * 1024, '4-64K'),
+    (1024 * 1024, '64K-1M'),
+    (None, '> 1M'),
+)
+
+
+def _bucket(value, buckets):
+    for limit, label in buckets:
+        if limit is None or value < limit:
+            return label
+
+
+def _human(size):
+    for unit in ('B', 'K', 'M', 'G'):
+        if size < 1024:
+            return f'{size:.0f}{unit}' if unit == 'B' else f'{size:.1f}{unit}'
+        size /= 1024
+    return f'{size:.1f}T'
+
+
+def _raw_size(value):
+    """Uncompressed payload size of a stored string (small values are stored as-is)"""
+    try:
+        return len(zlib.decompress(value))
+    except zlib.error:
+        return len(value)
+
+
+class Command(BaseCommand):
+    help = "Sample the Redis cache keyspace by key family (sizes, TTLs, largest keys) or watch hit rates"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sample',
+            type=int,
+            default=10000,
+            help='Maximum number of keys to inspect (default: 10000)'
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=500,
+            help='SCAN COUNT hint per round trip (default: 500)'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Number of largest keys to list (default: 10)'
+        )
+        parser.add_argument(
+            '--watch',
+            action='store_true',
+            help='Report hit/miss rates per family from the get_cached_value counters until interrupted'
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=10,
+            help='Seconds between --watch reports (default: 10)'
+        )
+
+    def handle(self, *args, **options):
+        from django_redis import get_redis_connection
+        try:
+            conn = get_redis_connection('default')
+            conn.ping()
+        except Exception as exc:
+            raise CommandError(f'Redis is not reachable: {exc}')
+
+        if options['watch']:
+            self.watch(conn, options['interval'])
+        else:
+            self.report(conn, options['sample'], options['batch'], options['top'])
+
+    # Keyspace report
+
+    def family(self, key):
+        """``hr_app:1:org:v3:directions:all`` -> ``org``"""
+        prefix = settings.CACHES['default'].get('KEY_PREFIX', '')
+        if prefix and key.startswith(prefix + ':'):
+            key = key[len(prefix) + 1:]
+            key = key.partition(':')[2]  # Cache version
+        if key.startswith('django.contrib.sessions'):
+            return 'sessions'
+        family = key.partition(':')[0]
+        if family in TAG_FAMILIES:
+            return family
+        return INTERNAL_FAMILIES.get(family, 'other')
+
+    def report(self, conn, sample, batch, top):
+        prefix = settings.CACHES['default'].get('KEY_PREFIX', '')
+        pattern = f'{prefix}:*' if prefix else '*'
+
+        families = {}
+        largest = []
+        inspected = 0
+        keys = []
+
+        self.stdout.write(f'\n🔍 Sampling up to {sample} keys matching {pattern}...\n')
+        for key in conn.scan_iter(match=pattern, count=batch):
+            keys.append(key)
+            if len(keys) >= batch or inspected + len(keys) >= sample:
+                inspected += self.inspect(conn, keys, families, largest, top)
+                keys = []
+            if inspected >= sample:
+                break
+        if keys:
+            inspected += self.inspect(conn, keys, families, largest, top)
+
+        if not inspected:
+            self.stdout.write(self.style.WARNING('No keys found.'))
+            return
+
+        self.stdout.write('=' * 78)
+        self.stdout.write(f'{"Family":<12}{"Keys":>8}{"Stored":>12}{"Raw":>12}{"Ratio":>8}{"No TTL":>9}')
+        self.stdout.write('-' * 78)
+        total_stored = total_raw = 0
+        for name, stats in sorted(families.items(), key=lambda item: -item[1]['stored']):
+            ratio = stats['raw'] / stats['stored'] if stats['stored'] else 0
+            self.stdout.write(
+                f'{name:<12}{stats["count"]:>8}{_human(stats["stored"]):>12}'
+                f'{_human(stats["raw"]):>12}{ratio:>7.1f}x{stats["ttl"].get("none", 0):>9}'
+            )
+            total_stored += stats['stored']
+            total_raw += stats['raw']
+        self.stdout.write('-' * 78)
+        self.stdout.write(f'{"Total":<12}{inspected:>8}{_human(total_stored):>12}{_human(total_raw):>12}')
+
+        self.stdout.write('\n⏱  TTL histogram (remaining TTL)')
+        labels = [label for _, label in TTL_BUCKETS] + ['none']
+        self.stdout.write(f'{"Family":<12}' + ''.join(f'{label:>9}' for label in labels))
+        for name, stats in sorted(families.items()):
+            self.stdout.write(f'{name:<12}' + ''.join(f'{stats["ttl"].get(label, 0):>9}' for label in labels))
+
+        self.stdout.write('\n📦 Size histogram (stored bytes)')
+        labels = [label for _, label in SIZE_BUCKETS]
+        self.stdout.write(f'{"Family":<12}' + ''.join(f'{label:>10}' for label in labels))
+        for name, stats in sorted(families.items()):
+            self.stdout.write(f'{name:<12}' + ''.join(f'{stats["size"].get(label, 0):>10}' for label in labels))
+
+        self.stdout.write(f'\n🏋  Largest {len(largest)} keys')
+        for stored, raw, key in sorted(largest, reverse=True):
+            self.stdout.write(f'  {_human(stored):>8} (raw {_human(raw):>8})  {key}')
+        self.stdout.write('')
+
+    def inspect(self, conn, keys, families, largest, top):
+        """Add one SCAN batch to the per-family totals (two pipelined round trips)"""
+        pipe = conn.pipeline(transaction=False)
+        for key in keys:
+            pipe.type(key)
+            pipe.pttl(key)
+        meta = pipe.execute()
+        types = [t.decode() if isinstance(t, bytes) else t for t in meta[0::2]]
+        ttls = meta[1::2]
+
+        pipe = conn.pipeline(transaction=False)
+        for key, key_type in zip(keys, types):
+            if key_type == 'string':
+                pipe.get(key)
+            elif key_type == 'hash':
+                pipe.hgetall(key)
+            else:
+                pipe.memory_usage(key)
+        values = pipe.execute()
+
+        count = 0
+        for key, key_type, ttl, value in zip(keys, types, ttls, values):
+            if key_type == 'none' or value is None:
+                continue  # Expired between SCAN and inspection
+            if key_type == 'string':
+                stored, raw = len(value), _raw_size(value)
+            elif key_type == 'hash':
+                stored = raw = sum(len(f) + len(v) for f, v in value.items())
+            else:
+                stored = raw = value or 0
+
+            key = key.decode(errors='replace') if isinstance(key, bytes) else key
+            stats = families.setdefault(
+                self.family(key), {'count': 0, 'stored': 0, 'raw': 0, 'ttl': {}, 'size': {}}
+            )
+            stats['count'] += 1
+            stats['stored'] += stored
+            stats['raw'] += raw
+            ttl_label = 'none' if ttl < 0 else _bucket(ttl / 1000, TTL_BUCKETS)
+            stats['ttl'][ttl_label] = stats['ttl'].get(ttl_label, 0) + 1
+            size_label = _bucket(stored, SIZE_BUCKETS)
+            stats['size'][size_label] = stats['size'].get(size_label, 0) + 1
+
+            largest.append((stored, raw, key))
+            count += 1
+
+        largest.sort(reverse=True)
+        del largest[top:]
+        return count
+
+    # Hit/miss watch
+
+    def read_counters(self, conn):
+        counters = {}
+        for field, count in conn.hgetall(cache.make_key(STATS_KEY)).items():
+            family, _, outcome = field.decode().rpartition(':')
+            counters.setdefault(family, {})[outcome] = int(count)
+        return counters
+
+    def watch(self, conn, interval):
+        self.stdout.write(
+            f'\n👀 Cache hit rates per family every {interval}s '
+            f'(workers flush their counters every few seconds, Ctrl+C to stop)\n'
+        )
+        previous = self.read_counters(conn)
+        try:
+            while True:
+                time.sleep(interval)
+                current = self.read_counters(conn)
+                self.stdout.write(time.strftime('%H:%M:%S'))
+                self.stdout.write(
+                    f'  {"Family":<12}' + ''.join(f'{o:>8}' for o in STATS_OUTCOMES) + f'{"Hit %":>8}{"req/s":>8}'
+                )
+                for family in sorted(current):
+                    delta = {
+                        outcome: current[family].get(outcome, 0) - previous.get(family, {}).get(outcome, 0)
+                        for outcome in STATS_OUTCOMES
+                    }
+                    total = sum(delta.values())
+                    if not total:
+                        continue
+                    served = delta['local'] + delta['hit'] + delta['stale']
+                    self.stdout.write(
+                        f'  {family:<12}' + ''.join(f'{delta[o]:>8}' for o in STATS_OUTCOMES)
+                        + f'{served / total * 100:>7.1f}%{total / interval:>8.1f}'
+                    )
+                previous = current
+        except KeyboardInterrupt:
+            self.stdout.write('')
@@ -0,0 +1,81 @@
+import gzip
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.employees.exports import employee_dataset
+from apps.leaves.exports import leave_balance_dataset, leave_request_dataset
+from hr_project.exports import EXPORT_CHUNK_SIZE, EXPORT_FORMATS, write_export
+
+DATASETS = ('employees', 'leave-requests', 'leave-balances')
+
+
+class Command(BaseCommand):
+    help = "Dump employees, leave requests and leave balances to CSV, JSONL or XLSX files (nightly exports)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'datasets',
+            nargs='*',
+            help=f"Datasets to export (default: all of {', '.join(DATASETS)})"
+        )
+        parser.add_argument(
+            '--format',
+            choices=EXPORT_FORMATS,
+            default='csv',
+            help='File format (default: csv)'
+        )
+        parser.add_argument(
+            '--output-dir',
+            default='.',
+            help='Directory receiving <dataset>-<YYYYMMDD>.<format> files (default: current directory)'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='Compress CSV/JSONL files (.gz)'
+        )
+        parser.add_argument(
+            '--status',
+            help='Only employees with this status (e.g. active)'
+        )
+        parser.add_argument(
+            '--year',
+            type=int,
+            help='Only leave balances of this year (default: all years)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help=f'Rows fetched per query (default: {EXPORT_CHUNK_SIZE})'
+        )
+
+    def handle(self, *args, **options):
+        fmt = options['format']
+        if options['gzip'] and fmt == 'xlsx':
+            raise CommandError('XLSX files are already compressed; --gzip applies to csv and jsonl')
+        unknown = set(options['datasets']) - set(DATASETS)
+        if unknown:
+            raise CommandError(f"Unknown dataset(s): {', '.join(sorted(unknown))} (choose from {', '.join(DATASETS)})")
+        os.makedirs(options['output_dir'], exist_ok=True)
+
+        datasets = {
+            'employees': lambda: employee_dataset({'status': options['status']} if options['status'] else None),
+            'leave-requests': lambda: leave_request_dataset(),
+            'leave-balances': lambda: leave_balance_dataset({'year': options['year']} if options['year'] else None),
+        }
+        self.stdout.write(f'\n📤 Exporting HR data ({fmt})...\n')
+        for name in options['datasets'] or DATASETS:
+            dataset = datasets[name]()
+            path = os.path.join(options['output_dir'], dataset.filename(fmt))
+            opener = open
+            if options['gzip']:
+                path, opener = path + '.gz', gzip.open
+            started = timezone.now()
+            with opener(path, 'wb') as fileobj:
+                write_export(fileobj, dataset, fmt, chunk_size=options['chunk_size'])
+            seconds = (timezone.now() - started).total_seconds()
+            size = os.path.getsize(path) / 1024
+            self.stdout.write(self.style.SUCCESS(f'✓ {name}: {path} ({size:,.0f} KiB, {seconds:.1f}s)'))
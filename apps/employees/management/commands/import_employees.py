@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.employees.importer import DEFAULT_BATCH_SIZE, EmployeeImporter, ImportFormatError
+
+
+class Command(BaseCommand):
+    help = "Create employees (with user accounts, leave balances and history) from a CSV or XLSX file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (UTF-8, comma/semicolon/tab separated) or XLSX file')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Rows validated and written per batch (default: {DEFAULT_BATCH_SIZE})'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the whole file without creating anything'
+        )
+        parser.add_argument(
+            '--no-users',
+            action='store_true',
+            help='Do not create user accounts for the imported employees'
+        )
+        parser.add_argument(
+            '--errors',
+            metavar='CSV',
+            help='Write the per-row error report to this file'
+        )
+        parser.add_argument(
+            '--created-by',
+            metavar='USERNAME',
+            help='User recorded as author of the history entries'
+        )
+
+    def handle(self, *args, **options):
+        created_by = None
+        if options['created_by']:
+            created_by = User.objects.filter(username=options['created_by']).first()
+            if created_by is None:
+                raise CommandError(f"Unknown user {options['created_by']}")
+
+        importer = EmployeeImporter(
+            created_by=created_by,
+            create_users=not options['no_users'],
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        mode = ' (dry run)' if options['dry_run'] else ''
+        self.stdout.write(f"\n📥 Importing employees from {options['path']}{mode}...\n")
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                report = importer.run(fileobj, options['path'])
+        except (OSError, ImportFormatError) as exc:
+            raise CommandError(str(exc))
+
+        valid = report.rows - report.rejected_lines
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'✓ {valid}/{report.rows} row(s) valid'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f'✓ {report.created}/{report.rows} employee(s) created, {report.users_created} user account(s)'
+            ))
+        if report.errors:
+            self.stdout.write(self.style.WARNING(
+                f'⚠ {report.rejected_lines} row(s) rejected ({len(report.errors)} error(s))'
+            ))
+            if options['errors']:
+                with open(options['errors'], 'w', newline='', encoding='utf-8') as stream:
+                    report.write_errors(stream)
+                self.stdout.write(f"  Error report written to {options['errors']}")
+            else:
+                for error in sorted(report.errors)[:20]:
+                    self.stdout.write(f'  line {error.line} [{error.column or "-"}]: {error.message}')
+                if len(report.errors) > 20:
+                    self.stdout.write('  ... (use --errors to write the full report)')
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from apps.employees.search import reindex_employees
+
+
+class Command(BaseCommand):
+    help = "Recompute employee search documents and the full-text index (after bulk updates or restores)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Employees written per batch (default: 1000)'
+        )
+        parser.add_argument(
+            '--changed-only',
+            action='store_true',
+            help='Only rewrite documents that are out of date'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('\n🔄 Rebuilding employee search index...\n')
+        count = reindex_employees(batch_size=options['batch_size'], force=not options['changed_only'])
+        self.stdout.write(self.style.SUCCESS(f'✓ {count} employee(s) reindexed'))
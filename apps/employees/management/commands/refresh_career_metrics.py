@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from apps.employees.cache import invalidate_employee_cache
+from apps.employees.career import refresh_career_metrics
+
+
+class Command(BaseCommand):
+    help = "Recompute stored career metrics (grade start and retirement dates) of every employee (backfill, after restores)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Employees written per batch (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write('\n🔄 Refreshing employee career metrics...\n')
+        count = refresh_career_metrics(batch_size=options['batch_size'])
+        if count:
+            # Bulk updates bypass Employee.save: drop cached instances and the directory
+            invalidate_employee_cache()
+        self.stdout.write(self.style.SUCCESS(f'✓ {count} employee(s) updated'))
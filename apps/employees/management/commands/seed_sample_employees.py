@@ -72,6 +72,7 @@ class Command(BaseCommand):
                 self.stdout.write(self.style.WARNING(f'  Skipping {first} {last}: missing position or grade'))
                 continue
                 
+            # New employees get their matricule from the employee_id sequence
             emp, was_created = Employee.objects.update_or_create(
                 email=email,
                 defaults={
@@ -81,7 +82,6 @@ class Command(BaseCommand):
                     'phone': '0612345678',
                     'date_of_birth': date(1985, 5, 15),
                     'address': 'Rabat, Morocco',
-                    'employee_id': cin,
                     'ppr': f'PPR{cin[-5:]}',
                     'direction': direction,
                     'division': division,
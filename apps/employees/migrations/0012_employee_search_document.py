@@ -0,0 +1,63 @@
+from django.db import migrations, models
+
+# Frozen copy of the index layout and document of apps.employees.search at this migration
+DOCUMENT_FIELDS = ('first_name', 'last_name', 'email', 'employee_id', 'ppr', 'cin', 'phone')
+DOCUMENT_RELATED = ('position__name', 'grade__name', 'direction__name', 'division__name', 'service__name')
+FTS_TABLE = 'employees_employee_fts'
+FULLTEXT_INDEX = 'employees_employee_search_ft'
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(
+            f'ALTER TABLE employees_employee ADD FULLTEXT INDEX {FULLTEXT_INDEX} (search_document)'
+        )
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            f"search_document, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        schema_editor.execute(f'ALTER TABLE employees_employee DROP INDEX {FULLTEXT_INDEX}')
+    elif vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def populate(apps, schema_editor):
+    """Write every employee's search document (own fields, then lower-cased related names)"""
+    Employee = apps.get_model('employees', 'Employee')
+    rows = Employee.objects.order_by('pk').values_list('pk', *DOCUMENT_FIELDS, *DOCUMENT_RELATED)
+    documents = []
+    for pk, *values in rows.iterator(chunk_size=1000):
+        values = [v.lower() if i >= len(DOCUMENT_FIELDS) and v else v for i, v in enumerate(values)]
+        documents.append((pk, ' '.join(str(v) for v in values if v)))
+    Employee.objects.bulk_update(
+        [Employee(pk=pk, search_document=document) for pk, document in documents], ['search_document'],
+        batch_size=1000,
+    )
+    if schema_editor.connection.vendor == 'sqlite' and documents:
+        with schema_editor.connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk, _ in documents])
+            cursor.executemany(f'INSERT INTO {FTS_TABLE} (rowid, search_document) VALUES (%s, %s)', documents)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0011_deploymentforfaitaire_is_signed_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(create_index, drop_index),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
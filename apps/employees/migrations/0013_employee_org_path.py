@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+def populate(apps, schema_editor):
+    """Backfill org_path: "Direction → Division → Service" names"""
+    Employee = apps.get_model('employees', 'Employee')
+    rows = Employee.objects.order_by('pk').values_list('pk', 'direction__name', 'division__name', 'service__name')
+    changed = [
+        Employee(pk=pk, org_path=' → '.join(name for name in names if name))
+        for pk, *names in rows.iterator(chunk_size=1000)
+    ]
+    Employee.objects.bulk_update(changed, ['org_path'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0012_employee_search_document'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='org_path',
+            field=models.CharField(blank=True, default='', editable=False, max_length=700),
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
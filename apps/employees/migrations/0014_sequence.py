@@ -0,0 +1,34 @@
+from django.db import migrations, models
+
+
+def seed_employee_id(apps, schema_editor):
+    """Start the employee_id sequence after the highest numeric matricule"""
+    Employee = apps.get_model('employees', 'Employee')
+    Sequence = apps.get_model('employees', 'Sequence')
+    numeric = Employee.objects.filter(employee_id__regex=r'^[0-9]+$').values_list('employee_id', flat=True)
+    start = max((int(value) + 1 for value in numeric.iterator()), default=1000)
+    Sequence.objects.update_or_create(name='employee_id', defaults={'next_value': start})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0013_employee_org_path'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Sequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('next_value', models.BigIntegerField(verbose_name='Prochaine valeur')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Séquence',
+                'verbose_name_plural': 'Séquences',
+            },
+        ),
+        migrations.RunPython(seed_employee_id, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def add_years(date, years):
+    try:
+        return date.replace(year=date.year + years)
+    except ValueError:
+        # Feb 29 -> Feb 28 in a non-leap year
+        return date.replace(month=2, day=28, year=date.year + years)
+
+
+def populate(apps, schema_editor):
+    """Backfill grade_since (latest grade change, else titularisation, else hiring) and retires_on"""
+    Employee = apps.get_model('employees', 'Employee')
+    EmploymentHistory = apps.get_model('employees', 'EmploymentHistory')
+    latest_grade_change = Subquery(
+        EmploymentHistory.objects.filter(employee=OuterRef('pk'), change_type='grade')
+        .order_by('-effective_date', '-created_at').values('effective_date')[:1]
+    )
+    rows = Employee.objects.order_by('pk').annotate(latest_grade_change=latest_grade_change).values_list(
+        'pk', 'latest_grade_change', 'titularisation_date', 'hire_date', 'date_of_birth', 'retirement_age',
+    )
+    changed = []
+    for pk, latest, titularised, hired, born, age in rows.iterator(chunk_size=1000):
+        retires_on = add_years(born, int(age)) if born else None
+        changed.append(Employee(pk=pk, grade_since=latest or titularised or hired, retires_on=retires_on))
+    Employee.objects.bulk_update(changed, ['grade_since', 'retires_on'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('employees', '0014_sequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employee',
+            name='grade_since',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Dans le grade depuis'),
+        ),
+        migrations.AddField(
+            model_name='employee',
+            name='retires_on',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='Date de retraite'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['grade_since'], name='employees_e_grade_s_bebbd7_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['retires_on'], name='employees_e_retires_952894_idx'),
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -17,3 +17,5 @@ from .deployment import (
     DeploymentReal,
     OrdreMission,
 )  # noqa: F401
+
+from .sequence import Sequence  # noqa: F401
@@ -3,7 +3,10 @@ from django.core.validators import RegexValidator, MinValueValidator, MaxValueVa
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.utils import timezone
-from django.db.models import JSONField
+from django.db.models import JSONField, Prefetch
+from django.utils.functional import cached_property
+
+from ..listing import LISTING_FIELDS, EmployeeRowIterable
 
 
 class Direction(models.Model):
@@ -78,7 +81,7 @@ class Service(models.Model):
     def clean(self):
         super().clean()
         # Exactly one of direction or division must be set
-        if bool(self.direction) == bool(self.division):
+        if bool(self.direction_id) == bool(self.division_id):
             raise ValidationError('A service must be linked to either a direction or a division (but not both).')
 
 
@@ -101,7 +104,7 @@ class Departement(models.Model):
     def clean(self):
         from django.core.exceptions import ValidationError
         # At least one organizational unit must be set
-        if not any([self.direction, self.division, self.service]):
+        if not any([self.direction_id, self.division_id, self.service_id]):
             raise ValidationError("Département doit appartenir à au moins une Direction, Division ou Service")
 
     def __str__(self):
@@ -188,6 +191,123 @@ class Position(models.Model):
         return self.name
 
 
+class EmployeeQuerySet(models.QuerySet):
+    def for_listing(self):
+        """Lightweight ``EmployeeRow`` objects with the list page's columns only"""
+        qs = self.values_list(*LISTING_FIELDS)
+        qs._iterable_class = EmployeeRowIterable
+        return qs
+
+    def for_detail(self):
+        """Instances with everything the detail page renders loaded up front.
+
+        A fixed number of queries whatever the length of the employee's
+        history: the row with its org/taxonomy/user joins, then one query
+        each for the leave balances, the latest leave requests
+        (``recent_leave_requests``) and history entries (``recent_history``),
+        the latest grade change (``grade_start_date``), the progression
+        rules of the grade (``progression_rules``) and the user's groups.
+        """
+        from apps.leaves.models import EmployeeLeaveBalance, LeaveRequest
+        return self.select_related(
+            'direction', 'division', 'service', 'departement', 'filiere', 'position', 'grade', 'user'
+        ).prefetch_related(
+            Prefetch('leave_balances', queryset=EmployeeLeaveBalance.objects.select_related('leave_type')),
+            Prefetch(
+                'leave_requests',
+                queryset=LeaveRequest.objects.select_related('leave_type', 'approver')[:DETAIL_LEAVE_REQUESTS],
+                to_attr='recent_leave_requests',
+            ),
+            Prefetch('history', queryset=EmploymentHistory.objects.all()[:DETAIL_HISTORY_ENTRIES], to_attr='recent_history'),
+            Prefetch(
+                'history',
+                queryset=EmploymentHistory.objects.filter(change_type='grade').order_by('-effective_date', '-created_at')[:1],
+                to_attr='latest_grade_change',
+            ),
+            Prefetch(
+                'grade__progression_from',
+                queryset=GradeProgressionRule.objects.filter(is_active=True).select_related('target_grade'),
+                to_attr='active_progression_rules',
+            ),
+            'user__groups',
+        ).defer('search_document')
+
+    def bulk_update_with_history(self, objs, fields, batch_size=None, note='Auto-logged change',
+                                 effective_date=None, created_by=None):
+        """``bulk_update`` that logs tracked changes like ``Employee.save`` does.
+
+        Changes are diffed against the values loaded with each instance (one
+        query fills in instances without them), history rows are written with
+        a single ``bulk_create``, and search documents / org paths are kept
+        in step. Returns the history entries created.
+        """
+        from ..cache import invalidate_employee_cache, invalidate_users_cache
+        from ..career import refresh_career_metrics
+        from ..listing import org_path_for
+        from ..search import document_for, sync_index
+
+        objs = list(objs)
+        fields = set(fields)
+        names = tracked_in(fields)
+        if not objs:
+            return []
+
+        # Snapshots for instances that were not loaded from the database
+        missing = [obj.pk for obj in objs if any(n not in obj.__dict__.get('_tracked_values', {}) for n in names)]
+        if missing:
+            stored = {
+                row['pk']: row for row in
+                self.model._base_manager.filter(pk__in=missing).values('pk', *(TRACKED_ATTNAMES[n] for n in names))
+            }
+            for obj in objs:
+                row = stored.get(obj.pk)
+                if row:
+                    snapshot = obj.__dict__.setdefault('_tracked_values', {})
+                    for name in names:
+                        snapshot.setdefault(name, row[TRACKED_ATTNAMES[name]])
+
+        entries = []
+        for obj in objs:
+            changes = obj.tracked_changes(names)
+            if changes:
+                entries.append(obj._history_entry(
+                    changes, note=note, effective_date=effective_date, created_by=created_by,
+                ))
+
+        extra = derived_fields(fields)
+        for obj in objs:
+            if 'search_document' in extra:
+                obj.search_document = document_for(obj)
+            if 'org_path' in extra:
+                obj.org_path = org_path_for(obj)
+            if 'retires_on' in extra:
+                obj.retires_on = obj.retirement_date
+        # grade_since needs the history: recomputed in SQL once the entries exist
+        regrade = [obj.pk for obj in objs] if 'grade_since' in extra else [
+            entry.employee.pk for entry in entries if entry.change_type == 'grade'
+        ]
+        extra.discard('grade_since')
+        with transaction.atomic(using=self.db):
+            self.bulk_update(objs, fields | extra, batch_size=batch_size)
+            EmploymentHistory.objects.bulk_create(entries, batch_size=batch_size)
+            if regrade:
+                refresh_career_metrics(self.model._base_manager.filter(pk__in=regrade), batch_size=batch_size or 1000)
+            if 'search_document' in extra:
+                sync_index([(obj.pk, obj.search_document) for obj in objs])
+
+        for obj in objs:
+            obj._remember_tracked(names)
+            obj.forget_derived()
+        # bulk_update bypasses the post_save signal: one invalidation round, once committed
+        user_ids = [obj.user_id for obj in objs if obj.user_id]
+
+        def invalidate():
+            invalidate_employee_cache()
+            invalidate_users_cache(user_ids)
+        transaction.on_commit(invalidate, using=self.db)
+        return entries
+
+
 class Employee(models.Model):
     STATUS_CHOICES = [
         ('active', 'Actif'),
@@ -268,6 +388,15 @@ class Employee(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     # Auth link
     user = models.OneToOneField(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='employee_profile')
+    # Denormalised full-text document, see apps.employees.search
+    search_document = models.TextField(blank=True, default='', editable=False)
+    # Denormalised "Direction → Division → Service", see apps.employees.listing
+    org_path = models.CharField(max_length=700, blank=True, default='', editable=False)
+    # Stored career metrics (grade_start_date / retirement_date), see apps.employees.career
+    grade_since = models.DateField(null=True, blank=True, editable=False, verbose_name='Dans le grade depuis')
+    retires_on = models.DateField(null=True, blank=True, editable=False, verbose_name='Date de retraite')
+
+    objects = EmployeeQuerySet.as_manager()
 
     class Meta:
         ordering = ['-created_at']
@@ -287,6 +416,8 @@ class Employee(models.Model):
             # Date-based queries
             models.Index(fields=['-created_at']),  # Recent employees first
             models.Index(fields=['hire_date']),    # Seniority queries
+            models.Index(fields=['grade_since']),  # Years-in-grade filters and sorting
+            models.Index(fields=['retires_on']),   # Retirement filters and sorting
         ]
         verbose_name = 'Employé'
         verbose_name_plural = 'Employés'
@@ -301,6 +432,8 @@ class Employee(models.Model):
     @property
     def organizational_path(self):
         """Full organizational path"""
+        if self.org_path:
+            return self.org_path
         parts = [self.direction.name]
         if self.division:
             parts.append(self.division.name)
@@ -325,22 +458,45 @@ class Employee(models.Model):
 
     @property
     def retirement_date(self):
-        dob = self.date_of_birth
-        if not dob:
-            return None
-        try:
-            return dob.replace(year=dob.year + int(self.retirement_age))
-        except ValueError:
-            # Handle Feb 29 -> Feb 28 in non-leap retirement year
-            return dob.replace(month=2, day=28, year=dob.year + int(self.retirement_age))
+        from ..career import retirement_date_for
+        return retirement_date_for(self.date_of_birth, self.retirement_age)
 
-    @property
+    # Memoised derived fields: forgotten on save/refresh and never pickled into the cache
+    MEMOISED_FIELDS = ('grade_start_date', 'progression_rules')
+
+    @cached_property
     def grade_start_date(self):
-        last = self.history.filter(change_type='grade').order_by('-effective_date', '-created_at').first()  # type: ignore[attr-defined]
-        if last:
-            return last.effective_date
+        from ..career import grade_since_for
+        if hasattr(self, 'latest_grade_change'):  # Loaded by for_detail()
+            last = self.latest_grade_change[0] if self.latest_grade_change else None
+        elif self.pk:
+            last = self.history.filter(change_type='grade').order_by('-effective_date', '-created_at').first()  # type: ignore[attr-defined]
+        else:
+            last = None
         # Default to titularisation date if present, else hire date
-        return self.titularisation_date or self.hire_date
+        return grade_since_for(last and last.effective_date, self.titularisation_date, self.hire_date)
+
+    @cached_property
+    def progression_rules(self):
+        """Active progression rules from the current grade, with their target grades"""
+        if not self.grade_id:
+            return []
+        if Employee.grade.is_cached(self) and hasattr(self.grade, 'active_progression_rules'):  # Loaded by for_detail()
+            return self.grade.active_progression_rules
+        return list(
+            GradeProgressionRule.objects.filter(source_grade_id=self.grade_id, is_active=True).select_related('target_grade')
+        )
+
+    def forget_derived(self):
+        """Drop memoised derived fields (after the grade or its history changed)"""
+        for name in self.MEMOISED_FIELDS + ('latest_grade_change',):
+            self.__dict__.pop(name, None)
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        for name in self.MEMOISED_FIELDS:
+            state.pop(name, None)
+        return state
 
     @property
     def years_in_grade(self) -> int:
@@ -395,10 +551,9 @@ class Employee(models.Model):
 
     def next_grade_eligibility(self):
         """Return a list of dicts describing possible next grades with dates, based on configured rules."""
-        rules = GradeProgressionRule.objects.filter(source_grade=self.grade, is_active=True).select_related('target_grade')
         base_date = self.grade_start_date
         results = []
-        for r in rules:
+        for r in self.progression_rules:
             with_exam_date = None
             without_exam_date = None
             if base_date and r.years_with_exam is not None:
@@ -421,54 +576,160 @@ class Employee(models.Model):
             })
         return results
 
+    # Fields whose changes are logged to EmploymentHistory on save
+    TRACKED_FIELDS = (
+        'grade', 'position', 'direction', 'division', 'service',
+        'status', 'contract_type', 'echelle', 'echelon', 'hors_echelle',
+    )
+
+    # Dates the stored grade_since falls back on when no grade change is logged
+    GRADE_SINCE_DATES = ('hire_date', 'titularisation_date')
+    # Date fields the stored career metrics are derived from (forms and scripts may assign ISO strings)
+    CAREER_DATE_FIELDS = ('date_of_birth', 'hire_date', 'titularisation_date')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_tracked()
+        instance._remember_grade_since_dates()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self.forget_derived()
+        fields = kwargs.get('fields')
+        self._remember_tracked(None if fields is None else tracked_in(fields))
+        self._remember_grade_since_dates()
+
+    def _remember_grade_since_dates(self):
+        snapshot = self.__dict__.setdefault('_grade_since_dates', {})
+        for name in self.GRADE_SINCE_DATES:
+            if name in self.__dict__:
+                snapshot[name] = self.__dict__[name]
+
+    def _grade_since_dates_changed(self) -> bool:
+        """Hire or titularisation date assigned since loading (deferred fields cannot have changed)"""
+        snapshot = self.__dict__.get('_grade_since_dates', {})
+        return any(
+            name in self.__dict__ and (name not in snapshot or snapshot[name] != self.__dict__[name])
+            for name in self.GRADE_SINCE_DATES
+        )
+
+    def _remember_tracked(self, names=None):
+        """Snapshot the stored values of tracked fields (deferred fields are left out)"""
+        snapshot = self.__dict__.setdefault('_tracked_values', {})
+        for name in self.TRACKED_FIELDS if names is None else names:
+            attname = TRACKED_ATTNAMES[name]
+            if attname in self.__dict__:
+                snapshot[name] = self.__dict__[attname]
+
+    def tracked_changes(self, fields=None):
+        """``{field: {'from': old, 'to': new}}`` for tracked fields changed since loading.
+
+        Foreign keys are compared by id. ``fields`` limits the diff (as
+        ``save(update_fields=...)`` limits the write). Values missing from
+        the snapshot (instances built by hand, deferred fields) are read
+        from the database.
+        """
+        names = self.TRACKED_FIELDS if fields is None else tracked_in(fields)
+        if not self.pk or not names:
+            return {}
+        snapshot = self.__dict__.get('_tracked_values', {})
+        missing = [name for name in names if name not in snapshot]
+        if missing:
+            stored = type(self)._base_manager.filter(pk=self.pk).values(
+                *(TRACKED_ATTNAMES[name] for name in missing)
+            ).first()
+            if stored is None:
+                return {}
+            snapshot = {**snapshot, **{name: stored[TRACKED_ATTNAMES[name]] for name in missing}}
+        changes = {}
+        for name in names:
+            old_val, new_val = snapshot[name], getattr(self, TRACKED_ATTNAMES[name])
+            if old_val != new_val:
+                changes[name] = {'from': old_val, 'to': new_val}
+        return changes
+
+    def _history_entry(self, changes, **extra):
+        return EmploymentHistory(
+            employee=self,
+            change_type=EmploymentHistory.change_type_for(changes),
+            changes=changes,
+            effective_date=extra.pop('effective_date', None) or timezone.now().date(),
+            note=extra.pop('note', 'Auto-logged change'),
+            **extra
+        )
+
     def save(self, *args, **kwargs):
-        # Auto-increment employee_id if empty
+        # Next matricule from the sequence if empty
         if not self.employee_id:
-            with transaction.atomic():
-                last = Employee.objects.order_by('-created_at').first()
-                next_id = 1000
-                if last and last.employee_id:
-                    try:
-                        next_id = int(str(last.employee_id)) + 1
-                    except Exception:
-                        next_id = 1000
-                self.employee_id = str(next_id)
-
-        # History logging for important changes
-        tracked = ['grade', 'position', 'direction', 'division', 'service', 'status', 'contract_type', 'echelle', 'echelon', 'hors_echelle']
-        changes = {}
-        if self.pk:
-            old = Employee.objects.get(pk=self.pk)
-            for f in tracked:
-                old_val = getattr(old, f)
-                new_val = getattr(self, f)
-                # For FKs, store display string or id
-                if isinstance(old_val, models.Model):
-                    old_val = getattr(old_val, 'id', None)
-                if isinstance(new_val, models.Model):
-                    new_val = getattr(new_val, 'id', None)
-                if old_val != new_val:
-                    changes[f] = {'from': old_val, 'to': new_val}
+            from ..sequences import next_employee_id
+            self.employee_id = next_employee_id()
+
+        # History logging for important changes, diffed against the loaded values
+        update_fields = kwargs.get('update_fields')
+        changes = self.tracked_changes(update_fields)
+
+        from ..career import grade_since_for
+        from ..listing import org_path_for
+        from ..search import document_for
+        for name in self.CAREER_DATE_FIELDS:
+            if name in self.__dict__:
+                setattr(self, name, self._meta.get_field(name).to_python(self.__dict__[name]))
+        extra = None if update_fields is None else derived_fields(update_fields)
+        if extra is None or 'search_document' in extra:
+            self.search_document = document_for(self)
+        if extra is None or 'org_path' in extra:
+            self.org_path = org_path_for(self)
+        if extra is None or 'retires_on' in extra:
+            self.retires_on = self.retirement_date
+        # grade_since: grade changes are applied by the history_changed signal
+        # once their entry exists; here only the fallback dates matter
+        if self.pk is None:  # No history yet
+            self.grade_since = grade_since_for(None, self.titularisation_date, self.hire_date)
+        elif extra is None and self._grade_since_dates_changed() or extra and 'grade_since' in extra:
+            self.forget_derived()  # Memoised from the previous dates
+            self.grade_since = self.grade_start_date
+        if extra:
+            kwargs['update_fields'] = set(update_fields) | extra
 
         super().save(*args, **kwargs)
+        self._remember_tracked(None if update_fields is None else tracked_in(update_fields))
+        self._remember_grade_since_dates()
 
         if changes:
-            change_type = 'other'
-            if any(k in changes for k in ['grade', 'echelle', 'echelon', 'hors_echelle']):
-                change_type = 'grade'
-            elif 'position' in changes:
-                change_type = 'position'
-            elif any(k in changes for k in ['direction', 'division', 'service']):
-                change_type = 'organization'
-            elif any(k in changes for k in ['status', 'contract_type']):
-                change_type = 'status'
-            EmploymentHistory.objects.create(
-                employee=self,
-                change_type=change_type,
-                changes=changes,
-                effective_date=timezone.now().date(),
-                note='Auto-logged change'
-            )
+            self._history_entry(changes).save()
+            self.forget_derived()
+
+
+def tracked_in(fields):
+    """Tracked field names among ``fields`` (names or attnames)"""
+    fields = set(fields)
+    return tuple(name for name in Employee.TRACKED_FIELDS if name in fields or TRACKED_ATTNAMES[name] in fields)
+
+
+def derived_fields(fields):
+    """Denormalised columns to write along with ``fields``: search_document, org_path, career metrics"""
+    from ..career import CAREER_SOURCES
+    from ..search import DOCUMENT_FIELDS
+    fields = set(fields)
+
+    def touched(*names):
+        return any(f in fields or f'{f}_id' in fields for f in names)
+    extra = set()
+    if touched(*DOCUMENT_FIELDS, 'position', 'grade', 'direction', 'division', 'service'):
+        extra.add('search_document')
+    if touched('direction', 'division', 'service'):
+        extra.add('org_path')
+    extra.update(metric for metric, sources in CAREER_SOURCES.items() if touched(*sources))
+    return extra
+
+
+# Rows the detail page shows (Employee.objects.for_detail())
+DETAIL_LEAVE_REQUESTS = 3
+DETAIL_HISTORY_ENTRIES = 5
+
+TRACKED_ATTNAMES = {name: Employee._meta.get_field(name).attname for name in Employee.TRACKED_FIELDS}
 
 
 class EmploymentHistory(models.Model):
@@ -526,6 +787,19 @@ class EmploymentHistory(models.Model):
     def __str__(self):
         return f"{self.employee} - {self.get_change_type_display()} @ {self.effective_date}"
 
+    @staticmethod
+    def change_type_for(changes):
+        """Change type summarising a ``tracked_changes`` dict"""
+        if any(k in changes for k in ['grade', 'echelle', 'echelon', 'hors_echelle']):
+            return 'grade'
+        if 'position' in changes:
+            return 'position'
+        if any(k in changes for k in ['direction', 'division', 'service']):
+            return 'organization'
+        if any(k in changes for k in ['status', 'contract_type']):
+            return 'status'
+        return 'other'
+
     @property
     def change_summary(self):
         """Generate a human-readable summary"""
@@ -0,0 +1,17 @@
+"""
+Named counters for identifiers that are not primary keys (see ``apps.employees.sequences``)
+"""
+from django.db import models
+
+
+class Sequence(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    next_value = models.BigIntegerField(verbose_name='Prochaine valeur')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Séquence'
+        verbose_name_plural = 'Séquences'
+
+    def __str__(self):
+        return f"{self.name}: {self.next_value}"
@@ -0,0 +1,212 @@
+"""
+In-memory index of the organisation tree
+
+Direction → Division → Service → Département → Filière, with the irregular
+edges of this model: a service hangs off a division or directly off a
+direction, and a département off the most specific of its service, division
+or direction. ``OrgTree`` holds every unit (active or not) with its parent
+and precomputes each unit's ancestors and descendants, so ``ancestors`` and
+``descendants`` are dictionary lookups.
+
+``org_tree()`` builds the index with one query per level and keeps it in the
+org cache family (in-process tier, then Redis). Any org save bumps the
+``org`` tag, so the tree is rebuilt once per org version (``OrgTree.version``).
+"""
+import json
+from collections import defaultdict
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .cache import CacheKeys, CacheTTL, cache_tag, get_cached_value
+
+LEVELS = ('direction', 'division', 'service', 'departement', 'filiere')
+# Parent columns of each level, most specific first
+PARENT_COLUMNS = {
+    'direction': (),
+    'division': ('direction',),
+    'service': ('division', 'direction'),
+    'departement': ('service', 'division', 'direction'),
+    'filiere': ('departement',),
+}
+
+Unit = Tuple[str, int]  # (level, pk)
+
+
+class OrgUnit:
+    __slots__ = ('level', 'id', 'name', 'code', 'is_active', 'parent')
+
+    def __init__(self, level: str, id: int, name: str, code: str, is_active: bool, parent: Optional[Unit]):
+        self.level = level
+        self.id = id
+        self.name = name
+        self.code = code
+        self.is_active = is_active
+        self.parent = parent
+
+    def __repr__(self):
+        return f'<OrgUnit {self.level} {self.id}: {self.name}>'
+
+    @property
+    def key(self) -> Unit:
+        return (self.level, self.id)
+
+    @property
+    def pk(self):
+        return self.id
+
+
+class OrgTree:
+    """Every org unit with its parent, ancestors, children and descendants"""
+
+    def __init__(self, units: Iterable[OrgUnit], version: int = 0):
+        self.version = version
+        self.units: Dict[Unit, OrgUnit] = {unit.key: unit for unit in units}
+
+        self._ancestors: Dict[Unit, Tuple[Unit, ...]] = {}
+        for key in self.units:
+            self._ancestors[key] = self._walk(key)
+
+        children = defaultdict(list)
+        descendants = defaultdict(set)
+        for key, ancestors in self._ancestors.items():
+            if ancestors:
+                children[ancestors[0]].append(key)
+            for ancestor in ancestors:
+                descendants[ancestor].add(key)
+        by_name = lambda key: self.units[key].name  # noqa: E731
+        self._children = {key: tuple(sorted(keys, key=by_name)) for key, keys in children.items()}
+        self._descendants = {key: frozenset(keys) for key, keys in descendants.items()}
+        self._by_level = {
+            level: tuple(sorted((key for key in self.units if key[0] == level), key=by_name)) for level in LEVELS
+        }
+        self.json = json.dumps(self.as_dict(), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def _walk(self, key: Unit) -> Tuple[Unit, ...]:
+        ancestors = []
+        parent = self.units[key].parent
+        while parent is not None and parent in self.units and parent not in ancestors:
+            ancestors.append(parent)
+            parent = self.units[parent].parent
+        return tuple(ancestors)
+
+    def unit(self, level: str, pk) -> Optional[OrgUnit]:
+        return self.units.get((level, pk))
+
+    def ancestors(self, level: str, pk) -> Tuple[OrgUnit, ...]:
+        """Parent, grandparent... of a unit (nearest first)"""
+        return tuple(self.units[key] for key in self._ancestors.get((level, pk), ()))
+
+    def ancestor_id(self, level: str, pk, of_level: str) -> Optional[int]:
+        """Id of the unit's ancestor at ``of_level`` (e.g. the direction of a service)"""
+        for key in self._ancestors.get((level, pk), ()):
+            if key[0] == of_level:
+                return key[1]
+        return None
+
+    def descendants(self, level: str, pk) -> FrozenSet[Unit]:
+        """Every unit below a unit, at any depth"""
+        return self._descendants.get((level, pk), frozenset())
+
+    def descendant_ids(self, level: str, pk, of_level: str) -> FrozenSet[int]:
+        """Ids of the units of ``of_level`` below a unit (e.g. all services of a direction)"""
+        return frozenset(key[1] for key in self.descendants(level, pk) if key[0] == of_level)
+
+    def children(self, level: str, pk, of_level: Optional[str] = None, active: bool = True) -> List[OrgUnit]:
+        """Direct children of a unit, by name"""
+        return self._pick(self._children.get((level, pk), ()), of_level, active)
+
+    def level(self, level: str, active: bool = True) -> List[OrgUnit]:
+        """All units of a level, by name"""
+        return self._pick(self._by_level[level], None, active)
+
+    def label(self, level: str, pk) -> str:
+        """The unit's ``__str__`` (codes of its parents, then its name) without loading the parents"""
+        unit = self.units[(level, pk)]
+        parents = self.ancestors(level, pk)
+        if not parents:
+            return unit.name
+        if level == 'filiere':
+            return f'{parents[0].name} - {unit.name}'
+        if level == 'service' and parents[0].level == 'division' and len(parents) > 1:
+            return f'{parents[1].code}/{parents[0].code} - {unit.name}'
+        return f'{parents[0].code} - {unit.name}'
+
+    def options(self, level: str, pk, of_level: str) -> List[dict]:
+        """``{'id', 'name'}`` of the active direct children of ``of_level`` (cascading dropdowns)"""
+        return [{'id': unit.id, 'name': unit.name} for unit in self.children(level, pk, of_level)]
+
+    def _pick(self, keys, of_level, active) -> List[OrgUnit]:
+        units = (self.units[key] for key in keys if of_level is None or key[0] == of_level)
+        return [unit for unit in units if unit.is_active or not active]
+
+    def scope_choices(self, direction_id=None, division_id=None, service_id=None, everything=False):
+        """Active ``(directions, divisions, services)`` to filter on, for someone placed in these units.
+
+        ``everything`` (HR and IT admins) gives every active unit; otherwise a
+        service holder gets their own units, a division holder the services of
+        the division, and a direction holder all divisions and services below it.
+        """
+        if everything:
+            return self.level('direction'), self.level('division'), self.level('service')
+
+        def only(level, pk):
+            unit = self.unit(level, pk)
+            return [unit] if unit is not None and unit.is_active else []
+
+        if service_id:
+            return only('direction', direction_id), only('division', division_id), only('service', service_id)
+        if division_id:
+            return (only('direction', direction_id), only('division', division_id),
+                    self.children('division', division_id, 'service'))
+        if direction_id:
+            below = self.descendants('direction', direction_id)
+            return (only('direction', direction_id), self.children('direction', direction_id, 'division'),
+                    [unit for unit in self.level('service') if unit.key in below])
+        return [], [], []
+
+    def as_dict(self) -> dict:
+        """Active units per level, each with its parent ``[level, id]`` (the whole-tree endpoint)"""
+        return {
+            'version': self.version,
+            'units': {
+                level: [
+                    {'id': unit.id, 'name': unit.name, 'code': unit.code,
+                     'parent': list(unit.parent) if unit.parent else None}
+                    for unit in self.level(level)
+                ]
+                for level in LEVELS
+            },
+        }
+
+
+def _parent(row: dict, level: str) -> Optional[Unit]:
+    for column in PARENT_COLUMNS[level]:
+        if row[f'{column}_id']:
+            return (column, row[f'{column}_id'])
+    return None
+
+
+def build_org_tree(version: int = 0) -> OrgTree:
+    """Load the tree (one query per level)"""
+    from .models import Departement, Direction, Division, Filiere, Service
+    models = {
+        'direction': Direction, 'division': Division, 'service': Service,
+        'departement': Departement, 'filiere': Filiere,
+    }
+    units = []
+    for level, model in models.items():
+        columns = ['id', 'name', 'code', 'is_active'] + [f'{column}_id' for column in PARENT_COLUMNS[level]]
+        for row in model.objects.order_by().values(*columns):
+            units.append(OrgUnit(level, row['id'], row['name'], row['code'], row['is_active'], _parent(row, level)))
+    return OrgTree(units, version)
+
+
+def org_tree() -> OrgTree:
+    """The tree of the current org version (in-process tier, then Redis)"""
+    return get_cached_value(CacheKeys.ORG_TREE, lambda: build_org_tree(cache_tag('org')), CacheTTL.VERY_LONG)
+
+
+async def aorg_tree() -> OrgTree:
+    """Async ``org_tree``"""
+    from .async_cache import acache_tag, get_cached_value_async
+    version = await acache_tag('org')
+    return await get_cached_value_async(CacheKeys.ORG_TREE, lambda: build_org_tree(version), CacheTTL.VERY_LONG)
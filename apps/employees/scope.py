@@ -0,0 +1,176 @@
+"""
+Who may see whom, as per-unit bitsets
+
+Managers see the employees directly assigned to their unit: a chef de
+service their service, a chef de division the division's employees outside
+any service, a chef de direction the direction's employees outside any
+division or service (``approval_scope``, used for leave approvals and
+documents). The employee detail page applies the same three unit rules to
+where the user is placed, whatever their position (``unit_scope``).
+
+Answering "can X see employee Y / leave Z" used to cost a filtered
+``exists()`` query per check. Here the unit of a user comes from the
+directory snapshot (their row: placement and position) and the cached
+position types; the employees of a unit are a bitset indexed by employee
+pk (one bit each: a few kilobytes for the whole workforce). Bitsets are
+memoised on the snapshot and shared through Redis under the snapshot
+revision, so any employee save, bulk move or import yields new ones, and
+the taxonomy generation keys the position types. A check is then a bit
+test; ``Visibility.ids()`` gives the id set for list filters.
+"""
+from typing import Iterator, List, Optional, Tuple
+
+from django.db.models import Q
+
+from .cache import CacheKeys, CacheTTL, get_cached_value
+from .directory import DirectorySnapshot, get_directory
+
+Unit = Tuple[str, int]  # ('service' | 'division' | 'direction', pk)
+
+# Position type heading each level
+CHEF_OF = {'chef_service': 'service', 'chef_division': 'division', 'chef_direction': 'direction'}
+
+
+class Visibility:
+    """Employees a user may see: everyone, or the pks set in ``bits`` (bit ``pk % 8`` of byte ``pk // 8``)"""
+    __slots__ = ('bits', 'everyone')
+
+    def __init__(self, bits: bytes = b'', everyone: bool = False):
+        self.bits = bits
+        self.everyone = everyone
+
+    def __contains__(self, pk) -> bool:
+        if self.everyone:
+            return True
+        if pk is None:
+            return False
+        byte = pk >> 3
+        return byte < len(self.bits) and bool(self.bits[byte] >> (pk & 7) & 1)
+
+    def __bool__(self) -> bool:
+        return self.everyone or any(self.bits)
+
+    def __iter__(self) -> Iterator[int]:
+        for byte, value in enumerate(self.bits):
+            if value:
+                for bit in range(8):
+                    if value >> bit & 1:
+                        yield byte * 8 + bit
+
+    def ids(self) -> List[int]:
+        return list(self)
+
+    def q(self, field: str = 'pk') -> Q:
+        """Queryset filter on ``field`` (an employee id): no restriction for everyone"""
+        if self.everyone:
+            return Q()
+        return Q(**{f'{field}__in': self.ids()})
+
+
+EVERYONE = Visibility(everyone=True)
+NOBODY = Visibility()
+
+
+def unit_members(directory: DirectorySnapshot, unit: Unit) -> bytes:
+    """Bitset of the employees directly assigned to ``unit``"""
+    level, unit_id = unit
+    columns = directory.columns
+    services, divisions, directions = columns['service_id'], columns['division_id'], columns['direction_id']
+    if level == 'service':
+        rows = [i for i, service_id in enumerate(services) if service_id == unit_id]
+    elif level == 'division':
+        rows = [i for i, division_id in enumerate(divisions) if division_id == unit_id and services[i] is None]
+    else:
+        rows = [
+            i for i, direction_id in enumerate(directions)
+            if direction_id == unit_id and divisions[i] is None and services[i] is None
+        ]
+    ids = directory.ids
+    bits = bytearray(max(ids, default=0) // 8 + 1)
+    for i in rows:
+        bits[ids[i] >> 3] |= 1 << (ids[i] & 7)
+    return bytes(bits)
+
+
+def unit_bits(unit: Optional[Unit]) -> Visibility:
+    """Employees directly assigned to ``unit`` (snapshot memo, then Redis, then a column scan)"""
+    if unit is None:
+        return NOBODY
+    directory = get_directory()
+
+    def compute(directory):
+        if directory.revision is None:
+            return unit_members(directory, unit)
+        return get_cached_value(
+            CacheKeys.SCOPE_BITS.format(level=unit[0], id=unit[1], revision=directory.revision),
+            lambda: unit_members(directory, unit),
+            CacheTTL.MEDIUM,
+        )
+
+    return Visibility(directory.derived(('scope', unit), compute))
+
+
+def position_types():
+    """``{position id: position_type}`` (taxonomy cache)"""
+    from .models import Position
+    return get_cached_value(
+        CacheKeys.POSITION_TYPES, lambda: dict(Position.objects.values_list('id', 'position_type')), CacheTTL.LONG,
+    )
+
+
+def _user_row(directory: DirectorySnapshot, user) -> Optional[int]:
+    rows = directory.derived('user_rows', lambda d: {
+        user_id: i for i, user_id in enumerate(d.columns['user_id']) if user_id
+    })
+    return rows.get(user.pk)
+
+
+def _sees_everyone(user) -> bool:
+    from apps.roles.resolver import has_role
+    return user.is_superuser or has_role(user, 'HR Admin', 'IT Admin')
+
+
+def placement_unit(service_id, division_id, direction_id) -> Optional[Unit]:
+    """Most specific unit of a placement"""
+    if service_id:
+        return ('service', service_id)
+    if division_id:
+        return ('division', division_id)
+    if direction_id:
+        return ('direction', direction_id)
+    return None
+
+
+def managed_unit(user) -> Optional[Unit]:
+    """Unit ``user`` heads through their chef position (None if they head none)"""
+    directory = get_directory()
+    i = _user_row(directory, user)
+    if i is None:
+        return None
+    columns = directory.columns
+    level = CHEF_OF.get(position_types().get(columns['position_id'][i]))
+    unit_id = columns[f'{level}_id'][i] if level else None
+    return (level, unit_id) if unit_id else None
+
+
+def approval_scope(user) -> Visibility:
+    """Employees whose leave requests ``user`` may see and act on"""
+    if not user.is_authenticated:
+        return NOBODY
+    if _sees_everyone(user):
+        return EVERYONE
+    return unit_bits(managed_unit(user))
+
+
+def unit_scope(user) -> Visibility:
+    """Employees of the unit ``user`` is placed in (employee detail page)"""
+    if not user.is_authenticated:
+        return NOBODY
+    if _sees_everyone(user):
+        return EVERYONE
+    directory = get_directory()
+    i = _user_row(directory, user)
+    if i is None:
+        return NOBODY
+    columns = directory.columns
+    return unit_bits(placement_unit(columns['service_id'][i], columns['division_id'][i], columns['direction_id'][i]))
@@ -0,0 +1,177 @@
+"""
+Full-text search over employees
+
+Each employee stores a denormalised ``search_document`` (names, contact
+details, identifiers and the names of its position, grade and org units),
+written by ``Employee.save`` and rewritten by ``reindex_employees`` when an
+org unit or taxonomy entry is renamed. It is queried through a FULLTEXT index
+on MySQL and an FTS5 table on SQLite (kept in sync from Python, so table
+rebuilds by later migrations cannot drop it). Other backends fall back to
+``icontains`` on the document.
+
+A single-term query that exactly equals an ``employee_id``, ``ppr`` or ``cin``
+short-circuits to that employee through the unique indexes.
+"""
+import re
+from typing import Iterable, List, Optional, Sequence
+
+from django.db import connection
+from django.db.models import Q, QuerySet
+
+# Employee columns and related names that make up the document
+DOCUMENT_FIELDS = ('first_name', 'last_name', 'email', 'employee_id', 'ppr', 'cin', 'phone')
+DOCUMENT_RELATED = ('position__name', 'grade__name', 'direction__name', 'division__name', 'service__name')
+
+FTS_TABLE = 'employees_employee_fts'
+FULLTEXT_INDEX = 'employees_employee_search_ft'
+MYSQL_MIN_TOKEN = 3  # innodb_ft_min_token_size: shorter tokens are not indexed
+
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+
+def build_document(values: Iterable[Optional[str]]) -> str:
+    return ' '.join(str(v) for v in values if v)
+
+
+def document_for(employee) -> str:
+    """Search document of an (unsaved or saved) Employee instance"""
+    from .directory import name_maps
+    names = name_maps()
+    related = [
+        names[column].get(getattr(employee, column))
+        for column in ('position_id', 'grade_id', 'direction_id', 'division_id', 'service_id')
+    ]
+    return build_document(
+        [getattr(employee, f) for f in DOCUMENT_FIELDS] + [name.lower() if name else name for name in related]
+    )
+
+
+def tokenize(query: str) -> List[str]:
+    return _TOKEN.findall(query.lower())
+
+
+# Index maintenance
+
+def sync_index(documents: Sequence[tuple]):
+    """Write ``(pk, document)`` pairs to the SQLite FTS table (no-op elsewhere)"""
+    if connection.vendor != 'sqlite' or not documents:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk, _ in documents])
+        cursor.executemany(
+            f'INSERT INTO {FTS_TABLE} (rowid, search_document) VALUES (%s, %s)', list(documents)
+        )
+
+
+def unindex(pks: Sequence[int]):
+    if connection.vendor != 'sqlite' or not pks:
+        return
+    with connection.cursor() as cursor:
+        cursor.executemany(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [(pk,) for pk in pks])
+
+
+def reindex_employees(queryset: Optional[QuerySet] = None, batch_size: int = 1000,
+                      force: bool = False) -> int:
+    """Recompute search documents, writing only those that changed; returns the count"""
+    if queryset is None:
+        from .models import Employee
+        queryset = Employee.objects.all()
+    model = queryset.model
+    rows = queryset.order_by('pk').values_list(
+        'pk', 'search_document', *DOCUMENT_FIELDS, *DOCUMENT_RELATED
+    )
+    changed = []
+    for row in rows.iterator(chunk_size=batch_size):
+        document = build_document(
+            v.lower() if i >= len(DOCUMENT_FIELDS) and v else v for i, v in enumerate(row[2:])
+        )
+        if force or document != row[1]:
+            changed.append((row[0], document))
+
+    for start in range(0, len(changed), batch_size):
+        batch = changed[start:start + batch_size]
+        model.objects.bulk_update(
+            [model(pk=pk, search_document=document) for pk, document in batch],
+            ['search_document'],
+        )
+        sync_index(batch)
+    return len(changed)
+
+
+# Querying
+
+def exact_match_q(query: str) -> Optional[Q]:
+    """Unique-identifier lookup for a single-term query"""
+    query = query.strip()
+    if not query or ' ' in query:
+        return None
+    return Q(employee_id=query) | Q(ppr=query) | Q(cin=query)
+
+
+def search_queryset(queryset: QuerySet, query: str) -> QuerySet:
+    """Filter ``queryset`` to employees matching every term, best matches first.
+
+    Ranked querysets carry a ``search_rank`` annotation (higher is better).
+    """
+    exact = exact_match_q(query)
+    if exact is not None:
+        matches = queryset.filter(exact)
+        if matches.exists():
+            return matches
+    return _fulltext_queryset(queryset, query)
+
+
+async def asearch_queryset(queryset: QuerySet, query: str) -> QuerySet:
+    """Async ``search_queryset`` (the exact-identifier probe uses ``aexists``)"""
+    exact = exact_match_q(query)
+    if exact is not None:
+        matches = queryset.filter(exact)
+        if await matches.aexists():
+            return matches
+    return _fulltext_queryset(queryset, query)
+
+
+def _fulltext_queryset(queryset: QuerySet, query: str) -> QuerySet:
+    tokens = tokenize(query)
+    if not tokens:
+        return queryset.none() if query.strip() else queryset
+
+    vendor = connection.vendor
+    table = queryset.model._meta.db_table
+    if vendor == 'sqlite':
+        match = ' '.join(f'"{token}"*' for token in tokens)
+        # Joined so FTS5 drives the query; bm25() is lower for better matches
+        return queryset.extra(
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {table}.id', f'{FTS_TABLE} MATCH %s'],
+            params=[match],
+            select={'search_rank': f'-bm25({FTS_TABLE})'},
+            order_by=['-search_rank', '-created_at'],
+        )
+
+    if vendor == 'mysql':
+        indexed = [t for t in tokens if len(t) >= MYSQL_MIN_TOKEN]
+        for token in tokens:
+            if len(token) < MYSQL_MIN_TOKEN:
+                queryset = queryset.filter(search_document__icontains=token)
+        if not indexed:
+            return queryset
+        match = ' '.join(f'+{token}*' for token in indexed)
+        against = f'MATCH ({table}.search_document) AGAINST (%s IN BOOLEAN MODE)'
+        return queryset.extra(
+            where=[against],
+            params=[match],
+            select={'search_rank': against},
+            select_params=[match],
+            order_by=['-search_rank', '-created_at'],
+        )
+
+    for token in tokens:
+        queryset = queryset.filter(search_document__icontains=token)
+    return queryset
+
+
+def search_employee_pks(query: str) -> List[int]:
+    """Ranked pks of every employee matching ``query``"""
+    from .models import Employee
+    return list(search_queryset(Employee.objects.all(), query).values_list('pk', flat=True))
@@ -0,0 +1,77 @@
+"""
+Employee matricule (``employee_id``) allocation
+
+Matricules used to be computed as "latest employee's id + 1", which takes no
+lock: two concurrent creates read the same latest row and one fails on the
+unique constraint, and ``bulk_create`` could not use it at all. They now come
+from the ``employee_id`` row of the ``Sequence`` table. ``reserve`` claims a
+block of ``count`` consecutive values with a single
+``UPDATE ... SET next_value = next_value + count`` before reading the row
+back: the UPDATE takes the row lock (the database write lock on SQLite), so
+concurrent claims queue up and never overlap, and a bulk import claims all
+its ids in one statement.
+
+Values are not cached per process: a claim made inside a transaction that
+rolls back is rolled back with it, so the same values are handed out again
+instead of leaving gaps. Matricules typed by hand (forms, imports) are
+skipped when the counter reaches them.
+"""
+from typing import List
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+EMPLOYEE_ID_SEQUENCE = 'employee_id'
+EMPLOYEE_ID_START = 1000  # First matricule of an empty database
+
+
+def initial_employee_id() -> int:
+    """First free numeric matricule after the existing ones"""
+    from .models import Employee
+    numeric = Employee.objects.filter(employee_id__regex=r'^[0-9]+$').values_list('employee_id', flat=True)
+    return max((int(value) + 1 for value in numeric.iterator()), default=EMPLOYEE_ID_START)
+
+
+def reserve(name: str, count: int = 1) -> range:
+    """Claim ``count`` consecutive values of sequence ``name``.
+
+    Call it inside the transaction that uses the values when they must not
+    be lost on rollback; the sequence row stays locked until that
+    transaction ends.
+    """
+    from .models import Sequence
+    if count < 1:
+        return range(0)
+    with transaction.atomic():
+        if not Sequence.objects.filter(name=name).update(next_value=F('next_value') + count):
+            _create(name)
+            Sequence.objects.filter(name=name).update(next_value=F('next_value') + count)
+        end = Sequence.objects.filter(name=name).values_list('next_value', flat=True).get()
+    return range(end - count, end)
+
+
+def _create(name: str):
+    from .models import Sequence
+    start = initial_employee_id() if name == EMPLOYEE_ID_SEQUENCE else 1
+    try:
+        with transaction.atomic():
+            Sequence.objects.create(name=name, next_value=start)
+    except IntegrityError:
+        pass  # Created concurrently
+
+
+def allocate_employee_ids(count: int) -> List[str]:
+    """``count`` unused matricules, in increasing order"""
+    from .models import Employee
+    ids = []
+    while len(ids) < count:
+        candidates = [str(value) for value in reserve(EMPLOYEE_ID_SEQUENCE, count - len(ids))]
+        taken = set(
+            Employee.objects.filter(employee_id__in=candidates).order_by().values_list('employee_id', flat=True)
+        )
+        ids.extend(value for value in candidates if value not in taken)
+    return ids
+
+
+def next_employee_id() -> str:
+    return allocate_employee_ids(1)[0]
@@ -1,7 +1,8 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from .models.employee import (
-    Employee, Direction, Division, Service, Departement, Filiere, Grade, Position
+    Employee, EmploymentHistory, Direction, Division, Service, Departement, Filiere, Grade, Position,
+    GradeProgressionRule,
 )
 from .cache import (
     invalidate_employee_cache,
@@ -9,21 +10,90 @@ from .cache import (
     invalidate_taxonomy_cache,
     invalidate_user_cache,
 )
+from .career import refresh_career_metrics
+from .listing import refresh_org_paths
+from .search import reindex_employees, sync_index, unindex
+from .supervisors import in_cached_map, invalidate_supervisor_map
 
 
 @receiver(post_save, sender=Employee)
-def employee_saved(sender, instance, created, **kwargs):
+def employee_saved(sender, instance, created, update_fields=None, **kwargs):
+    if update_fields is None or 'search_document' in update_fields:
+        sync_index([(instance.pk, instance.search_document)])
     # Invalidate employee caches
     invalidate_employee_cache(employee_id=instance.pk)
     if instance.user_id:
         invalidate_user_cache(instance.user_id)
+    # A chef moved, lost their position or account, or someone became one
+    if created and instance.position_id or instance.tracked_changes(['position']) \
+            or in_cached_map(instance.pk):
+        invalidate_supervisor_map()
 
 
 @receiver(post_delete, sender=Employee)
 def employee_deleted(sender, instance, **kwargs):
+    unindex([instance.pk])
     invalidate_employee_cache(employee_id=instance.pk)
     if instance.user_id:
         invalidate_user_cache(instance.user_id)
+    if in_cached_map(instance.pk):
+        invalidate_supervisor_map()
+
+
+@receiver(post_save, sender=EmploymentHistory)
+@receiver(post_delete, sender=EmploymentHistory)
+def history_changed(sender, instance, created=False, **kwargs):
+    """Keep the stored grade start date in step with the latest grade change"""
+    if created and instance.change_type != 'grade':
+        return  # A new entry of another type cannot move the grade start date
+    if kwargs.get('signal') is post_delete and instance.change_type != 'grade':
+        return
+    if refresh_career_metrics(Employee.objects.filter(pk=instance.employee_id)):
+        invalidate_employee_cache(employee_id=instance.employee_id)
+
+
+# Employee FK holding each model whose name is part of the search document
+SEARCH_DOCUMENT_FKS = {
+    Direction: 'direction',
+    Division: 'division',
+    Service: 'service',
+    Grade: 'grade',
+    Position: 'position',
+}
+
+
+def reindex_renamed(sender, instance, created):
+    """Refresh the search documents (and org paths) of employees linked to a (possibly) renamed entry"""
+    field = SEARCH_DOCUMENT_FKS.get(sender)
+    if field and not created:
+        employees = Employee.objects.filter(**{field: instance})
+        reindex_employees(employees)
+        if sender in (Direction, Division, Service) and refresh_org_paths(employees):
+            # Bulk updates bypass Employee.save: drop cached instances
+            invalidate_employee_cache()
+
+
+@receiver(pre_delete, sender=Direction)
+@receiver(pre_delete, sender=Division)
+@receiver(pre_delete, sender=Service)
+@receiver(pre_delete, sender=Grade)
+@receiver(pre_delete, sender=Position)
+def remember_linked_employees(sender, instance, **kwargs):
+    """Employees whose FK the deletion is about to clear (if the FK ever stops protecting it)"""
+    field = SEARCH_DOCUMENT_FKS[sender]
+    instance._linked_employee_pks = list(Employee.objects.filter(**{field: instance}).values_list('pk', flat=True))
+
+
+def reindex_unlinked(sender, instance):
+    """Refresh the denormalised columns of employees unlinked by a deletion (a bulk UPDATE, no post_save)"""
+    pks = getattr(instance, '_linked_employee_pks', None)
+    if not pks:
+        return
+    employees = Employee.objects.filter(pk__in=pks)
+    reindex_employees(employees)
+    if sender in (Direction, Division, Service):
+        refresh_org_paths(employees)
+    invalidate_employee_cache()  # Drops the directory snapshot and cached instances
 
 
 # Organizational models invalidate org cache
@@ -34,6 +104,7 @@ def employee_deleted(sender, instance, **kwargs):
 @receiver(post_save, sender=Filiere)
 def org_saved(sender, instance, created, **kwargs):
     invalidate_org_cache()
+    reindex_renamed(sender, instance, created)
 
 
 @receiver(post_delete, sender=Direction)
@@ -43,16 +114,25 @@ def org_saved(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=Filiere)
 def org_deleted(sender, instance, **kwargs):
     invalidate_org_cache()
+    reindex_unlinked(sender, instance)
 
 
 # Taxonomy invalidation
 @receiver(post_save, sender=Grade)
 @receiver(post_save, sender=Position)
+@receiver(post_save, sender=GradeProgressionRule)
 def taxonomy_saved(sender, instance, created, **kwargs):
     invalidate_taxonomy_cache()
+    if sender is Position:
+        invalidate_supervisor_map()  # The position type decides who is a chef
+    reindex_renamed(sender, instance, created)
 
 
 @receiver(post_delete, sender=Grade)
 @receiver(post_delete, sender=Position)
+@receiver(post_delete, sender=GradeProgressionRule)
 def taxonomy_deleted(sender, instance, **kwargs):
     invalidate_taxonomy_cache()
+    if sender is Position:
+        invalidate_supervisor_map()
+    reindex_unlinked(sender, instance)
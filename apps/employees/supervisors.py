@@ -0,0 +1,111 @@
+"""
+Supervisor resolution from a cached map of unit chefs
+
+Every leave submission, leave decision PDF, document template, profile page
+and ordre de mission review looked up the chef de service / division /
+direction of an employee with up to three filtered ``Employee`` queries.
+``SupervisorMap`` answers from memory: it holds, per org unit, the holders
+of its chef position (employee and user ids, in ``Employee`` ordering), and
+is built with a single query over the chefs.
+
+The map lives in Redis in the employees family. It is dropped (once the
+transaction commits) when a chef is saved or deleted, when someone is
+given a position or created with one, and when a position is edited; bulk
+updates bump the whole employees family, which drops it as well.
+"""
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .cache import MISS, CacheKeys, CacheTTL, get_cached_value, tagged_key, unwrap_entry
+
+# Chef position type of each unit level, most specific first
+CHEF_POSITIONS = (
+    ('service', 'chef_service'),
+    ('division', 'chef_division'),
+    ('direction', 'chef_direction'),
+)
+
+Chef = Tuple[int, Optional[int]]  # (employee pk, user id)
+
+
+class SupervisorMap:
+    """Chefs of every service, division and direction"""
+
+    def __init__(self, rows):
+        levels = dict((position_type, level) for level, position_type in CHEF_POSITIONS)
+        chefs: Dict[Tuple[str, int], List[Chef]] = {}
+        for position_type, service_id, division_id, direction_id, pk, user_id in rows:
+            level = levels[position_type]
+            unit_id = {'service': service_id, 'division': division_id, 'direction': direction_id}[level]
+            if unit_id:
+                chefs.setdefault((level, unit_id), []).append((pk, user_id))
+        self._chefs = {unit: tuple(holders) for unit, holders in chefs.items()}
+        self.employee_ids: FrozenSet[int] = frozenset(pk for holders in chefs.values() for pk, _ in holders)
+
+    def chefs(self, level: str, unit_id: Optional[int]) -> Tuple[Chef, ...]:
+        return self._chefs.get((level, unit_id), ()) if unit_id else ()
+
+    def supervisor_user_ids(self, employee) -> List[int]:
+        """Users of the closest unit chefs that have an account (service, else division, else direction)"""
+        for level, _ in CHEF_POSITIONS:
+            user_ids = [user_id for _, user_id in self.chefs(level, getattr(employee, f'{level}_id')) if user_id]
+            if user_ids:
+                return user_ids
+        return []
+
+    def chain(self, employee) -> Tuple[Optional[int], Optional[int]]:
+        """Employee pks of the M+1 and M+2 (first chef of the employee's unit, then of the unit above)"""
+        def first(level, unit_id):
+            holders = self.chefs(level, unit_id)
+            return holders[0][0] if holders else None
+
+        if employee.service_id:
+            above = ('division', employee.division_id) if employee.division_id else ('direction', employee.direction_id)
+            return first('service', employee.service_id), first(*above)
+        if employee.division_id:
+            return first('division', employee.division_id), first('direction', employee.direction_id)
+        if employee.direction_id:
+            return first('direction', employee.direction_id), None
+        return None, None
+
+
+def build_supervisor_map() -> SupervisorMap:
+    from .models import Employee
+    return SupervisorMap(Employee.objects.filter(
+        position__position_type__in=[position_type for _, position_type in CHEF_POSITIONS],
+    ).values_list('position__position_type', 'service_id', 'division_id', 'direction_id', 'pk', 'user_id'))
+
+
+def supervisor_map() -> SupervisorMap:
+    return get_cached_value(CacheKeys.SUPERVISOR_MAP, build_supervisor_map, CacheTTL.VERY_LONG)
+
+
+def in_cached_map(employee_id) -> bool:
+    """Whether the cached map lists the employee as a chef (no map cached: nothing stale to drop, nothing built)"""
+    value, _ = unwrap_entry(cache.get(tagged_key(CacheKeys.SUPERVISOR_MAP)))
+    return value is not MISS and employee_id in value.employee_ids
+
+
+def invalidate_supervisor_map():
+    """Drop the map once the current transaction commits (immediately in autocommit)"""
+    transaction.on_commit(lambda: cache.delete(tagged_key(CacheKeys.SUPERVISOR_MAP)))
+
+
+def find_supervisors_for(employee) -> list:
+    """Users who act as supervisors for ``employee`` (one query, with their employee profile and position)"""
+    from django.contrib.auth.models import User
+    user_ids = supervisor_map().supervisor_user_ids(employee)
+    if not user_ids:
+        return []
+    users = User.objects.select_related('employee_profile__position').in_bulk(user_ids)
+    return [users[user_id] for user_id in user_ids if user_id in users]
+
+
+def supervisor_chain(employee) -> Dict[str, object]:
+    """``{'m1': Employee or None, 'm2': Employee or None}`` (one query)"""
+    from .models import Employee
+    m1, m2 = supervisor_map().chain(employee)
+    found = Employee.objects.select_related('position').in_bulk([pk for pk in (m1, m2) if pk])
+    return {'m1': found.get(m1), 'm2': found.get(m2)}
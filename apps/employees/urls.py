@@ -1,8 +1,12 @@
+from django.conf import settings
 from django.urls import path
 from .views.employee_views import (
     EmployeeListView,
     EmployeeDetailView,
     EmployeeCreateView,
+    EmployeeImportView,
+    EmployeeBulkView,
+    EmployeeExportView,
     EmployeeUpdateView,
     EmployeeDeleteView,
     EmployeeCreateAccountView,
@@ -13,6 +17,9 @@ from .views.employee_views import (
 from .views.async_views import (
     AsyncGetDivisionsAPIView,
     AsyncGetServicesAPIView,
+    AsyncOrgTreeAPIView,
+    AsyncEmployeeListView,
+    AsyncORMEmployeeListView,
 )
 from .views.org_views import (
     DirectionListView, DirectionCreateView, DirectionEditView,
@@ -23,7 +30,7 @@ from .views.org_views import (
     FiliereListView, FiliereCreateView, FiliereEditView, FiliereDeleteView,
 )
 from .views.progression_views import (
-    RuleListView, RuleCreateView, RuleEditView, RuleDeleteView,
+    RuleListView, RuleCreateView, RuleEditView, RuleDeleteView, PromotionEligibilityView,
 )
 from .views.grade_views import (
     GradeListView, GradeCreateView, GradeEditView, GradeDeleteView,
@@ -51,9 +58,19 @@ from .views.deployment_views import (
 
 app_name = 'employees'
 
+# /employees/ on the native async ORM view (ASGI deployments) or the sync one
+EmployeeListEntryView = AsyncORMEmployeeListView if settings.EMPLOYEE_LIST_ASYNC else EmployeeListView
+
 urlpatterns = [
-    path('', EmployeeListView.as_view(), name='list'),
+    path('', EmployeeListEntryView.as_view(), name='list'),
+    # Each list implementation under a fixed URL (load comparisons)
+    path('list/sync/', EmployeeListView.as_view(), name='list_sync'),
+    path('list/async/', AsyncORMEmployeeListView.as_view(), name='list_async'),
+    path('list/async-wrapped/', AsyncEmployeeListView.as_view(), name='list_async_wrapped'),
     path('create/', EmployeeCreateView.as_view(), name='create'),
+    path('import/', EmployeeImportView.as_view(), name='import'),
+    path('export/', EmployeeExportView.as_view(), name='export'),
+    path('bulk/', EmployeeBulkView.as_view(), name='bulk'),
     path('<int:pk>/', EmployeeDetailView.as_view(), name='detail'),
     path('<int:pk>/edit/', EmployeeUpdateView.as_view(), name='edit'),
     path('<int:pk>/delete/', EmployeeDeleteView.as_view(), name='delete'),
@@ -63,6 +80,7 @@ urlpatterns = [
     # API endpoints - using async views for high performance under load
     path('api/get-divisions/', AsyncGetDivisionsAPIView.as_view(), name='api_get_divisions'),
     path('api/get-services/', AsyncGetServicesAPIView.as_view(), name='api_get_services'),
+    path('api/org-tree/', AsyncOrgTreeAPIView.as_view(), name='api_org_tree'),
     # Organization management
     path('organization/directions/', DirectionListView.as_view(), name='org_directions'),
     path('organization/directions/create/', DirectionCreateView.as_view(), name='org_direction_create'),
@@ -91,6 +109,7 @@ urlpatterns = [
     path('progression/rules/create/', RuleCreateView.as_view(), name='rule_create'),
     path('progression/rules/<int:pk>/edit/', RuleEditView.as_view(), name='rule_edit'),
     path('progression/rules/<int:pk>/delete/', RuleDeleteView.as_view(), name='rule_delete'),
+    path('progression/eligibility/', PromotionEligibilityView.as_view(), name='eligibility'),
     # Grades management
     path('grades/', GradeListView.as_view(), name='grade_list'),
     path('grades/create/', GradeCreateView.as_view(), name='grade_create'),
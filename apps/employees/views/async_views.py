@@ -2,104 +2,72 @@
 Async views for high-performance operations under load
 """
 from django.shortcuts import render
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
 from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin
 from asgiref.sync import sync_to_async
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.db.models import F, Q
 
-from ..models import Employee, Direction, Division, Service
-from ..async_cache import (
-    get_cached_value_async,
-    aget_cache,
-    aset_cache,
-    CacheKeys,
-    CacheTTL,
-)
+from apps.roles.resolver import aget_roles, has_role
+from hr_project.pagination import KeysetPaginator, page_size_from_request
+from hr_project.querybudget import query_budget
+from hr_project.conditional import API_MAX_AGE, conditional_get
+
+from ..controllers.employee_controller import employee_list_filters
+from ..directory import load_employees
+from ..orgtree import aorg_tree, org_tree
+from ..models import Employee
+from ..search import asearch_queryset, search_queryset
 
 
 class AsyncGetDivisionsAPIView(View):
     """Async API view for divisions by direction - non-blocking under load"""
     
+    @conditional_get('org', max_age=API_MAX_AGE, per_user=False)
     async def get(self, request):
-        direction_id = request.GET.get('direction_id')
+        direction_id = _int_param(request, 'direction_id')
         if not direction_id:
             return JsonResponse({'divisions': []})
         
-        cache_key = CacheKeys.DIVISIONS_BY_DIRECTION.format(id=direction_id)
-        
-        # Non-blocking cache get
-        divisions = await aget_cache(cache_key)
-        
-        if divisions is None:
-            # Non-blocking database query
-            @sync_to_async
-            def fetch_divisions():
-                return list(
-                    Division.objects.filter(
-                        direction_id=direction_id, is_active=True
-                    ).values('id', 'name')
-                )
-            
-            divisions = await fetch_divisions()
-            
-            # Non-blocking cache set
-            await aset_cache(cache_key, divisions, CacheTTL.LONG)
-        
-        return JsonResponse({'divisions': divisions})
+        # Org tree: in-process tier, then Redis, then one non-blocking build
+        tree = await aorg_tree()
+        return JsonResponse({'divisions': tree.options('direction', direction_id, 'division')})
 
 
 class AsyncGetServicesAPIView(View):
     """Async API view for services by direction/division - non-blocking under load"""
     
+    @conditional_get('org', max_age=API_MAX_AGE, per_user=False)
     async def get(self, request):
-        direction_id = request.GET.get('direction_id')
-        division_id = request.GET.get('division_id')
+        direction_id = _int_param(request, 'direction_id')
+        division_id = _int_param(request, 'division_id')
         
         if division_id:
-            cache_key = CacheKeys.SERVICES_BY_DIVISION.format(id=division_id)
-            
-            services = await aget_cache(cache_key)
-            
-            if services is None:
-                @sync_to_async
-                def fetch_services():
-                    return list(
-                        Service.objects.filter(
-                            division_id=division_id, is_active=True
-                        ).values('id', 'name')
-                    )
-                
-                services = await fetch_services()
-                await aset_cache(cache_key, services, CacheTTL.LONG)
-            
-            return JsonResponse({'services': services})
-            
+            tree = await aorg_tree()
+            return JsonResponse({'services': tree.options('division', division_id, 'service')})
         elif direction_id:
-            cache_key = CacheKeys.SERVICES_BY_DIRECTION.format(id=direction_id)
-            
-            services = await aget_cache(cache_key)
-            
-            if services is None:
-                @sync_to_async
-                def fetch_services():
-                    return list(
-                        Service.objects.filter(
-                            direction_id=direction_id,
-                            division__isnull=True,
-                            is_active=True
-                        ).values('id', 'name')
-                    )
-                
-                services = await fetch_services()
-                await aset_cache(cache_key, services, CacheTTL.LONG)
-            
-            return JsonResponse({'services': services})
+            tree = await aorg_tree()
+            return JsonResponse({'services': tree.options('direction', direction_id, 'service')})
         
         return JsonResponse({'services': []})
 
 
+class AsyncOrgTreeAPIView(View):
+    """Async whole-tree endpoint: one request for the form's cascading dropdowns, 304 when unchanged"""
+    
+    @conditional_get('org', max_age=API_MAX_AGE, per_user=False)
+    async def get(self, request):
+        tree = await aorg_tree()
+        return HttpResponse(tree.json, content_type='application/json')
+
+
+def _int_param(request, name):
+    try:
+        return int(request.GET.get(name) or 0)
+    except ValueError:
+        return 0
+
+
 class AsyncEmployeeListView(LoginRequiredMixin, View):
     """
     Async employee list view for optimal performance under load.
@@ -109,26 +77,19 @@ class AsyncEmployeeListView(LoginRequiredMixin, View):
     """
     
     async def get(self, request):
-        # Fetch base employee list asynchronously
-        @sync_to_async
-        def get_base_employees():
-            return Employee.objects.select_related(
-                'direction', 'division', 'service', 'departement', 
-                'filiere', 'grade', 'position', 'user'
-            ).prefetch_related('user__groups').all()
-        
-        employees = await get_base_employees()
+        # Rows are loaded for the rendered page only (see paginate below)
+        employees = Employee.objects.all()
         
         # Apply scope restrictions (async-safe)
         @sync_to_async
         def apply_scope(queryset):
             user = request.user
             
-            if user.is_superuser or user.groups.filter(name='IT Admin').exists():
+            if user.is_superuser or has_role(user, 'IT Admin'):
                 return queryset
             
             emp = getattr(user, 'employee_profile', None)
-            is_hr_admin = user.groups.filter(name='HR Admin').exists()
+            is_hr_admin = has_role(user, 'HR Admin')
             
             if is_hr_admin:
                 return queryset
@@ -152,32 +113,8 @@ class AsyncEmployeeListView(LoginRequiredMixin, View):
         if search_query:
             @sync_to_async
             def apply_search(queryset, query):
-                terms = [t for t in query.split() if t]
-                base_q = Q()
-                initialized = False
-                
-                for term in terms:
-                    term_q = (
-                        Q(first_name__icontains=term) |
-                        Q(last_name__icontains=term) |
-                        Q(email__icontains=term) |
-                        Q(employee_id__icontains=term) |
-                        Q(ppr__icontains=term) |
-                        Q(cin__icontains=term) |
-                        Q(phone__icontains=term) |
-                        Q(position__name__icontains=term) |
-                        Q(grade__name__icontains=term) |
-                        Q(direction__name__icontains=term) |
-                        Q(division__name__icontains=term) |
-                        Q(service__name__icontains=term)
-                    )
-                    base_q = term_q if not initialized else (base_q & term_q)
-                    initialized = True
-                
-                if query.isdigit():
-                    base_q = base_q | Q(employee_id=query) | Q(ppr=query)
-                
-                return queryset.filter(base_q)
+                # Ranked full-text search, see apps.employees.search
+                return search_queryset(queryset, query)
             
             employees = await apply_search(employees, search_query)
         
@@ -201,56 +138,29 @@ class AsyncEmployeeListView(LoginRequiredMixin, View):
         
         employees = await apply_filters(employees)
         
-        # Pagination (async-safe)
-        page_size = request.GET.get('page_size', '10')
-        try:
-            page_size = int(page_size)
-            if page_size not in [5, 10, 25, 50, 100]:
-                page_size = 10
-        except (ValueError, TypeError):
-            page_size = 10
+        # Pagination (async-safe): page over the ordered pks, then load
+        # lightweight listing rows for that page only
+        page_size = page_size_from_request(request)
         
         @sync_to_async
-        def paginate(queryset, size, page_num):
-            paginator = Paginator(queryset, size)
-            return paginator.get_page(page_num)
+        def paginate(queryset, size):
+            pks = list(queryset.values_list('pk', flat=True))
+            page = KeysetPaginator(pks, size).page_from_request(request)
+            page.object_list = load_employees(page.object_list)
+            return page
         
-        page_number = request.GET.get('page', 1)
-        page_obj = await paginate(employees, page_size, page_number)
+        page_obj = await paginate(employees, page_size)
         
-        # Get dropdown choices (cached, async)
+        # Get dropdown choices (cached org tree, async)
         @sync_to_async
         def get_dropdowns():
             user = request.user
-            
-            if user.is_superuser or user.groups.filter(name__in=['HR Admin', 'IT Admin']).exists():
-                directions = Direction.objects.filter(is_active=True).order_by('name')
-                divisions = Division.objects.filter(is_active=True).order_by('name')
-                services = Service.objects.filter(is_active=True).order_by('name')
-            elif user.is_authenticated:
-                emp = getattr(user, 'employee_profile', None)
-                if emp and emp.service_id:
-                    directions = Direction.objects.filter(pk=emp.direction_id, is_active=True)
-                    divisions = Division.objects.filter(pk=emp.division_id, is_active=True)
-                    services = Service.objects.filter(pk=emp.service_id, is_active=True)
-                elif emp and emp.division_id:
-                    directions = Direction.objects.filter(pk=emp.direction_id, is_active=True)
-                    divisions = Division.objects.filter(pk=emp.division_id, is_active=True)
-                    services = Service.objects.filter(division_id=emp.division_id, is_active=True)
-                elif emp and emp.direction_id:
-                    directions = Direction.objects.filter(pk=emp.direction_id, is_active=True)
-                    divisions = Division.objects.filter(direction_id=emp.direction_id, is_active=True)
-                    services = Service.objects.filter(direction_id=emp.direction_id, is_active=True)
-                else:
-                    directions = Direction.objects.none()
-                    divisions = Division.objects.none()
-                    services = Service.objects.none()
-            else:
-                directions = Direction.objects.none()
-                divisions = Division.objects.none()
-                services = Service.objects.none()
-            
-            return list(directions), list(divisions), list(services)
+            emp = getattr(user, 'employee_profile', None) if user.is_authenticated else None
+            if user.is_superuser or has_role(user, 'HR Admin', 'IT Admin'):
+                return org_tree().scope_choices(everything=True)
+            if emp:
+                return org_tree().scope_choices(emp.direction_id, emp.division_id, emp.service_id)
+            return [], [], []
         
         directions, divisions, services = await get_dropdowns()
         
@@ -267,4 +177,89 @@ class AsyncEmployeeListView(LoginRequiredMixin, View):
             'status_choices': Employee.STATUS_CHOICES,
         }
         
-        return render(request, 'employees/list.html', context)
+        # Context processors query the database: render off the event loop
+        return await sync_to_async(render)(request, 'employees/list.html', context)
+
+
+async def _alist(queryset):
+    return [obj async for obj in queryset]
+
+
+@query_budget(12)
+class AsyncORMEmployeeListView(LoginRequiredMixin, View):
+    """
+    Employee list on Django's native async ORM API (``aiter``/``afirst``/
+    ``acount``) and the native async Redis client: no step of scope
+    resolution, search, filtering or pagination leaves the event loop.
+    Only template rendering does, since context processors query the
+    database synchronously.
+
+    Routed at ``/employees/`` when ``settings.EMPLOYEE_LIST_ASYNC`` is set.
+    """
+
+    async def get(self, request):
+        user = await request.auser()
+        request.user = user
+        roles = await aget_roles(user)
+
+        # Scope restriction (same rules as EmployeeListView)
+        employees = Employee.objects.all()
+        emp = None
+        if not user.is_superuser and not roles.has('IT Admin'):
+            emp = await Employee.objects.filter(user_id=user.pk).only(
+                'id', 'direction_id', 'division_id', 'service_id'
+            ).afirst()
+            if not roles.has('HR Admin'):
+                if emp and emp.direction_id:
+                    employees = employees.filter(direction_id=emp.direction_id)
+                elif emp:
+                    employees = employees.filter(user_id=user.pk)
+                else:
+                    employees = employees.none()
+
+        # Status, org and career filters (no user: the scope was applied above)
+        filters, _, selected = employee_list_filters(request.GET)
+        employees = employees.filter(**filters)
+
+        page_size = page_size_from_request(request)
+        search_query, sort = selected['search_query'], selected['sort']
+        if search_query or sort:
+            # Ranked matches or a sorted column: page over the ordered pks, then load that page
+            if search_query:
+                employees = await asearch_queryset(employees, search_query)
+            if sort:
+                column = F(sort.lstrip('-'))
+                employees = employees.order_by(
+                    column.desc(nulls_last=True) if sort.startswith('-') else column.asc(nulls_last=True),
+                    '-created_at', '-pk',
+                )
+            pks = await _alist(employees.values_list('pk', flat=True))
+            page_obj = await KeysetPaginator(pks, page_size).apage_from_request(request)
+            rows = {row.id: row async for row in Employee.objects.for_listing().filter(pk__in=page_obj.object_list)}
+            page_obj.object_list = [rows[pk] for pk in page_obj.object_list if pk in rows]
+        else:
+            page_obj = await KeysetPaginator(
+                employees.for_listing(), page_size, ordering=('-created_at', '-pk')
+            ).apage_from_request(request)
+            page_obj.count = await employees.acount()
+
+        directions, divisions, services = await self.dropdowns(user, roles, emp)
+        context = {
+            'page_obj': page_obj,
+            **selected,
+            'directions': directions,
+            'divisions': divisions,
+            'services': services,
+            'status_choices': Employee.STATUS_CHOICES,
+        }
+        # Context processors query the database: render off the event loop
+        return await sync_to_async(render)(request, 'employees/list.html', context)
+
+    async def dropdowns(self, user, roles, emp):
+        """Org filter choices within the user's scope"""
+        tree = await aorg_tree()
+        if user.is_superuser or roles.has('HR Admin', 'IT Admin'):
+            return tree.scope_choices(everything=True)
+        if emp:
+            return tree.scope_choices(emp.direction_id, emp.division_id, emp.service_id)
+        return [], [], []
@@ -27,6 +27,7 @@ from ..forms import (
     OrdreMissionReviewForm,
     GradeDeploymentRateForm
 )
+from ..supervisors import supervisor_chain
 
 
 class DeploymentListView(LoginRequiredMixin, View):
@@ -69,9 +70,7 @@ class DeploymentForfaitaireCreateView(UserPassesTestMixin, View):
     """Create new forfaitaire deployment - HR/Admin only, no approval required"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(
-            name__in=['IT Admin', 'HR Admin']
-        ).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request):
         try:
@@ -136,9 +135,7 @@ class DeploymentRealCreateView(UserPassesTestMixin, View):
     """Create new real deployment - HR/Admin only, no approval required"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(
-            name__in=['IT Admin', 'HR Admin']
-        ).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request):
         try:
@@ -203,9 +200,7 @@ class OrdreMissionCreateView(LoginRequiredMixin, View):
             messages.error(request, "Vous n'avez pas de profil employé.")
             return redirect('dashboard')
         
-        is_hr_admin = request.user.is_superuser or request.user.groups.filter(
-            name__in=['IT Admin', 'HR Admin']
-        ).exists()
+        is_hr_admin = request.user.is_superuser or request.roles.has('IT Admin', 'HR Admin')
         
         form = OrdreMissionForm(current_employee=employee, is_hr_admin=is_hr_admin)
         
@@ -223,9 +218,7 @@ class OrdreMissionCreateView(LoginRequiredMixin, View):
             messages.error(request, "Vous n'avez pas de profil employé.")
             return redirect('dashboard')
         
-        is_hr_admin = request.user.is_superuser or request.user.groups.filter(
-            name__in=['IT Admin', 'HR Admin']
-        ).exists()
+        is_hr_admin = request.user.is_superuser or request.roles.has('IT Admin', 'HR Admin')
         
         form = OrdreMissionForm(request.POST, request.FILES, current_employee=employee, is_hr_admin=is_hr_admin)
         
@@ -257,9 +250,7 @@ class OrdreMissionApprovalListView(UserPassesTestMixin, View):
     """List all pending ordres de mission for hierarchy approval"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(
-            name__in=['IT Admin', 'HR Admin']
-        ).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request):
         # Get all pending ordres
@@ -289,9 +280,7 @@ class OrdreMissionReviewView(UserPassesTestMixin, View):
     """Approve or reject an ordre de mission"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(
-            name__in=['IT Admin', 'HR Admin']
-        ).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request, pk):
         ordre = get_object_or_404(OrdreMission, pk=pk)
@@ -301,22 +290,8 @@ class OrdreMissionReviewView(UserPassesTestMixin, View):
             return redirect('employees:deployments_approval')
         
         form = OrdreMissionReviewForm()
-        # Compute decision hierarchy (M+1/M+2) for display
-        supervisors = {'m1': None, 'm2': None}
-        try:
-            employee = ordre.employee
-            from apps.employees.models.employee import Employee as Emp
-            if employee.service_id:
-                supervisors['m1'] = Emp.objects.filter(service_id=employee.service_id, position__position_type='chef_service').first()
-                supervisors['m2'] = Emp.objects.filter(division_id=employee.division_id, position__position_type='chef_division').first() if employee.division_id else Emp.objects.filter(direction_id=employee.direction_id, position__position_type='chef_direction').first()
-            elif employee.division_id:
-                supervisors['m1'] = Emp.objects.filter(division_id=employee.division_id, position__position_type='chef_division').first()
-                supervisors['m2'] = Emp.objects.filter(direction_id=employee.direction_id, position__position_type='chef_direction').first()
-            elif employee.direction_id:
-                supervisors['m1'] = Emp.objects.filter(direction_id=employee.direction_id, position__position_type='chef_direction').first()
-                supervisors['m2'] = None
-        except Exception:
-            supervisors = {'m1': None, 'm2': None}
+        # Decision hierarchy (M+1/M+2) for display, from the cached supervisor map
+        supervisors = supervisor_chain(ordre.employee)
         
         context = {
             'ordre': ordre,
@@ -361,9 +336,7 @@ class GradeDeploymentRateListView(UserPassesTestMixin, View):
     """List and manage grade deployment rates (HR Admin only)"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(
-            name__in=['IT Admin', 'HR Admin']
-        ).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request):
         rates = GradeDeploymentRate.objects.select_related('grade').order_by(
@@ -380,9 +353,7 @@ class GradeDeploymentRateCreateView(UserPassesTestMixin, View):
     """Create new grade deployment rate"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(
-            name__in=['IT Admin', 'HR Admin']
-        ).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request):
         form = GradeDeploymentRateForm()
@@ -415,9 +386,7 @@ class GradeDeploymentRateUpdateView(UserPassesTestMixin, View):
     """Update existing grade deployment rate"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(
-            name__in=['IT Admin', 'HR Admin']
-        ).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request, pk):
         rate = get_object_or_404(GradeDeploymentRate, pk=pk)
@@ -1,20 +1,29 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.views import View
-from django.contrib.auth.mixins import PermissionRequiredMixin
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.contrib import messages
-from django.core.paginator import Paginator
-from django.db.models import Q
+from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User, Group
-from django.http import JsonResponse
-from django.core.cache import cache
-from ..models import Employee, Direction, Division, Service
-from ..forms import EmployeeForm
+from django.http import HttpResponse, JsonResponse
+from hr_project.pagination import KeysetPaginator, page_size_from_request
+from hr_project.querybudget import query_budget
+from hr_project.conditional import API_MAX_AGE, conditional_get
+from ..models import Employee
+from ..forms import EmployeeBulkForm, EmployeeForm, EmployeeImportForm
 from ..controllers.employee_controller import (
     list_employees,
     delete_employee,
+    employee_list_filters,
 )
-from ..cache import CacheKeys, CacheTTL
+from ..directory import load_employees
+from ..orgtree import org_tree
+from ..scope import unit_scope
+from ..search import search_employee_pks, search_queryset
+from ..importer import EmployeeImporter, ImportFormatError
+from ..exports import employee_dataset
+from ..bulk import move_service, promote_employees, transfer_employees
+from hr_project.exports import EXPORT_FORMATS, export_response
 
 
 class EmployeeCreateAccountView(PermissionRequiredMixin, View):
@@ -74,7 +83,7 @@ class EmployeeModifyAccountView(PermissionRequiredMixin, View):
         new_password_confirm = request.POST.get('new_password_confirm', '').strip()
         
         # Check if user is IT Admin
-        is_it_admin = request.user.is_superuser or request.user.groups.filter(name='IT Admin').exists()
+        is_it_admin = request.user.is_superuser or request.roles.has('IT Admin')
         
         if not username:
             messages.error(request, 'Username is required.')
@@ -136,151 +145,40 @@ class EmployeeDeleteAccountView(PermissionRequiredMixin, View):
         return redirect(reverse('employees:detail', kwargs={'pk': pk}))
 
 
+@query_budget(12)
 class EmployeeListView(View):
     def get(self, request):
-        employees = list_employees()
-
-        # If the cached helper returned a materialized list (cache hit),
-        # convert to a queryset so downstream code can call .filter() etc.
-        # This keeps compatibility while still using caching for the base set.
-        if isinstance(employees, list):
-            pks = [e.pk for e in employees]
-            employees = Employee.objects.filter(pk__in=pks)
-
-        # Scope restriction for regular users
-        # IT Admin and Superuser: see all
-        # HR Admin: see all (but only in their direction for non-admins)
-        # Regular users and Managers: see only people in the same direction
-        if request.user.is_authenticated and not request.user.is_superuser and not request.user.groups.filter(name='IT Admin').exists():
-            emp = getattr(request.user, 'employee_profile', None)
-            
-            # Check if HR Admin - they can see everyone
-            is_hr_admin = request.user.groups.filter(name='HR Admin').exists()
-            
-            if not is_hr_admin:
-                # Regular users and managers: restrict to same direction only
-                scope_q = Q()
-                if emp and emp.direction_id:
-                    scope_q = Q(direction_id=emp.direction_id)
-                else:
-                    # No employee profile or no direction: restrict to none except self
-                    if emp:
-                        scope_q = Q(user_id=request.user.id)
-                    else:
-                        scope_q = Q(pk__in=[])
-                employees = employees.filter(scope_q)
+        # Columnar snapshot: scope, filters and pagination run in memory;
+        # only the rendered page is loaded from the database
+        directory = list_employees()
+        filters, visible, selected = employee_list_filters(request.GET, request.user, request.roles)
+        search_query = selected['search_query']
         
-        # Search functionality (support both 'search' and 'q' parameters)
-        search_query = (request.GET.get('search') or request.GET.get('q') or '').strip()
-        if search_query:
-            terms = [t for t in search_query.split() if t]
-            # Build a combined Q: AND across terms, OR across fields within each term
-            base_q = Q()
-            initialized = False
-            for term in terms:
-                term_q = (
-                    Q(first_name__icontains=term) |
-                    Q(last_name__icontains=term) |
-                    Q(email__icontains=term) |
-                    Q(employee_id__icontains=term) |
-                    Q(ppr__icontains=term) |
-                    Q(cin__icontains=term) |
-                    Q(phone__icontains=term) |
-                    Q(position__name__icontains=term) |
-                    Q(grade__name__icontains=term) |
-                    Q(direction__name__icontains=term) |
-                    Q(division__name__icontains=term) |
-                    Q(service__name__icontains=term)
-                )
-                base_q = term_q if not initialized else (base_q & term_q)
-                initialized = True
-            # Add exact match boost for numeric-only queries
-            if search_query.isdigit():
-                base_q = base_q | Q(employee_id=search_query) | Q(ppr=search_query)
-            employees = employees.filter(base_q)
+        pks = directory.select(filters) if visible else []
+        if search_query and pks:
+            # Ranked full-text matches, restricted to the scoped/filtered rows
+            allowed = set(pks)
+            pks = [pk for pk in search_employee_pks(search_query) if pk in allowed]
+        if selected['sort'] and pks:
+            pks = directory.order(pks, selected['sort'].lstrip('-'), descending=selected['sort'].startswith('-'))
         
-        # Filter by status
-        status_filter = request.GET.get('status', '')
-        if status_filter:
-            employees = employees.filter(status=status_filter)
-
-        # Organizational filters
-        direction_id = request.GET.get('direction')
-        division_id = request.GET.get('division')
-        service_id = request.GET.get('service')
-
-        if direction_id:
-            employees = employees.filter(direction_id=direction_id)
-        if division_id:
-            employees = employees.filter(division_id=division_id)
-        if service_id:
-            employees = employees.filter(service_id=service_id)
+        # Cursor pagination with custom page size (positional over the pk list)
+        page_obj = KeysetPaginator(pks, page_size_from_request(request)).page_from_request(request)
+        page_obj.object_list = load_employees(page_obj.object_list)
         
-        # Pagination with custom page size
-        page_size = request.GET.get('page_size', '10')
-        try:
-            page_size = int(page_size)
-            if page_size not in [5, 10, 25, 50, 100]:
-                page_size = 10
-        except (ValueError, TypeError):
-            page_size = 10
-            
-        paginator = Paginator(employees, page_size)
-        page_number = request.GET.get('page', 1)
-        page_obj = paginator.get_page(page_number)
-        
-        # Dropdown choices (limit to user's scope for regular users)
-        # Cache these queries since org structure rarely changes
-        if request.user.is_authenticated and (request.user.is_superuser or request.user.groups.filter(name__in=['HR Admin', 'IT Admin']).exists()):
-            # Admin users see all - use cache
-            cache_key_dir = CacheKeys.ORG_DIRECTIONS_ALL
-            directions = cache.get(cache_key_dir)
-            if directions is None:
-                directions = list(Direction.objects.filter(is_active=True).order_by('name'))
-                cache.set(cache_key_dir, directions, CacheTTL.LONG)
-            
-            cache_key_div = CacheKeys.ORG_DIVISIONS_ALL
-            divisions = cache.get(cache_key_div)
-            if divisions is None:
-                divisions = list(Division.objects.filter(is_active=True).order_by('name'))
-                cache.set(cache_key_div, divisions, CacheTTL.LONG)
-            
-            cache_key_srv = CacheKeys.ORG_SERVICES_ALL
-            services = cache.get(cache_key_srv)
-            if services is None:
-                services = list(Service.objects.filter(is_active=True).order_by('name'))
-                cache.set(cache_key_srv, services, CacheTTL.LONG)
-        elif request.user.is_authenticated:
-            emp = getattr(request.user, 'employee_profile', None)
-            if emp and emp.service_id:
-                directions = Direction.objects.filter(pk=emp.direction_id, is_active=True)
-                divisions = Division.objects.filter(pk=emp.division_id, is_active=True)
-                services = Service.objects.filter(pk=emp.service_id, is_active=True)
-            elif emp and emp.division_id:
-                directions = Direction.objects.filter(pk=emp.direction_id, is_active=True)
-                divisions = Division.objects.filter(pk=emp.division_id, is_active=True)
-                services = Service.objects.filter(division_id=emp.division_id, is_active=True)
-            elif emp and emp.direction_id:
-                directions = Direction.objects.filter(pk=emp.direction_id, is_active=True)
-                divisions = Division.objects.filter(direction_id=emp.direction_id, is_active=True)
-                services = Service.objects.filter(direction_id=emp.direction_id, is_active=True)
-            else:
-                directions = Direction.objects.none()
-                divisions = Division.objects.none()
-                services = Service.objects.none()
+        # Dropdown choices (limit to user's scope for regular users), from the cached org tree
+        user = request.user
+        emp = getattr(user, 'employee_profile', None) if user.is_authenticated else None
+        if user.is_authenticated and (user.is_superuser or request.roles.has('HR Admin', 'IT Admin')):
+            directions, divisions, services = org_tree().scope_choices(everything=True)
+        elif emp:
+            directions, divisions, services = org_tree().scope_choices(emp.direction_id, emp.division_id, emp.service_id)
         else:
-            # Anonymous users: no scope, return empty choices
-            directions = Direction.objects.none()
-            divisions = Division.objects.none()
-            services = Service.objects.none()
+            directions, divisions, services = [], [], []
         
         context = {
             'page_obj': page_obj,
-            'search_query': search_query,
-            'status_filter': status_filter,
-            'direction_id': int(direction_id) if direction_id else None,
-            'division_id': int(division_id) if division_id else None,
-            'service_id': int(service_id) if service_id else None,
+            **selected,
             'directions': directions,
             'divisions': divisions,
             'services': services,
@@ -289,32 +187,33 @@ class EmployeeListView(View):
         return render(request, 'employees/list.html', context)
 
 
+class EmployeeExportView(View):
+    """Download the employee list (current filters and scope) as CSV, JSONL or XLSX"""
+    def get(self, request):
+        if not (request.user.is_superuser or request.roles.has('HR Admin', 'IT Admin')):
+            messages.error(request, 'You do not have permission to export employees.')
+            return redirect('employees:list')
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            messages.error(request, f'Unsupported export format "{fmt}".')
+            return redirect('employees:list')
+        filters, visible, selected = employee_list_filters(request.GET, request.user, request.roles)
+        return export_response(employee_dataset(filters, visible, selected['search_query']), fmt)
+
+
+@query_budget(14)
 class EmployeeDetailView(View):
     def get(self, request, pk: int):
-        employee = get_object_or_404(Employee, pk=pk)
+        employee = get_object_or_404(Employee.objects.for_detail(), pk=pk)
         # Restrict visibility to scope for non-admin users
-        if not request.user.is_superuser and not request.user.groups.filter(name__in=['HR Admin', 'IT Admin']).exists():
-            my_emp = getattr(request.user, 'employee_profile', None)
-            allowed = False
-            if my_emp and my_emp.id == employee.id:
-                allowed = True
-            else:
-                scope_q = Q()
-                if my_emp:
-                    if my_emp.service_id:
-                        scope_q = Q(service_id=my_emp.service_id)
-                    elif my_emp.division_id:
-                        scope_q = Q(division_id=my_emp.division_id, service__isnull=True)
-                    elif my_emp.direction_id:
-                        scope_q = Q(direction_id=my_emp.direction_id, division__isnull=True, service__isnull=True)
-                if scope_q and Employee.objects.filter(pk=employee.pk).filter(scope_q).exists():
-                    allowed = True
+        if not request.user.is_superuser and not request.roles.has('HR Admin', 'IT Admin'):
+            allowed = employee.user_id == request.user.pk or employee.pk in unit_scope(request.user)
             if not allowed:
                 messages.error(request, 'You are not allowed to view this employee.')
                 return redirect('employees:list')
         
         # Get available groups for IT Admin
-        available_groups = Group.objects.all() if (request.user.is_superuser or request.user.groups.filter(name='IT Admin').exists()) else []
+        available_groups = Group.objects.all() if (request.user.is_superuser or request.roles.has('IT Admin')) else []
         
         return render(request, 'employees/detail.html', {
             'employee': employee,
@@ -376,6 +275,106 @@ class EmployeeCreateView(PermissionRequiredMixin, View):
         return render(request, 'employees/form.html', {'form': form, 'mode': 'create'})
 
 
+class EmployeeImportView(PermissionRequiredMixin, View):
+    """Bulk creation of employees from an uploaded CSV/XLSX file (see importer.py)"""
+    permission_required = 'employees.add_employee'
+    raise_exception = True
+    max_errors_shown = 500
+
+    def get(self, request):
+        return render(request, 'employees/import.html', {'form': EmployeeImportForm()})
+
+    def post(self, request):
+        form = EmployeeImportForm(request.POST, request.FILES)
+        report = None
+        if form.is_valid():
+            upload = form.cleaned_data['file']
+            importer = EmployeeImporter(
+                created_by=request.user,
+                create_users=form.cleaned_data['create_users'],
+                batch_size=form.cleaned_data['batch_size'],
+                dry_run=form.cleaned_data['dry_run'],
+            )
+            try:
+                report = importer.run(upload, upload.name)
+            except ImportFormatError as exc:
+                messages.error(request, str(exc))
+            else:
+                if report.dry_run:
+                    messages.info(request, f'{report.rows - report.rejected_lines}/{report.rows} row(s) valid (nothing was created).')
+                elif report.created:
+                    messages.success(request, f'{report.created} employee(s) imported, {report.users_created} user account(s) created.')
+                if report.errors:
+                    messages.warning(request, f'{report.rejected_lines} row(s) rejected.')
+        else:
+            messages.error(request, 'Please correct the errors below.')
+        return render(request, 'employees/import.html', {
+            'form': form,
+            'report': report,
+            'errors': sorted(report.errors)[:self.max_errors_shown] if report else [],
+        })
+
+
+class EmployeeBulkView(PermissionRequiredMixin, View):
+    """Org transfers and promotions applied to a filtered set of employees (see bulk.py).
+
+    "Preview" runs the operation as a dry run and lists the diff; "Apply"
+    writes it in one transaction.
+    """
+    permission_required = 'employees.change_employee'
+    raise_exception = True
+    max_changes_shown = 500
+
+    def get(self, request):
+        return render(request, 'employees/bulk.html', {'form': EmployeeBulkForm()})
+
+    def post(self, request):
+        form = EmployeeBulkForm(request.POST)
+        result = None
+        if form.is_valid():
+            data = form.cleaned_data
+            options = {
+                'dry_run': 'apply' not in request.POST,
+                'note': data['note'],
+                'effective_date': data['effective_date'],
+                'created_by': request.user,
+            }
+            queryset = Employee.objects.filter(**form.selection())
+            if data['search']:
+                queryset = search_queryset(queryset, data['search'])
+            try:
+                if data['operation'] == 'transfer':
+                    result = transfer_employees(
+                        queryset, data['target_direction'], data['target_division'], data['target_service'], **options
+                    )
+                elif data['operation'] == 'promotion':
+                    result = promote_employees(
+                        queryset, grade=data['target_grade'], echelle=data['target_echelle'],
+                        echelon=data['target_echelon'], echelon_step=data['echelon_step'],
+                        hors_echelle=form.hors_echelle_value, **options
+                    )
+                else:
+                    result = move_service(
+                        data['moved_service'], data['target_direction'], data['target_division'], **options
+                    )
+            except ValidationError as exc:
+                form.add_error(None, exc)
+            else:
+                if result.dry_run:
+                    messages.info(request, f'Preview: {result.changed}/{result.matched} employee(s) would change (nothing was saved).')
+                else:
+                    messages.success(request, f'{result.changed} employee(s) updated, {result.history_created} history entr(ies) logged.')
+                if result.skipped:
+                    messages.warning(request, f'{len(result.skipped)} employee(s) skipped.')
+        else:
+            messages.error(request, 'Please correct the errors below.')
+        return render(request, 'employees/bulk.html', {
+            'form': form,
+            'result': result,
+            'changes': result.changes[:self.max_changes_shown] if result else [],
+        })
+
+
 class EmployeeUpdateView(PermissionRequiredMixin, View):
     permission_required = 'employees.change_employee'
     raise_exception = True
@@ -407,39 +406,40 @@ class EmployeeDeleteView(PermissionRequiredMixin, View):
         return redirect(reverse('employees:list'))
 
 
-# API Views for cascading dropdowns
+# API Views for cascading dropdowns (the form loads the whole tree from OrgTreeAPIView instead)
 class GetDivisionsAPIView(View):
     """Return divisions for a given direction"""
+    @conditional_get('org', max_age=API_MAX_AGE, per_user=False)
     def get(self, request):
-        direction_id = request.GET.get('direction_id')
+        direction_id = _int_param(request, 'direction_id')
         if not direction_id:
             return JsonResponse({'divisions': []})
-        cache_key = CacheKeys.DIVISIONS_BY_DIRECTION.format(id=direction_id)
-        divisions = cache.get(cache_key)
-        if divisions is None:
-            divisions = list(Division.objects.filter(direction_id=direction_id, is_active=True).values('id', 'name'))
-            cache.set(cache_key, divisions, CacheTTL.LONG)
-        return JsonResponse({'divisions': divisions})
+        return JsonResponse({'divisions': org_tree().options('direction', direction_id, 'division')})
 
 
 class GetServicesAPIView(View):
     """Return services for a given direction or division"""
+    @conditional_get('org', max_age=API_MAX_AGE, per_user=False)
     def get(self, request):
-        direction_id = request.GET.get('direction_id')
-        division_id = request.GET.get('division_id')
+        division_id = _int_param(request, 'division_id')
+        direction_id = _int_param(request, 'direction_id')
         if division_id:
-            cache_key = CacheKeys.SERVICES_BY_DIVISION.format(id=division_id)
-            services = cache.get(cache_key)
-            if services is None:
-                services = list(Service.objects.filter(division_id=division_id, is_active=True).values('id', 'name'))
-                cache.set(cache_key, services, CacheTTL.LONG)
-            return JsonResponse({'services': services})
+            return JsonResponse({'services': org_tree().options('division', division_id, 'service')})
         elif direction_id:
-            cache_key = CacheKeys.SERVICES_BY_DIRECTION.format(id=direction_id)
-            services = cache.get(cache_key)
-            if services is None:
-                services = list(Service.objects.filter(direction_id=direction_id, division__isnull=True, is_active=True).values('id', 'name'))
-                cache.set(cache_key, services, CacheTTL.LONG)
-            return JsonResponse({'services': services})
+            return JsonResponse({'services': org_tree().options('direction', direction_id, 'service')})
         else:
             return JsonResponse({'services': []})
+
+
+class OrgTreeAPIView(LoginRequiredMixin, View):
+    """The whole active org tree in one response, revalidated with its ETag"""
+    @conditional_get('org', max_age=API_MAX_AGE, per_user=False)
+    def get(self, request):
+        return HttpResponse(org_tree().json, content_type='application/json')
+
+
+def _int_param(request, name):
+    try:
+        return int(request.GET.get(name) or 0)
+    except ValueError:
+        return 0
@@ -2,6 +2,7 @@ from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from apps.roles.resolver import has_role
 from ..models import Grade
 from ..forms.grade_forms import GradeForm
 
@@ -9,7 +10,7 @@ from ..forms.grade_forms import GradeForm
 class ITAdminOrHRMixin(UserPassesTestMixin):
     def test_func(self):
         user = self.request.user
-        return user.is_authenticated and (user.is_superuser or user.groups.filter(name__in=['IT Admin', 'HR']).exists())
+        return user.is_authenticated and (user.is_superuser or has_role(user, 'IT Admin', 'HR'))
 
 
 class GradeListView(LoginRequiredMixin, ITAdminOrHRMixin, View):
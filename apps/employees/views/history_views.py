@@ -16,7 +16,7 @@ class EmploymentHistoryListView(LoginRequiredMixin, View):
         
         # Check access permissions
         can_view = False
-        if request.user.is_superuser or request.user.groups.filter(name__in=['IT Admin', 'HR Admin']).exists():
+        if request.user.is_superuser or request.roles.has('IT Admin', 'HR Admin'):
             can_view = True
         elif hasattr(request.user, 'employee_profile') and request.user.employee_profile.id == employee.id:
             can_view = True
@@ -39,7 +39,7 @@ class EmploymentHistoryCreateView(UserPassesTestMixin, View):
     """Add a new employment history entry (IT Admin / HR Admin only)"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(name__in=['IT Admin', 'HR Admin']).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request, employee_id: int):
         employee = get_object_or_404(Employee, pk=employee_id)
@@ -79,7 +79,7 @@ class EmploymentHistoryUpdateView(UserPassesTestMixin, View):
     """Edit an existing employment history entry (IT Admin / HR Admin only)"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(name__in=['IT Admin', 'HR Admin']).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request, pk: int):
         history = get_object_or_404(EmploymentHistory, pk=pk)
@@ -120,7 +120,7 @@ class EmploymentHistoryDeleteView(UserPassesTestMixin, View):
     """Delete an employment history entry (IT Admin only)"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(name='IT Admin').exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin')
     
     def post(self, request, pk: int):
         history = get_object_or_404(EmploymentHistory, pk=pk)
@@ -136,7 +136,7 @@ class GradeChangeCreateView(UserPassesTestMixin, View):
     """Specialized view for grade/échelle/échelon changes"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(name__in=['IT Admin', 'HR Admin']).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request, employee_id: int):
         employee = get_object_or_404(Employee, pk=employee_id)
@@ -219,7 +219,7 @@ class ContractCreateView(UserPassesTestMixin, View):
     """Specialized view for contract management (new, renewal, end)"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(name__in=['IT Admin', 'HR Admin']).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request, employee_id: int):
         employee = get_object_or_404(Employee, pk=employee_id)
@@ -275,7 +275,7 @@ class RetirementCreateView(UserPassesTestMixin, View):
     """Specialized view for retirement tracking"""
     
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(name__in=['IT Admin', 'HR Admin']).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
     
     def get(self, request, employee_id: int):
         employee = get_object_or_404(Employee, pk=employee_id)
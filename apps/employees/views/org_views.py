@@ -3,6 +3,8 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.db import IntegrityError
+from apps.roles.resolver import has_role
+from hr_project.conditional import conditional_get
 from ..models import Direction, Division, Service, Departement, Filiere
 from ..forms.org_forms import DirectionForm, DivisionForm, ServiceForm, DepartementForm, FiliereForm
 from ..cache import get_cached_queryset, CacheKeys, CacheTTL, invalidate_org_cache
@@ -11,10 +13,11 @@ from ..cache import get_cached_queryset, CacheKeys, CacheTTL, invalidate_org_cac
 class ITAdminOnlyMixin(UserPassesTestMixin):
     def test_func(self):
         user = self.request.user
-        return user.is_authenticated and (user.is_superuser or user.groups.filter(name='IT Admin').exists())
+        return user.is_authenticated and (user.is_superuser or has_role(user, 'IT Admin'))
 
 
 class DirectionListView(LoginRequiredMixin, View):
+    @conditional_get('org')
     def get(self, request):
         directions = get_cached_queryset(
             CacheKeys.DIRECTIONS_ALL,
@@ -70,6 +73,7 @@ class DirectionDeleteView(LoginRequiredMixin, ITAdminOnlyMixin, View):
 
 
 class DivisionListView(LoginRequiredMixin, View):
+    @conditional_get('org')
     def get(self, request):
         divisions = get_cached_queryset(
             CacheKeys.DIVISIONS_ALL,
@@ -126,6 +130,7 @@ class DivisionDeleteView(LoginRequiredMixin, ITAdminOnlyMixin, View):
 
 
 class ServiceListView(LoginRequiredMixin, View):
+    @conditional_get('org')
     def get(self, request):
         services = get_cached_queryset(
             CacheKeys.SERVICES_ALL,
@@ -183,6 +188,7 @@ class ServiceDeleteView(LoginRequiredMixin, ITAdminOnlyMixin, View):
 
 # Département Views
 class DepartementListView(LoginRequiredMixin, View):
+    @conditional_get('org')
     def get(self, request):
         departements = get_cached_queryset(
             CacheKeys.DEPARTEMENTS_ALL,
@@ -239,6 +245,7 @@ class DepartementDeleteView(LoginRequiredMixin, ITAdminOnlyMixin, View):
 
 # Filière Views
 class FiliereListView(LoginRequiredMixin, View):
+    @conditional_get('org')
     def get(self, request):
         filieres = Filiere.objects.select_related('departement').all().order_by('departement__name', 'name')
         return render(request, 'employees/org/filieres.html', {'filieres': filieres})
@@ -2,8 +2,16 @@ from django.views import View
 from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
+from django.utils import timezone
+from hr_project.exports import EXPORT_FORMATS, rows_response
+from hr_project.pagination import KeysetPaginator, page_size_from_request
+from hr_project.querybudget import query_budget
+from ..models import Direction, Grade
 from ..models.employee import GradeProgressionRule
 from ..forms.progression_forms import GradeProgressionRuleForm
+from ..cache import CacheKeys, CacheTTL, get_cached_value
+from ..controllers.employee_controller import eligibility_filters, employee_list_filters
+from ..eligibility import ELIGIBILITY_BASES, EXPORT_COLUMNS, eligibility_report, next_quarter
 
 
 class RuleListView(LoginRequiredMixin, PermissionRequiredMixin, View):
@@ -50,4 +58,47 @@ class RuleDeleteView(LoginRequiredMixin, PermissionRequiredMixin, View):
         rule.delete()
         messages.success(request, 'Rule deleted.')
         return redirect('employees:rules_list')
-    
\ No newline at end of file
+    
+
+@query_budget(10)
+class PromotionEligibilityView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Who is (or becomes) eligible for promotion, over the whole scoped workforce"""
+    permission_required = 'employees.view_gradeprogressionrule'
+
+    def get(self, request):
+        report = eligibility_report()
+        filters, visible, selected = employee_list_filters(request.GET, request.user, request.roles)
+        options = eligibility_filters(request.GET)
+        employee_ids = None
+        if not visible:
+            employee_ids = set()
+        elif filters:
+            employee_ids = set(report.directory.select(filters))
+        indexes = report.select(employee_ids, **options)
+
+        fmt = request.GET.get('format')
+        if fmt:
+            if fmt not in EXPORT_FORMATS:
+                messages.error(request, f'Unsupported export format "{fmt}".')
+                return redirect('employees:eligibility')
+            return rows_response(
+                f'eligibilite-{timezone.localdate():%Y%m%d}.{fmt}', [header for header, _ in EXPORT_COLUMNS],
+                report.export_rows(indexes), fmt, title='eligibilite',
+            )
+
+        page_obj = KeysetPaginator(indexes, page_size_from_request(request, default=25)).page_from_request(request)
+        page_obj.object_list = report.rows(page_obj.object_list)
+        context = {
+            'page_obj': page_obj,
+            'direction_id': selected['direction_id'],
+            **options,
+            'bases': ELIGIBILITY_BASES,
+            'directions': get_cached_value(
+                CacheKeys.ORG_DIRECTIONS_ALL,
+                lambda: list(Direction.objects.filter(is_active=True).order_by('name')),
+                CacheTTL.LONG,
+            ),
+            'grades': get_cached_value(CacheKeys.GRADES_ALL, lambda: list(Grade.objects.order_by('name')), CacheTTL.LONG),
+            'next_quarter': next_quarter(timezone.localdate()),
+        }
+        return render(request, 'employees/progression/eligibility.html', context)
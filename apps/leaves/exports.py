@@ -0,0 +1,54 @@
+"""
+Leave request and balance exports (see ``hr_project.exports``)
+
+Requests are filtered like ``AllLeaveRequestsView`` (``filter_leave_requests``);
+balances by year, leave type and employee (``filter_leave_balances``).
+"""
+from hr_project.exports import ExportDataset
+
+from .models import EmployeeLeaveBalance, LeaveRequest
+from .utils import filter_leave_balances, filter_leave_requests
+
+LEAVE_REQUEST_EXPORT_COLUMNS = (
+    ('ID', 'id'),
+    ('Matricule', 'employee__employee_id'),
+    ('Prénom', 'employee__first_name'),
+    ('Nom', 'employee__last_name'),
+    ('Direction', 'employee__direction__name'),
+    ('Type de congé', 'leave_type__name'),
+    ('Date début', 'start_date'),
+    ('Date fin', 'end_date'),
+    ('Jours', 'days'),
+    ('Statut', 'status'),
+    ('Motif', 'reason'),
+    ('Approbateur', 'approver__username'),
+    ('Approuvé le', 'approved_at'),
+    ('Créé le', 'created_at'),
+)
+
+LEAVE_BALANCE_EXPORT_COLUMNS = (
+    ('Matricule', 'employee__employee_id'),
+    ('Prénom', 'employee__first_name'),
+    ('Nom', 'employee__last_name'),
+    ('Direction', 'employee__direction__name'),
+    ('Type de congé', 'leave_type__name'),
+    ('Année', 'year'),
+    ('Solde initial', 'opening'),
+    ('Acquis', 'accrued'),
+    ('Reporté', 'carried_over'),
+    ('Pris', 'used'),
+    ('Expiré', 'expired'),
+    ('Solde', 'closing'),
+)
+
+
+def leave_request_dataset(params=None) -> ExportDataset:
+    queryset = filter_leave_requests(LeaveRequest.objects.all(), params or {})
+    return ExportDataset('leave-requests', queryset, LEAVE_REQUEST_EXPORT_COLUMNS, labels={
+        'status': dict(LeaveRequest.STATUS_CHOICES),
+    })
+
+
+def leave_balance_dataset(params=None) -> ExportDataset:
+    queryset = filter_leave_balances(EmployeeLeaveBalance.objects.all(), params or {})
+    return ExportDataset('leave-balances', queryset, LEAVE_BALANCE_EXPORT_COLUMNS)
@@ -1,8 +1,10 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.utils import timezone
+from apps.employees.cache import invalidate_taxonomy_cache
 from apps.employees.models import Employee
 from .models import LeaveType, EmployeeLeaveBalance
+from .utils import initial_balances
 
 
 @receiver(post_save, sender=Employee)
@@ -13,29 +15,8 @@ def create_leave_balances_for_new_employee(sender, instance, created, **kwargs):
     Uses monthly prorata calculation if employee hired mid-year.
     """
     if created:
-        current_year = timezone.now().year
-        leave_types = LeaveType.objects.filter(is_active=True)
-        
-        for leave_type in leave_types:
-            balance, balance_created = EmployeeLeaveBalance.objects.get_or_create(
-                employee=instance,
-                leave_type=leave_type,
-                year=current_year,
-                defaults={
-                    'opening': 0,
-                    'accrued': 0,  # Will be calculated below
-                    'used': 0,
-                    'carried_over': 0,
-                    'expired': 0,
-                    'closing': 0,  # Will be calculated below
-                }
-            )
-            
-            if balance_created:
-                # Calculate accrued based on hire date and prorata settings
-                balance.accrued = balance.calculate_monthly_accrual()
-                balance.recalculate_balance()
-                balance.save()
+        # One INSERT for all leave types; existing balances are left as they are
+        EmployeeLeaveBalance.objects.bulk_create(initial_balances([instance]), ignore_conflicts=True)
 
 
 @receiver(post_save, sender=LeaveType)
@@ -62,3 +43,11 @@ def create_balances_for_new_leave_type(sender, instance, created, **kwargs):
                     'closing': instance.annual_days,
                 }
             )
+
+
+# Leave types are reference data like grades: they version with the taxonomy
+# family (validators of the conditional GET on the leave type list)
+@receiver(post_save, sender=LeaveType)
+@receiver(post_delete, sender=LeaveType)
+def leave_type_changed(sender, instance, **kwargs):
+    invalidate_taxonomy_cache()
@@ -17,6 +17,8 @@ urlpatterns = [
     path('approve/<int:pk>/', views.LeaveApproveActionView.as_view(), name='approve_action'),
     
     path('all/', views.AllLeaveRequestsView.as_view(), name='all_requests'),
+    path('all/export/', views.LeaveRequestExportView.as_view(), name='all_requests_export'),
+    path('balances/export/', views.LeaveBalanceExportView.as_view(), name='balances_export'),
     # Admin balance actions
     path('balances/reset/<int:pk>/', views.BalanceResetView.as_view(), name='balance_reset'),
     path('balances/adjust/<int:pk>/', views.BalanceAdjustView.as_view(), name='balance_adjust'),
@@ -1,71 +1,78 @@
-from typing import List
+from typing import Iterable, List, Optional
 from django.contrib.auth.models import User
 from django.db.models import Q
+from django.utils import timezone
 from apps.employees.models.employee import Employee, Position
+from apps.employees.scope import approval_scope
+from apps.employees.supervisors import find_supervisors_for  # noqa: F401 (re-exported)
 
 
-def find_supervisors_for(employee: Employee) -> List[User]:
-    """Return a list of Users who should act as supervisors for the given employee.
-    Preference order: Chef de Service in same service, then Chef de Division in same division,
-    then Chef de Direction in same direction. Only returns those with linked user accounts.
+def approvals_scope_q_for_user(user: User) -> Q:
+    """Return a Q filter limiting LeaveRequest.employee to the scope managed by this user.
+    Superuser or HR Admin can see all; otherwise employees directly assigned to:
+      - chef_service: the same service
+      - chef_division: the same division (no service)
+      - chef_direction: the same direction (no division/service)
+    Non-supervisors: see none. Resolved without queries, see ``apps.employees.scope``.
     """
-    users: List[User] = []
+    return approval_scope(user).q('employee_id')
 
-    # Try service-level supervisor
-    if employee.service_id:
-        qs = Employee.objects.filter(
-            service_id=employee.service_id,
-            position__position_type='chef_service',
-        ).select_related('user')
-        users.extend([e.user for e in qs if e.user])
-        if users:
-            return users
 
-    # Try division-level supervisor
-    if employee.division_id:
-        qs = Employee.objects.filter(
-            division_id=employee.division_id,
-            position__position_type='chef_division',
-        ).select_related('user')
-        users.extend([e.user for e in qs if e.user])
-        if users:
-            return users
+def initial_balances(employees: Iterable[Employee], leave_types=None, year: Optional[int] = None) -> List:
+    """Unsaved current-year balances of each active leave type for new employees.
 
-    # Fallback to direction-level supervisor
-    qs = Employee.objects.filter(
-        direction_id=employee.direction_id,
-        position__position_type='chef_direction',
-    ).select_related('user')
-    users.extend([e.user for e in qs if e.user])
-    return users
+    Accrual is prorated from the hire date (see
+    ``EmployeeLeaveBalance.calculate_monthly_accrual``). Callers save them
+    with one ``bulk_create``.
+    """
+    from .models import EmployeeLeaveBalance, LeaveType
+    if leave_types is None:
+        leave_types = list(LeaveType.objects.filter(is_active=True))
+    year = year or timezone.now().year
+    balances = []
+    for employee in employees:
+        for leave_type in leave_types:
+            balance = EmployeeLeaveBalance(employee=employee, leave_type=leave_type, year=year)
+            balance.accrued = balance.calculate_monthly_accrual()
+            balance.recalculate_balance()
+            balances.append(balance)
+    return balances
 
 
-def approvals_scope_q_for_user(user: User) -> Q:
-    """Return a Q filter limiting LeaveRequest.employee to the scope managed by this user.
-    Superuser or HR Admin can see all; otherwise:
-      - chef_service: same service
-      - chef_division: same division
-      - chef_direction: same direction
-    Non-supervisors: see none.
-    """
-    # Superusers or HR Admin see all
-    if user.is_superuser or user.groups.filter(name__in=['HR Admin', 'IT Admin']).exists():
-        return Q()  # no restriction
+def _employee_search_q(search: str, prefix: str = 'employee__') -> Q:
+    return (
+        Q(**{f'{prefix}first_name__icontains': search}) |
+        Q(**{f'{prefix}last_name__icontains': search}) |
+        Q(**{f'{prefix}email__icontains': search}) |
+        Q(**{f'{prefix}employee_id__icontains': search})
+    )
+
+
+def filter_leave_requests(queryset, params):
+    """Apply the ``status``, ``employee`` (search) and ``leave_type`` filters of the all-requests page"""
+    status_filter = params.get('status', '')
+    employee_search = (params.get('employee') or '').strip()
+    leave_type_filter = params.get('leave_type', '')
+
+    if status_filter:
+        queryset = queryset.filter(status=status_filter)
+    if employee_search:
+        queryset = queryset.filter(_employee_search_q(employee_search))
+    if leave_type_filter:
+        queryset = queryset.filter(leave_type_id=leave_type_filter)
+    return queryset
 
-    emp = getattr(user, 'employee_profile', None)
-    if not emp or not emp.position_id:
-        return Q(pk__in=[])  # nothing
 
-    ptype = getattr(emp.position, 'position_type', None)
-    # Direct-assignment scopes only:
-    # - chef_service: employees directly assigned to the same service
-    # - chef_division: employees assigned to the division (no service)
-    # - chef_direction: employees assigned directly to direction (no division/service)
-    if ptype == 'chef_service' and emp.service_id:
-        return Q(employee__service_id=emp.service_id)
-    if ptype == 'chef_division' and emp.division_id:
-        return Q(employee__division_id=emp.division_id, employee__service__isnull=True)
-    if ptype == 'chef_direction' and emp.direction_id:
-        return Q(employee__direction_id=emp.direction_id, employee__division__isnull=True, employee__service__isnull=True)
+def filter_leave_balances(queryset, params):
+    """Apply the ``year``, ``leave_type`` and ``employee`` (search) filters to balances"""
+    year = params.get('year', '')
+    employee_search = (params.get('employee') or '').strip()
+    leave_type_filter = params.get('leave_type', '')
 
-    return Q(pk__in=[])
+    if year:
+        queryset = queryset.filter(year=year)
+    if employee_search:
+        queryset = queryset.filter(_employee_search_q(employee_search))
+    if leave_type_filter:
+        queryset = queryset.filter(leave_type_id=leave_type_filter)
+    return queryset
@@ -5,14 +5,21 @@ from django.contrib import messages
 from django.utils import timezone
 from django.db.models import Q
 from apps.employees.models import Employee
+from apps.employees.scope import approval_scope
+from hr_project.pagination import KeysetPaginator, page_size_from_request
+from hr_project.querybudget import query_budget
+from hr_project.conditional import conditional_get
 from .models import LeaveType, LeaveRequest, EmployeeLeaveBalance, LeaveRequestHistory
-from .utils import find_supervisors_for, approvals_scope_q_for_user
+from .utils import find_supervisors_for, approvals_scope_q_for_user, filter_leave_requests
+from .exports import leave_balance_dataset, leave_request_dataset
+from hr_project.exports import EXPORT_FORMATS, export_response
 from apps.notifications.models import Notification
 from .forms import LeaveTypeForm, LeaveRequestForm, EmployeeLeaveBalanceForm
 
 
 class LeaveTypeListView(LoginRequiredMixin, PermissionRequiredMixin, View):
     permission_required = 'leaves.view_leavetype'
+    @conditional_get('taxonomy')
     def get(self, request):
         types_ = LeaveType.objects.all().order_by('name')
         return render(request, 'leaves/types_list.html', {'types': types_})
@@ -132,15 +139,14 @@ class LeaveApproveActionView(LoginRequiredMixin, View):
         req = get_object_or_404(LeaveRequest, pk=pk)
         
         # Check if user is HR Admin (can view but cannot approve/reject)
-        is_hr_admin = request.user.groups.filter(name='HR Admin').exists() and not request.user.is_superuser
+        is_hr_admin = request.roles.has('HR Admin') and not request.user.is_superuser
         if is_hr_admin:
             messages.error(request, 'HR Admin can view requests but cannot approve or reject them. Only direct managers can take action.')
             return redirect('leaves:all_requests')
         
         # Allow IT Admins full access; otherwise ensure the request is within user's supervisory scope
-        scope_q = approvals_scope_q_for_user(request.user)
-        has_full_access = request.user.is_superuser or request.user.groups.filter(name='IT Admin').exists()
-        in_scope = LeaveRequest.objects.filter(pk=req.pk).filter(scope_q).exists()
+        has_full_access = request.user.is_superuser or request.roles.has('IT Admin')
+        in_scope = req.employee_id in approval_scope(request.user)
         
         if not (has_full_access or in_scope):
             messages.error(request, 'You are not allowed to take action on this request.')
@@ -239,7 +245,7 @@ class LeaveRequestDeleteView(LoginRequiredMixin, View):
 class BalanceResetView(LoginRequiredMixin, UserPassesTestMixin, View):
     """Reset employee leave balance (HR Admin and IT Admin)."""
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(name__in=['IT Admin', 'HR Admin']).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
 
     def post(self, request, pk):
         bal = get_object_or_404(EmployeeLeaveBalance, pk=pk)
@@ -258,7 +264,7 @@ class BalanceResetView(LoginRequiredMixin, UserPassesTestMixin, View):
 class BalanceAdjustView(LoginRequiredMixin, UserPassesTestMixin, View):
     """Allow HR Admin and IT Admin to adjust a specific leave balance."""
     def test_func(self):
-        return self.request.user.is_superuser or self.request.user.groups.filter(name__in=['IT Admin', 'HR Admin']).exists()
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
 
     def get(self, request, pk):
         bal = get_object_or_404(EmployeeLeaveBalance, pk=pk)
@@ -275,41 +281,31 @@ class BalanceAdjustView(LoginRequiredMixin, UserPassesTestMixin, View):
         return render(request, 'leaves/adjust_balance_form.html', {'form': form, 'balance': bal})
 
 
+@query_budget(12)
 class AllLeaveRequestsView(LoginRequiredMixin, View):
     """View for IT Admin and HR Admin to see ALL leave requests"""
     def get(self, request):
         # Only IT Admin and HR Admin can access
-        if not (request.user.is_superuser or request.user.groups.filter(name__in=['HR Admin', 'IT Admin']).exists()):
+        if not (request.user.is_superuser or request.roles.has('HR Admin', 'IT Admin')):
             messages.error(request, 'You do not have permission to view all leave requests.')
             return redirect('leaves:my')
         
         # Get filter parameters
         status_filter = request.GET.get('status', '')
         employee_search = request.GET.get('employee', '').strip()
-        leave_type_filter = request.GET.get('leave_type', '')
-        
-        # Base query - all requests
-        requests = LeaveRequest.objects.select_related('employee', 'leave_type', 'approver').all()
-        
-        # Apply filters
-        if status_filter:
-            requests = requests.filter(status=status_filter)
-        
-        if employee_search:
-            requests = requests.filter(
-                Q(employee__first_name__icontains=employee_search) |
-                Q(employee__last_name__icontains=employee_search) |
-                Q(employee__email__icontains=employee_search) |
-                Q(employee__employee_id__icontains=employee_search)
-            )
         
-        if leave_type_filter:
-            requests = requests.filter(leave_type_id=leave_type_filter)
+        # Base query - all requests, filtered
+        requests = filter_leave_requests(
+            LeaveRequest.objects.select_related('employee__position', 'employee__direction', 'leave_type', 'approver').all(), request.GET
+        )
         
-        requests = requests.order_by('-created_at')
+        requests = KeysetPaginator(
+            requests, page_size_from_request(request, default=25),
+            ordering=('-created_at', '-pk'), approximate_count=True,
+        ).page_from_request(request)
         
         # Check if user is HR Admin (read-only)
-        is_hr_readonly = request.user.groups.filter(name='HR Admin').exists() and not request.user.is_superuser
+        is_hr_readonly = request.roles.has('HR Admin') and not request.user.is_superuser
         
         # Get leave types for filter dropdown
         leave_types = LeaveType.objects.filter(is_active=True).order_by('name')
@@ -325,6 +321,32 @@ class AllLeaveRequestsView(LoginRequiredMixin, View):
         return render(request, 'leaves/all_requests.html', context)
 
 
+class LeaveRequestExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Download all leave requests (filtered like the all-requests page) as CSV, JSONL or XLSX"""
+    def test_func(self):
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
+
+    def get(self, request):
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            messages.error(request, f'Unsupported export format "{fmt}".')
+            return redirect('leaves:all_requests')
+        return export_response(leave_request_dataset(request.GET), fmt)
+
+
+class LeaveBalanceExportView(LoginRequiredMixin, UserPassesTestMixin, View):
+    """Download leave balances (``?year=``, ``leave_type``, ``employee``) as CSV, JSONL or XLSX"""
+    def test_func(self):
+        return self.request.user.is_superuser or self.request.roles.has('IT Admin', 'HR Admin')
+
+    def get(self, request):
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in EXPORT_FORMATS:
+            messages.error(request, f'Unsupported export format "{fmt}".')
+            return redirect('leaves:all_requests')
+        return export_response(leave_balance_dataset(request.GET), fmt)
+
+
 class LeaveRequestDetailView(LoginRequiredMixin, View):
     """View leave request details with full history"""
     def get(self, request, pk):
@@ -336,14 +358,12 @@ class LeaveRequestDetailView(LoginRequiredMixin, View):
         # 3. A manager who can see it in their scope
         can_view = False
         
-        if request.user.is_superuser or request.user.groups.filter(name__in=['HR Admin', 'IT Admin']).exists():
+        if request.user.is_superuser or request.roles.has('HR Admin', 'IT Admin'):
             can_view = True
         elif req.employee.user == request.user:
             can_view = True
-        else:
-            scope_q = approvals_scope_q_for_user(request.user)
-            if LeaveRequest.objects.filter(pk=req.pk).filter(scope_q).exists():
-                can_view = True
+        elif req.employee_id in approval_scope(request.user):
+            can_view = True
         
         if not can_view:
             messages.error(request, 'You do not have permission to view this request.')
@@ -353,11 +373,11 @@ class LeaveRequestDetailView(LoginRequiredMixin, View):
         history = req.history.select_related('action_by').order_by('-timestamp')
         
         # Check if user can approve/reject
-        is_hr_readonly = request.user.groups.filter(name='HR Admin').exists() and not request.user.is_superuser
+        is_hr_readonly = request.roles.has('HR Admin') and not request.user.is_superuser
         can_approve = not is_hr_readonly and (
             request.user.is_superuser or
-            request.user.groups.filter(name='IT Admin').exists() or
-            LeaveRequest.objects.filter(pk=req.pk).filter(approvals_scope_q_for_user(request.user)).exists()
+            request.roles.has('IT Admin') or
+            req.employee_id in approval_scope(request.user)
         )
         
         context = {
@@ -3,13 +3,17 @@ from django.views import View
 from django.shortcuts import render, redirect, get_object_or_404
 from django.urls import reverse
 from django.contrib import messages
+from hr_project.pagination import KeysetPaginator
+from hr_project.querybudget import query_budget
 from .models import Notification
 
 
+@query_budget(10)
 class NotificationListView(LoginRequiredMixin, View):
     def get(self, request):
-        qs = Notification.objects.filter(recipient=request.user).order_by('-created_at')
-        return render(request, 'notifications/list.html', {'notifications': qs})
+        qs = Notification.objects.filter(recipient=request.user)
+        page = KeysetPaginator(qs, 25, ordering=('-created_at', '-pk')).page_from_request(request)
+        return render(request, 'notifications/list.html', {'notifications': page})
 
 
 class NotificationMarkAllReadView(LoginRequiredMixin, View):
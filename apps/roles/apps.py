@@ -5,3 +5,7 @@ class RolesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.roles'
     verbose_name = 'Roles & Access'
+
+    def ready(self):
+        # Import signal handlers to register them
+        import apps.roles.signals  # noqa: F401
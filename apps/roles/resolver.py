@@ -0,0 +1,68 @@
+"""
+Per-request role resolution
+
+A user's group names are loaded once, memoised on the user instance (so on
+``request.user`` for the rest of the request) and cached in Redis under
+``CacheKeys.USER_GROUPS``. Membership changes invalidate that key, see
+``apps.roles.signals``.
+"""
+from apps.employees.async_cache import get_cached_value_async
+from apps.employees.cache import get_cached_value, CacheKeys, CacheTTL
+
+IT_ADMIN = 'IT Admin'
+HR_ADMIN = 'HR Admin'
+HR = 'HR'
+
+_ATTR = '_hr_roles'
+
+
+class UserRoles(frozenset):
+    """Group names of a user"""
+
+    def has(self, *names: str) -> bool:
+        """True if the user belongs to any of ``names``"""
+        return not self.isdisjoint(names)
+
+
+NO_ROLES = UserRoles()
+
+
+def get_roles(user) -> UserRoles:
+    """Return the user's group names, hitting the database at most once per instance"""
+    if user is None or not user.is_authenticated:
+        return NO_ROLES
+    roles = getattr(user, _ATTR, None)
+    if roles is None:
+        names = get_cached_value(
+            CacheKeys.USER_GROUPS.format(id=user.pk),
+            lambda: sorted(user.groups.values_list('name', flat=True)),
+            CacheTTL.LONG,
+        )
+        roles = UserRoles(names)
+        setattr(user, _ATTR, roles)
+    return roles
+
+
+async def aget_roles(user) -> UserRoles:
+    """Async ``get_roles`` (native async cache and ORM calls, same memoisation)"""
+    if user is None or not user.is_authenticated:
+        return NO_ROLES
+    roles = getattr(user, _ATTR, None)
+    if roles is None:
+        async def load():
+            return sorted([name async for name in user.groups.values_list('name', flat=True)])
+
+        names = await get_cached_value_async(CacheKeys.USER_GROUPS.format(id=user.pk), load, CacheTTL.LONG)
+        roles = UserRoles(names)
+        setattr(user, _ATTR, roles)
+    return roles
+
+
+def forget_roles(user):
+    """Drop the memoised roles of a user instance (after its groups changed)"""
+    user.__dict__.pop(_ATTR, None)
+
+
+def has_role(user, *names: str) -> bool:
+    """True if the user belongs to any of the groups ``names``"""
+    return get_roles(user).has(*names)
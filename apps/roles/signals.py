@@ -0,0 +1,35 @@
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_save, post_delete
+from django.dispatch import receiver
+
+from apps.employees.cache import invalidate_user_cache, bump_tag
+from .resolver import forget_roles
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        # user.groups.add(...): instance is the user
+        forget_roles(instance)
+        invalidate_user_cache(instance.pk)
+    elif pk_set:
+        # group.user_set.add(...): pk_set holds the users
+        for user_id in pk_set:
+            invalidate_user_cache(user_id)
+    else:
+        # group.user_set.clear(): members are unknown afterwards
+        bump_tag('user')
+
+
+# Renaming or deleting a group changes every member's role names
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, created, **kwargs):
+    if not created:
+        bump_tag('user')
+
+
+@receiver(post_delete, sender=Group)
+def group_deleted(sender, instance, **kwargs):
+    bump_tag('user')
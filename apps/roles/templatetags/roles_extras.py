@@ -1,11 +1,13 @@
 from django import template
 
+from apps.roles.resolver import has_role
+
 register = template.Library()
 
 @register.filter(name='has_group')
 def has_group(user, group_name: str) -> bool:
     try:
-        return user.is_authenticated and user.groups.filter(name=group_name).exists()
+        return has_role(user, group_name)
     except Exception:
         return False
 
@@ -20,8 +22,12 @@ def get_item(mapping, key):
 
 @register.filter(name='contains_group')
 def contains_group(groups_queryset, group_name: str) -> bool:
-    """Check if a queryset of groups contains a group with the given name"""
+    """Check if a queryset of groups contains a group with the given name
+
+    Iterates the queryset, so prefetched groups (``user__groups``) are
+    checked in memory instead of one query per call.
+    """
     try:
-        return groups_queryset.filter(name=group_name).exists()
+        return any(group.name == group_name for group in groups_queryset)
     except Exception:
         return False
@@ -7,11 +7,12 @@ from django.contrib.contenttypes.models import ContentType
 from django.urls import reverse
 from .forms import GroupPermissionForm, UserRoleForm
 from .models import RoleDefinition, FunctionPermission, RolePermissionMapping
+from .resolver import has_role
 
 
 class ITAdminOnlyMixin(UserPassesTestMixin):
     def test_user_passes(self, user):
-        return user.is_authenticated and user.groups.filter(name='IT Admin').exists()
+        return user.is_authenticated and has_role(user, 'IT Admin')
 
     def test_func(self):
         return self.test_user_passes(self.request.user)
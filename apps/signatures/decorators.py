@@ -1,6 +1,7 @@
 from django.contrib.auth.decorators import user_passes_test
 from django.shortcuts import redirect
 from django.contrib import messages
+from apps.roles.resolver import get_roles, has_role
 
 
 def it_admin_required(function):
@@ -11,7 +12,7 @@ def it_admin_required(function):
     def check_it_admin(user):
         if user.is_superuser:
             return True
-        return user.groups.filter(name='IT Admin').exists()
+        return has_role(user, 'IT Admin')
     
     decorated_function = user_passes_test(
         check_it_admin,
@@ -51,11 +52,11 @@ def signature_permission_required(permission_code):
                     return redirect('signatures:my_requests')
                 
                 # Get user's groups (roles)
-                user_groups = request.user.groups.all()
+                user_groups = get_roles(request.user)
                 
                 # Check if any of user's roles have this permission
                 has_permission = RolePermissionMapping.objects.filter(
-                    role__group__in=user_groups,
+                    role__group__name__in=user_groups,
                     function__code=permission_code
                 ).exists()
                 
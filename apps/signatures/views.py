@@ -6,6 +6,8 @@ from django.http import JsonResponse
 from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from datetime import timedelta
+from hr_project.pagination import KeysetPaginator
+from hr_project.querybudget import query_budget
 from .models import ElectronicSignature, SignatureStatus, SignatureAuditLog, BiometricDevice, StampArtifact
 from .forms import SignatureForm, RejectSignatureForm, StampArtifactUploadForm
 from .utils import get_client_ip, get_user_agent, encrypt_bytes, sha256_hex
@@ -157,15 +159,21 @@ def signature_detail_view(request, signature_id):
     return render(request, 'signatures/signature_detail.html', context)
 
 
+@query_budget(12)
 @login_required
 def my_signature_requests_view(request):
     """
     View for displaying all signature requests for the current user.
     """
-    pending_signatures = ElectronicSignature.objects.filter(
-        signer=request.user,
-        status=SignatureStatus.PENDING
-    ).select_related('content_type')
+    pending_signatures = KeysetPaginator(
+        ElectronicSignature.objects.filter(
+            signer=request.user,
+            status=SignatureStatus.PENDING
+        ).select_related('content_type'),
+        25,
+        ordering=('-created_at', '-pk'),
+        approximate_count=True,
+    ).page_from_request(request)
     
     completed_signatures = ElectronicSignature.objects.filter(
         signer=request.user,
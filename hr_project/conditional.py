@@ -0,0 +1,108 @@
+"""
+Conditional GET for read-mostly views
+
+The org lists, the cascade APIs and the leave types change a few times a
+year, yet every visit sent (and GZip compressed) the full body again. Their
+data is fully determined by cache generations that the signals already bump
+on every change (``org``, ``taxonomy``, see ``apps.employees.cache``), so
+those generations are the validators:
+
+* ``ETag``: a hash of the generations. HTML pages also depend on who asks
+  (navigation by role, unread notifications, the CSRF secret of their
+  forms), which goes into their ETag too;
+* ``Last-Modified``: the time of the latest bump, on the responses that are
+  the same for everyone (an ``If-Modified-Since`` alone cannot tell that a
+  notification arrived).
+
+``@conditional_get('org')`` on a view's ``get`` answers ``304 Not Modified``
+without running the view when the client's validator matches, and marks
+every response ``Cache-Control: private``. A page with flash messages to
+show is always rendered. HTML pages use ``max-age=0`` (always revalidate,
+so an edit shows up on the next visit); the JSON APIs may be reused for
+``API_MAX_AGE`` seconds without asking.
+"""
+import hashlib
+from functools import wraps
+from typing import Optional, Sequence, Tuple
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from apps.employees.cache import cache_tag, tag_modified
+from apps.roles.resolver import get_roles
+
+API_MAX_AGE = 60  # Seconds a browser reuses a cascade API response without revalidating
+
+
+def _viewer(request) -> list:
+    """What a page rendered for ``request.user`` shows besides its data"""
+    from apps.notifications.models import Notification
+    user = request.user
+    unread = Notification.objects.filter(recipient=user, is_read=False).aggregate(last=Max('id'), count=Count('id'))
+    return [
+        f'u{user.pk}{"s" if user.is_superuser else ""}',
+        ','.join(sorted(get_roles(user))),
+        f'n{unread["last"]}.{unread["count"]}',
+        request.META.get('CSRF_COOKIE') or '',
+    ]
+
+
+def _pending_messages(request) -> bool:
+    """Flash messages to display: the page must be rendered (sizing the storage does not consume it)"""
+    return bool(len(get_messages(request)))
+
+
+def version_stamp(request, families: Sequence[str], per_user: bool = True) -> Tuple[str, Optional[int]]:
+    """``(ETag, Last-Modified timestamp or None)`` of a response built from ``families``"""
+    parts = [f'{name}.{cache_tag(name)}' for name in families]
+    if per_user:
+        parts += _viewer(request)
+    digest = hashlib.blake2b('|'.join(parts).encode(), digest_size=12).hexdigest()
+    last_modified = None if per_user else max(tag_modified(name) for name in families)
+    return f'"{digest}"', last_modified
+
+
+def _finish(response, etag: str, last_modified: Optional[int], max_age: int):
+    if response.status_code in (200, 304):
+        if not response.has_header('ETag'):
+            response['ETag'] = etag
+        if last_modified is not None and not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, max_age=max_age)
+        patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def conditional_get(*families: str, max_age: int = 0, per_user: bool = True):
+    """Answer 304 for a view method whose output depends only on ``families`` (and the viewer).
+
+    ``per_user=False`` for responses that are the same for every user (the
+    JSON APIs). Works on sync and async ``get`` methods of class-based views.
+    """
+    def decorator(method):
+        if iscoroutinefunction(method):
+            @wraps(method)
+            async def async_view(self, request, *args, **kwargs):
+                if per_user and await sync_to_async(_pending_messages)(request):
+                    return await method(self, request, *args, **kwargs)
+                etag, last_modified = await sync_to_async(version_stamp)(request, families, per_user)
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is None:
+                    response = await method(self, request, *args, **kwargs)
+                return _finish(response, etag, last_modified, max_age)
+            return async_view
+
+        @wraps(method)
+        def view(self, request, *args, **kwargs):
+            if per_user and _pending_messages(request):
+                return method(self, request, *args, **kwargs)
+            etag, last_modified = version_stamp(request, families, per_user)
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+            return _finish(response, etag, last_modified, max_age)
+        return view
+    return decorator
@@ -1,5 +1,13 @@
+import random
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
 from django.conf import settings
+from django.db import connection
 from django.shortcuts import redirect
+from django.utils.functional import SimpleLazyObject
+
+from apps.roles.resolver import get_roles
+from hr_project.querybudget import budget_for, install_dispatch, logger as query_logger, recording
 
 
 EXEMPT_PATH_PREFIXES = (
@@ -14,7 +22,33 @@ EXEMPT_PATH_PREFIXES = (
 )
 
 
-class LoginRequiredMiddleware:
+class HybridMiddleware:
+    """Base for middleware that runs natively under both WSGI and ASGI.
+
+    Under ASGI (an async ``get_response``) calls go to ``__acall__``, so a
+    request to an async view never hops to a worker thread on our account.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.handle(request)
+
+    def handle(self, request):
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+
+class LoginRequiredMiddleware(HybridMiddleware):
     """Redirect anonymous users to the login page.
 
     This middleware intentionally keeps the whitelist small. If you need to
@@ -23,22 +57,108 @@ class LoginRequiredMiddleware:
     """
 
     def __init__(self, get_response):
-        self.get_response = get_response
+        super().__init__(get_response)
         extras = getattr(settings, 'LOGIN_EXEMPT_PATHS', [])
         # Normalize to prefixes
         self.exempt_prefixes = list(EXEMPT_PATH_PREFIXES) + list(extras)
 
-    def __call__(self, request):
+    def is_exempt(self, request):
         path = request.path_info
         # Allow if path starts with any exempt prefix
-        for p in self.exempt_prefixes:
-            if path.startswith(p):
-                return self.get_response(request)
+        return any(path.startswith(p) for p in self.exempt_prefixes)
+
+    def login_redirect(self, request):
+        login_url = getattr(settings, 'LOGIN_URL', '/accounts/login/')
+        # Preserve next parameter
+        return redirect(f"{login_url}?next={request.path}")
+
+    def handle(self, request):
+        if self.is_exempt(request):
+            return self.get_response(request)
 
         # If user not authenticated, redirect to login with next
         if not getattr(request, 'user', None) or not request.user.is_authenticated:
-            login_url = getattr(settings, 'LOGIN_URL', '/accounts/login/')
-            # Preserve next parameter
-            return redirect(f"{login_url}?next={request.path}")
+            return self.login_redirect(request)
+
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        if self.is_exempt(request):
+            return await self.get_response(request)
+
+        # Load the user without blocking the loop, and keep it: request.user
+        # would otherwise load it again, synchronously, on first access
+        user = await request.auser() if hasattr(request, 'auser') else None
+        if user is None or not user.is_authenticated:
+            return self.login_redirect(request)
+        request.user = user
+
+        return await self.get_response(request)
+
 
+class RolesMiddleware(HybridMiddleware):
+    """Expose the user's group names as ``request.roles`` (a ``UserRoles``).
+
+    Resolved lazily on first access, so requests that never check a role do
+    not touch the cache. Must come after AuthenticationMiddleware. Async
+    views should ``await aget_roles(user)`` instead, which fills the same
+    memo.
+    """
+
+    def handle(self, request):
+        request.roles = SimpleLazyObject(lambda: get_roles(request.user))
         return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.roles = SimpleLazyObject(lambda: get_roles(request.user))
+        return await self.get_response(request)
+
+
+class QueryAccountingMiddleware(HybridMiddleware):
+    """Count each request's queries; log budget overruns and N+1 signatures.
+
+    Only ``QUERY_SAMPLE_RATE`` of requests are recorded (all of them under
+    DEBUG, where the count is also returned in an ``X-Query-Count`` header).
+    A request is reported when it runs more queries than its view's
+    ``query_budget`` or repeats one SQL shape ``QUERY_DUPLICATE_THRESHOLD``
+    times.
+
+    Queries are counted through ``recording()``, so a sampled async request
+    stays on the event loop like any other.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.sample_rate = getattr(settings, 'QUERY_SAMPLE_RATE', 0.01)
+        self.threshold = getattr(settings, 'QUERY_DUPLICATE_THRESHOLD', 5)
+
+    def handle(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        install_dispatch(connection)  # Opened before the receiver was connected
+        with recording() as recorder:
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+        with recording() as recorder:
+            response = await self.get_response(request)
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        match = getattr(request, 'resolver_match', None)
+        budget = budget_for(match.func) if match else None
+        over_budget = budget is not None and recorder.count > budget
+        duplicates = recorder.duplicates(self.threshold)
+        if over_budget or duplicates:
+            query_logger.warning(
+                '%s %s (%s): %d queries in %.1f ms, budget %s\n%s',
+                request.method, request.path, match.view_name if match else '-',
+                recorder.count, recorder.duration * 1000, budget if budget is not None else '-',
+                recorder.summary(self.threshold),
+            )
+        if settings.DEBUG:
+            response['X-Query-Count'] = str(recorder.count)
+        return response
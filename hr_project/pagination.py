@@ -0,0 +1,304 @@
+"""
+Keyset (cursor) pagination
+
+``Paginator`` needs ``COUNT(*)`` and ``OFFSET`` on every page, both of which
+get slower the larger the filtered queryset is. ``KeysetPaginator`` instead
+seeks past the last row of the previous page using the ordering key (which
+must be indexed and non-null, and is made unique by appending ``pk``). Pages
+are addressed by opaque, signed cursor tokens instead of page numbers, and
+the total is optional: exact for in-memory sequences, capped at
+``COUNT_CAP`` for querysets when ``approximate_count`` is set.
+
+Sequences (e.g. the employee directory's pk list) are paginated positionally:
+their cursor anchors on the last item seen, so rows added at the head do not
+shift the next page.
+"""
+
+from django.core import signing
+from django.db.models import Q, QuerySet
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param, remove_query_param
+
+CURSOR_SALT = 'hr_project.pagination'
+COUNT_CAP = 1000  # Approximate counts stop here ("1000+")
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def encode_cursor(key, previous=False) -> str:
+    return signing.dumps({'k': key, 'p': int(previous)}, salt=CURSOR_SALT, compress=True)
+
+
+def decode_cursor(token: str):
+    """Return ``(key, previous)``; raises InvalidCursor on tampered or stale tokens"""
+    try:
+        data = signing.loads(token, salt=CURSOR_SALT)
+        return data['k'], bool(data['p'])
+    except (signing.BadSignature, KeyError, TypeError) as exc:
+        raise InvalidCursor(str(exc))
+
+
+def _json_value(value):
+    """Cursor-safe representation of a key value (restored with Field.to_python)"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+class KeysetPage:
+    """One page; iterate it like a Django ``Page``"""
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor,
+                 count=None, count_is_approximate=False):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+        self.count_is_approximate = count_is_approximate
+        self.next_url = None
+        self.previous_url = None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+    def set_urls(self, request, param='cursor'):
+        """Fill ``next_url``/``previous_url`` (query strings keeping the other GET parameters)"""
+        params = request.GET.copy()
+        params.pop(param, None)
+        params.pop('page', None)  # Page numbers from older links
+        for attr, cursor in (('next_url', self.next_cursor), ('previous_url', self.previous_cursor)):
+            if cursor is not None:
+                params[param] = cursor
+                setattr(self, attr, '?' + params.urlencode())
+        if self.has_previous and self.previous_cursor is None:
+            # Back to the first page
+            params.pop(param, None)
+            self.previous_url = '?' + params.urlencode() if params else '?'
+        return self
+
+
+class KeysetPaginator:
+    """Paginate a queryset (by ordering key) or a sequence (by position).
+
+    ``ordering`` defaults to the queryset's ordering (or Meta.ordering); ``pk``
+    is appended as a tie-breaker when missing. Key fields must be concrete,
+    non-null fields of the model.
+    """
+
+    def __init__(self, object_list, per_page, ordering=None, approximate_count=False):
+        self.object_list = object_list
+        self.per_page = int(per_page)
+        self.approximate_count = approximate_count
+        self.is_queryset = isinstance(object_list, QuerySet)
+        if self.is_queryset:
+            self.ordering = self._ordering(ordering)
+
+    def _ordering(self, ordering):
+        qs = self.object_list
+        ordering = list(ordering or qs.query.order_by or qs.model._meta.ordering or [])
+        names = [f.lstrip('-') for f in ordering]
+        pk_name = qs.model._meta.pk.name
+        if 'pk' not in names and pk_name not in names:
+            descending = bool(ordering) and ordering[-1].startswith('-')
+            ordering.append('-pk' if descending else 'pk')
+        return tuple(ordering)
+
+    # Querysets
+
+    def _field(self, field_name):
+        meta = self.object_list.model._meta
+        name = field_name.lstrip('-')
+        return meta.pk if name == 'pk' else meta.get_field(name)
+
+    def _key(self, obj):
+        # attname: foreign keys contribute their id, not the related object
+        return [_json_value(getattr(obj, self._field(f).attname)) for f in self.ordering]
+
+    def _to_python(self, key):
+        return [self._field(f).to_python(value) for f, value in zip(self.ordering, key)]
+
+    def _seek(self, key, previous):
+        """Rows strictly after ``key`` in ordering (before it when ``previous``)"""
+        values = self._to_python(key)
+        condition = Q()
+        for i, field_name in enumerate(self.ordering):
+            name = field_name.lstrip('-')
+            descending = field_name.startswith('-')
+            lookup = 'lt' if descending != previous else 'gt'
+            term = Q(**{f'{name}__{lookup}': values[i]})
+            for prior_name, prior_value in zip(self.ordering[:i], values[:i]):
+                term &= Q(**{prior_name.lstrip('-'): prior_value})
+            condition |= term
+        return condition
+
+    def _page_queryset(self, cursor):
+        """``(queryset of per_page + 1 rows, key, previous)`` for ``cursor``"""
+        key, previous = (None, False)
+        if cursor:
+            key, previous = decode_cursor(cursor)
+        ordering = self.ordering
+        if previous:
+            ordering = tuple(f[1:] if f.startswith('-') else f'-{f}' for f in ordering)
+        page_qs = self.object_list.order_by(*ordering)
+        if key is not None:
+            page_qs = page_qs.filter(self._seek(key, previous))
+        return page_qs[:self.per_page + 1], key, previous
+
+    def _count_queryset(self):
+        return self.object_list.order_by()[:COUNT_CAP + 1]
+
+    def _queryset_page(self, cursor):
+        page_qs, key, previous = self._page_queryset(cursor)
+        rows = list(page_qs)
+        count = self._count_queryset().count() if self.approximate_count else None
+        return self._keyset_page(rows, key, previous, count)
+
+    async def _aqueryset_page(self, cursor):
+        page_qs, key, previous = self._page_queryset(cursor)
+        rows = [row async for row in page_qs]
+        count = await self._count_queryset().acount() if self.approximate_count else None
+        return self._keyset_page(rows, key, previous, count)
+
+    def _keyset_page(self, rows, key, previous, count):
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if previous:
+            rows.reverse()
+            has_previous, has_next = more, True
+        else:
+            has_previous, has_next = key is not None, more
+
+        next_cursor = encode_cursor(self._key(rows[-1])) if has_next and rows else None
+        previous_cursor = encode_cursor(self._key(rows[0]), previous=True) if has_previous and rows else None
+
+        approximate = False
+        if count is not None:
+            approximate = count > COUNT_CAP
+            count = min(count, COUNT_CAP)
+        return KeysetPage(rows, has_next, has_previous, next_cursor, previous_cursor, count, approximate)
+
+    # Sequences
+
+    def _sequence_page(self, cursor):
+        items = self.object_list
+        start = 0
+        if cursor:
+            anchor, previous = decode_cursor(cursor)
+            try:
+                index = items.index(anchor)
+            except ValueError:
+                index = None  # Anchor gone: start over
+            if index is not None:
+                start = max(0, index - self.per_page) if previous else index + 1
+        rows = list(items[start:start + self.per_page])
+        has_previous = start > 0
+        has_next = start + self.per_page < len(items)
+        next_cursor = encode_cursor(rows[-1]) if has_next and rows else None
+        # Previous pages anchor on their successor; the first page needs no cursor
+        previous_cursor = encode_cursor(rows[0], previous=True) if start > self.per_page and rows else None
+        return KeysetPage(rows, has_next, has_previous, next_cursor, previous_cursor, len(items))
+
+    def page(self, cursor=None) -> KeysetPage:
+        """Return the page for ``cursor`` (the first page for None or an invalid token)"""
+        try:
+            if self.is_queryset:
+                return self._queryset_page(cursor)
+            return self._sequence_page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    async def apage(self, cursor=None) -> KeysetPage:
+        """Async ``page`` (querysets are read with the async ORM API)"""
+        try:
+            if self.is_queryset:
+                return await self._aqueryset_page(cursor)
+            return self._sequence_page(cursor)
+        except InvalidCursor:
+            return await self.apage(None)
+
+    def page_from_request(self, request, param='cursor') -> KeysetPage:
+        return self.page(request.GET.get(param)).set_urls(request, param)
+
+    async def apage_from_request(self, request, param='cursor') -> KeysetPage:
+        return (await self.apage(request.GET.get(param))).set_urls(request, param)
+
+
+def page_size_from_request(request, default=10, allowed=(5, 10, 25, 50, 100)):
+    try:
+        size = int(request.GET.get('page_size', default))
+    except (ValueError, TypeError):
+        return default
+    return size if size in allowed else default
+
+
+class KeysetPagination(BasePagination):
+    """DRF pagination class built on KeysetPaginator (``?cursor=...&page_size=...``).
+
+    Views may set ``ordering`` to choose the key; otherwise the queryset's
+    ordering is used.
+    """
+    page_size = api_settings.PAGE_SIZE or 100
+    max_page_size = 500
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        # An ?ordering= applied by OrderingFilter wins over the view default
+        ordering = None if queryset.query.order_by else getattr(view, 'ordering', None)
+        paginator = KeysetPaginator(
+            queryset, self.get_page_size(request), ordering=ordering, approximate_count=True,
+        )
+        self.page = paginator.page(request.query_params.get(self.cursor_query_param))
+        return list(self.page)
+
+    def _url(self, cursor, has_page):
+        if not has_page:
+            return None
+        url = self.request.build_absolute_uri()
+        if cursor is None:
+            return remove_query_param(url, self.cursor_query_param)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'count': self.page.count,
+            'count_is_approximate': self.page.count_is_approximate,
+            'next': self._url(self.page.next_cursor, self.page.has_next),
+            'previous': self._url(self.page.previous_cursor, self.page.has_previous),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'count': {'type': 'integer', 'nullable': True},
+                'count_is_approximate': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
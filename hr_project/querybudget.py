@@ -0,0 +1,116 @@
+"""
+Per-request query accounting
+
+``QueryRecorder`` is a ``connection.execute_wrapper`` that counts the queries
+a request runs and groups them by SQL shape (the statement with its
+placeholders, ``IN`` lists collapsed). A shape repeated ``N`` times in one
+request is the signature of an N+1: a related object or property resolved
+once per row.
+
+Views declare how many queries they may run with ``@query_budget(n)`` (or a
+``query_budget`` class attribute). The budget does not depend on the number
+of rows rendered: ``QueryAccountingMiddleware`` logs requests over budget and
+repeated shapes on a sampled fraction of production traffic, and
+``hr_project.testing`` fails a test when a view exceeds it at 10 and at 1,000
+rows.
+
+The middleware does not wrap the connection around a request: a recorder is
+made current with ``recording()`` (a context variable, which ``sync_to_async``
+carries into the threads running the async ORM's queries) and
+``dispatch_query``, installed once on every connection, hands it each query.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Tuple
+
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger('hr_project.queries')
+
+_IN_LIST = re.compile(r'\bIN \((?:%s, )*%s\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def query_budget(limit: int):
+    """Declare the maximum number of queries a view may run per request.
+
+    Works on function views and on class-based views (same as setting a
+    ``query_budget`` class attribute).
+    """
+    def decorator(view):
+        view.query_budget = limit
+        return view
+    return decorator
+
+
+def budget_for(view_func) -> Optional[int]:
+    """Budget declared on a resolved view (``as_view()`` exposes its class)"""
+    budget = getattr(view_func, 'query_budget', None)
+    if budget is None:
+        budget = getattr(getattr(view_func, 'view_class', None), 'query_budget', None)
+    return budget
+
+
+def sql_shape(sql: str) -> str:
+    """Statement without its values: ``IN (%s, %s, %s)`` becomes ``IN (...)``"""
+    return _IN_LIST.sub('IN (...)', _WHITESPACE.sub(' ', sql.strip()))
+
+
+class QueryRecorder:
+    """Execute wrapper counting queries, their time and their shapes"""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[sql_shape(sql)] += 1
+
+    def duplicates(self, threshold: int) -> List[Tuple[str, int]]:
+        """Shapes run at least ``threshold`` times, most repeated first"""
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def summary(self, threshold: int, limit: int = 5) -> str:
+        lines = [f'{n}x {shape[:300]}' for shape, n in self.duplicates(threshold)[:limit]]
+        return '\n'.join(lines)
+
+
+_current_recorder: ContextVar[Optional[QueryRecorder]] = ContextVar('query_recorder', default=None)
+
+
+def dispatch_query(execute, sql, params, many, context):
+    """Execute wrapper passing queries to the current recorder, if any"""
+    recorder = _current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_dispatch(connection, **kwargs):
+    if dispatch_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(dispatch_query)
+
+
+connection_created.connect(install_dispatch, dispatch_uid='hr_project.querybudget.install_dispatch')
+
+
+@contextmanager
+def recording() -> Iterator[QueryRecorder]:
+    """Count the queries run in this context (and the ``sync_to_async`` calls it makes)"""
+    recorder = QueryRecorder()
+    token = _current_recorder.set(recorder)
+    try:
+        yield recorder
+    finally:
+        _current_recorder.reset(token)
@@ -33,10 +33,14 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.middleware.gzip.GZipMiddleware',  # Enable GZip compression (Quick Win #3)
+    # Per-request query counts, budget overruns and N+1 logging (sampled)
+    'hr_project.middleware.QueryAccountingMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Per-request group names (request.roles)
+    'hr_project.middleware.RolesMiddleware',
     # Redirect anonymous users to login for protected pages
     'hr_project.middleware.LoginRequiredMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -113,6 +117,17 @@ CACHES = {
     }
 }
 
+# In-process LRU tier in front of Redis for org/taxonomy data (per worker)
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv('LOCAL_CACHE_MAX_ENTRIES', '512'))
+LOCAL_CACHE_TTL = int(os.getenv('LOCAL_CACHE_TTL', '60'))  # Upper bound on staleness if a pub/sub message is missed
+
+# Serve /employees/ from the native async ORM list view (for ASGI/uvicorn deployments)
+EMPLOYEE_LIST_ASYNC = os.getenv('EMPLOYEE_LIST_ASYNC', 'False') == 'True'
+
+# Query accounting (hr_project.middleware.QueryAccountingMiddleware)
+QUERY_SAMPLE_RATE = float(os.getenv('QUERY_SAMPLE_RATE', '1.0' if DEBUG else '0.01'))  # Fraction of requests recorded
+QUERY_DUPLICATE_THRESHOLD = int(os.getenv('QUERY_DUPLICATE_THRESHOLD', '5'))  # Repeats of one SQL shape logged as N+1
+
 # Session Storage: Use Redis for better performance (Quick Win #4)
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
 SESSION_CACHE_ALIAS = 'default'
@@ -168,7 +183,7 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'hr_project.pagination.KeysetPagination',
     'PAGE_SIZE': 100,
     'DEFAULT_FILTER_BACKENDS': [
         'rest_framework.filters.SearchFilter',
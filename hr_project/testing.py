@@ -0,0 +1,125 @@
+"""
+Query budget assertions for tests
+
+    class EmployeeViewsTests(QueryBudgetTestMixin, TestCase):
+        def test_list_budget(self):
+            self.client.force_login(self.admin)
+            self.assertWithinQueryBudget(reverse('employees:list') + '?page_size=100', make_employees)
+
+``make_rows(n)`` brings the data behind the view up to ``n`` rows; the view
+is then requested once per size in ``QUERY_BUDGET_SIZES`` and must stay
+within the budget declared on it (``@query_budget``) every time. A view whose
+count grows with the data fails at the larger size even when the budget is
+generous at 10 rows.
+"""
+import datetime
+from typing import Callable, Dict, Optional, Sequence
+
+from django.db import connection
+from django.test import Client
+from django.urls import resolve
+
+from hr_project.querybudget import QueryRecorder, budget_for
+
+QUERY_BUDGET_SIZES = (10, 1000)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def count_queries(client: Client, url: str) -> QueryRecorder:
+    recorder = QueryRecorder()
+    with connection.execute_wrapper(recorder):
+        response = client.get(url)
+    if response.status_code != 200:
+        raise AssertionError(f'GET {url} returned {response.status_code}')
+    return recorder
+
+
+def check_query_budget(client: Client, url: str, make_rows: Callable[[int], None],
+                       budget: Optional[int] = None,
+                       sizes: Sequence[int] = QUERY_BUDGET_SIZES) -> Dict[int, int]:
+    """Query count of ``url`` at each size; raises QueryBudgetExceeded.
+
+    ``budget`` defaults to the one declared on the view ``url`` resolves to.
+    """
+    if budget is None:
+        budget = budget_for(resolve(url.split('?')[0]).func)
+        if budget is None:
+            raise ValueError(f'No query_budget declared for the view behind {url}')
+
+    counts = {}
+    for size in sizes:
+        make_rows(size)
+        recorder = count_queries(client, url)
+        counts[size] = recorder.count
+        if recorder.count > budget:
+            raise QueryBudgetExceeded(
+                f'GET {url} ran {recorder.count} queries at {size} rows (budget {budget})\n'
+                f'{recorder.summary(threshold=2)}'
+            )
+    return counts
+
+
+def make_employees(count: int, prefix: str = 'QB'):
+    """Create generated employees until ``count`` of them exist (org/taxonomy must be seeded)"""
+    from apps.employees.cache import invalidate_employee_cache
+    from apps.employees.models import Direction, Employee, Grade, Position
+    from apps.employees.search import reindex_employees
+
+    existing = Employee.objects.filter(cin__startswith=prefix).count()
+    if existing >= count:
+        return
+    direction = Direction.objects.values_list('id', flat=True).first()
+    grade = Grade.objects.values_list('id', flat=True).first()
+    position = Position.objects.values_list('id', flat=True).first()
+    Employee.objects.bulk_create([
+        Employee(
+            first_name='Query', last_name=f'Budget {i}', cin=f'{prefix}{i}',
+            email=f'{prefix.lower()}{i}@example.com', employee_id=f'{prefix}{i}', ppr=f'P{prefix}{i}',
+            date_of_birth=datetime.date(1985, 1, 1), hire_date=datetime.date(2012, 1, 1),
+            direction_id=direction, grade_id=grade, position_id=position,
+        ) for i in range(existing, count)
+    ], batch_size=1000)
+    # bulk_create skips the signals that maintain the directory and search index
+    invalidate_employee_cache()
+    reindex_employees(Employee.objects.filter(cin__startswith=prefix))
+
+
+def make_history(employee) -> Callable[[int], None]:
+    """``make_rows`` giving ``employee`` ``count`` history entries and leave requests (detail page)"""
+    def make_rows(count: int):
+        from apps.employees.models import EmploymentHistory
+        from apps.leaves.models import LeaveRequest, LeaveType
+
+        missing = count - employee.history.count()
+        EmploymentHistory.objects.bulk_create([
+            EmploymentHistory(
+                employee=employee, change_type='grade' if i % 2 else 'other',
+                changes={'echelon': {'from': 1, 'to': 2}}, effective_date=datetime.date(2000, 1, 1),
+                note='Query budget',
+            ) for i in range(max(0, missing))
+        ], batch_size=1000)
+        leave_type = LeaveType.objects.first()
+        missing = count - employee.leave_requests.count()
+        if leave_type and missing > 0:
+            LeaveRequest.objects.bulk_create([
+                LeaveRequest(
+                    employee=employee, leave_type=leave_type, start_date=datetime.date(2000, 1, 3),
+                    end_date=datetime.date(2000, 1, 4), days=2, status='approved',
+                ) for _ in range(missing)
+            ], batch_size=1000)
+    return make_rows
+
+
+class QueryBudgetTestMixin:
+    """``TestCase`` mixin failing (not erroring) on budget overruns"""
+
+    query_budget_sizes = QUERY_BUDGET_SIZES
+
+    def assertWithinQueryBudget(self, url, make_rows, budget=None, sizes=None):
+        try:
+            return check_query_budget(self.client, url, make_rows, budget, sizes or self.query_budget_sizes)
+        except QueryBudgetExceeded as exc:
+            self.fail(str(exc))
@@ -4,6 +4,9 @@ Load Testing Script - Simulates heavy concurrent traffic
 Tests the app under stress to verify no stuttering
 """
 import asyncio
+import os
+import re
+import sys
 import aiohttp
 import time
 from statistics import mean, median
@@ -22,6 +25,15 @@ API_ENDPOINTS = [
     "/employees/api/get-services/?division_id=1",
 ]
 
+# Employee list implementations compared by `python test_load.py list-views`
+LIST_VIEWS = [
+    ("sync", "/employees/list/sync/?page_size=25"),
+    ("async (sync_to_async)", "/employees/list/async-wrapped/?page_size=25"),
+    ("async ORM", "/employees/list/async/?page_size=25"),
+]
+CONCURRENCY_LEVELS = [50, 200, 500]
+REQUESTS_PER_USER = 5
+
 
 async def fetch(session, url):
     """Fetch a single URL and measure time"""
@@ -107,6 +119,67 @@ async def load_test_endpoint(url, concurrent_requests=50, total_requests=200):
             print(f"      ❌ SLOW: Over 500ms average response")
 
 
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def login(session):
+    """Session login with LOAD_TEST_USERNAME / LOAD_TEST_PASSWORD (list pages need a user)"""
+    login_url = BASE_URL + "/accounts/login/"
+    async with session.get(login_url) as response:
+        html = await response.text()
+    token = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', html)
+    data = {
+        "username": os.getenv("LOAD_TEST_USERNAME", "admin"),
+        "password": os.getenv("LOAD_TEST_PASSWORD", "admin"),
+        "csrfmiddlewaretoken": token.group(1) if token else "",
+    }
+    async with session.post(login_url, data=data, headers={"Referer": login_url}) as response:
+        await response.text()
+        return "/accounts/login/" not in str(response.url)
+
+
+async def measure_concurrency(session, url, users, requests_per_user):
+    """``users`` concurrent clients each issuing ``requests_per_user`` sequential requests"""
+    async def user():
+        return [await fetch(session, url) for _ in range(requests_per_user)]
+
+    start = time.time()
+    results = [r for batch in await asyncio.gather(*(user() for _ in range(users))) for r in batch]
+    elapsed = time.time() - start
+    durations = [r['duration'] for r in results if r['success']]
+    return {
+        'ok': len(durations),
+        'total': len(results),
+        'rps': len(results) / elapsed,
+        'p50': percentile(durations, 50) if durations else 0,
+        'p99': percentile(durations, 99) if durations else 0,
+    }
+
+
+async def run_list_view_comparison():
+    """Throughput and p99 of the three employee list implementations at rising concurrency"""
+    print("=" * 80)
+    print("EMPLOYEE LIST - sync vs sync_to_async vs native async ORM")
+    print("=" * 80)
+    connector = aiohttp.TCPConnector(limit=0)  # Do not cap concurrency client-side
+    async with aiohttp.ClientSession(connector=connector) as session:
+        if not await login(session):
+            print("❌ Login failed: set LOAD_TEST_USERNAME / LOAD_TEST_PASSWORD")
+            return
+        for name, path in LIST_VIEWS:
+            await fetch(session, BASE_URL + path)  # Warm caches
+        print(f"{'View':<24}{'Users':>7}{'OK':>12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+        print("-" * 80)
+        for users in CONCURRENCY_LEVELS:
+            for name, path in LIST_VIEWS:
+                stats = await measure_concurrency(session, BASE_URL + path, users, REQUESTS_PER_USER)
+                print(f"{name:<24}{users:>7}{stats['ok']:>7}/{stats['total']:<4}"
+                      f"{stats['rps']:>10.1f}{stats['p50']:>10.1f}{stats['p99']:>10.1f}")
+            print()
+
+
 async def run_load_tests():
     """Run all load tests"""
     print("=" * 80)
@@ -153,6 +226,9 @@ if __name__ == '__main__':
     print()
     
     try:
-        asyncio.run(run_load_tests())
+        if len(sys.argv) > 1 and sys.argv[1] == 'list-views':
+            asyncio.run(run_list_view_comparison())
+        else:
+            asyncio.run(run_load_tests())
     except KeyboardInterrupt:
         print("\n\n❌ Load testing cancelled by user")
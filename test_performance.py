@@ -16,7 +16,10 @@ django.setup()
 
 from django.core.cache import cache
 from apps.employees.models import Employee, Direction, Division, Service
-from apps.employees.cache import get_cached_queryset, CacheKeys, CacheTTL
+from apps.employees.cache import (
+    get_cached_queryset, get_cached_value, ensure_invalidation_listener,
+    local_cache, CacheKeys, CacheTTL,
+)
 
 
 def clear_cache():
@@ -76,14 +79,649 @@ def test_divisions_by_direction_without_cache(direction_id=1):
 
 def test_divisions_by_direction_with_cache(direction_id=1):
     """Query divisions by direction with cache"""
-    cache_key = CacheKeys.DIVISIONS_BY_DIRECTION.format(id=direction_id)
-    divisions = cache.get(cache_key)
-    if divisions is None:
-        divisions = list(Division.objects.filter(
+    return get_cached_value(
+        CacheKeys.DIVISIONS_BY_DIRECTION.format(id=direction_id),
+        lambda: list(Division.objects.filter(
             direction_id=direction_id, is_active=True
-        ).values('id', 'name'))
-        cache.set(cache_key, divisions, CacheTTL.LONG)
-    return divisions
+        ).values('id', 'name')),
+        CacheTTL.LONG
+    )
+
+
+def run_local_tier_benchmark(iterations=1000):
+    """Compare cache-hit latency with and without the in-process tier"""
+    print("🔍 Two-tier cache: in-process LRU vs Redis-only hits")
+    print("-" * 80)
+
+    # Wait for the invalidation listener, otherwise the local tier is bypassed
+    for _ in range(50):
+        if ensure_invalidation_listener():
+            break
+        time.sleep(0.1)
+    else:
+        print("   ⚠ Invalidation listener not ready (is Redis reachable?)")
+        return
+
+    cache_key = CacheKeys.DIRECTIONS_ALL
+    load = lambda: list(Direction.objects.filter(is_active=True).order_by('name'))
+
+    clear_cache()
+    local_cache.clear()
+    get_cached_value(cache_key, load, CacheTTL.LONG)  # warm both tiers
+
+    redis_only = measure_query_time(
+        lambda: get_cached_value(cache_key, load, CacheTTL.LONG, local=False),
+        iterations=iterations
+    )
+    two_tier = measure_query_time(
+        lambda: get_cached_value(cache_key, load, CacheTTL.LONG),
+        iterations=iterations
+    )
+
+    print(f"Redis only ({iterations} hits):")
+    print(f"   Average: {redis_only['avg'] * 1000:.1f} µs")
+    print(f"   Median:  {redis_only['median'] * 1000:.1f} µs")
+    print(f"In-process tier ({iterations} hits):")
+    print(f"   Average: {two_tier['avg'] * 1000:.1f} µs")
+    print(f"   Median:  {two_tier['median'] * 1000:.1f} µs")
+    print(f"⚡ Speedup: {redis_only['avg'] / two_tier['avg']:.1f}x faster per hit")
+    print()
+
+
+def run_directory_benchmark(iterations=50, page_size=25):
+    """Employee list page: pickled model list + re-query vs columnar snapshot"""
+    from django.core.paginator import Paginator
+    from apps.employees.directory import get_directory, load_employees
+
+    print("🔍 Employee directory: pickled instances vs columnar snapshot")
+    print("-" * 80)
+
+    def pickled_list_page():
+        employees = test_employee_list_with_cache()
+        qs = Employee.objects.filter(pk__in=[e.pk for e in employees]).filter(status='active')
+        return list(Paginator(qs, page_size).get_page(1))
+
+    def snapshot_page():
+        pks = get_directory().select({'status': 'active'})
+        return load_employees(Paginator(pks, page_size).get_page(1).object_list)
+
+    clear_cache()
+    pickled_list_page()
+    snapshot_page()  # warm both
+    old = measure_query_time(pickled_list_page, iterations=iterations)
+    new = measure_query_time(snapshot_page, iterations=iterations)
+    print(f"Pickled list + pk__in re-query: {old['avg']:.2f} ms avg, {old['median']:.2f} ms median")
+    print(f"Columnar snapshot + page load:  {new['avg']:.2f} ms avg, {new['median']:.2f} ms median")
+    print(f"⚡ Speedup: {old['avg'] / new['avg']:.1f}x")
+    print()
+
+
+def run_async_cache_benchmark(concurrency=500):
+    """Concurrent cascade-dropdown lookups: sync_to_async wrappers vs native asyncio Redis"""
+    import asyncio
+    from asgiref.sync import sync_to_async
+    from apps.employees.cache import tagged_key, unwrap_entry
+    from apps.employees.async_cache import get_cached_value_async
+
+    print(f"🔍 Async cache: {concurrency} parallel cascade-dropdown requests")
+    print("-" * 80)
+
+    directions = list(Direction.objects.values_list('id', flat=True)[:10]) or [1]
+    fetch = lambda: []  # Keys are warmed below; only the hit path is measured
+
+    async def old_request(direction_id):
+        # Previous implementation: every cache call hops onto the shared sync thread
+        key = await sync_to_async(tagged_key, thread_sensitive=True)(
+            CacheKeys.DIVISIONS_BY_DIRECTION.format(id=direction_id))
+        raw = await sync_to_async(cache.get, thread_sensitive=True)(key)
+        return unwrap_entry(raw)[0]
+
+    async def new_request(direction_id):
+        # local=False so both paths actually go to Redis
+        return await get_cached_value_async(
+            CacheKeys.DIVISIONS_BY_DIRECTION.format(id=direction_id), fetch, CacheTTL.LONG, local=False)
+
+    async def run(request):
+        started = time.perf_counter()
+        await asyncio.gather(*(request(directions[i % len(directions)]) for i in range(concurrency)))
+        return (time.perf_counter() - started) * 1000
+
+    clear_cache()
+    for direction_id in directions:
+        test_divisions_by_direction_with_cache(direction_id)
+
+    async def main():
+        await run(new_request)  # open the pool
+        return await run(old_request), await run(new_request)
+
+    old, new = asyncio.run(main())
+    print(f"sync_to_async(cache.get):  {old:.1f} ms total, {concurrency / old * 1000:.0f} req/s")
+    print(f"redis.asyncio client:      {new:.1f} ms total, {concurrency / new * 1000:.0f} req/s")
+    print(f"⚡ Speedup: {old / new:.1f}x")
+    print()
+
+
+def run_search_benchmark(target=50000, iterations=5):
+    """Employee search: 12-column icontains vs the full-text index, at ``target`` employees.
+
+    Missing employees are generated inside a transaction that is rolled back.
+    """
+    import datetime
+    import random
+    from django.db import transaction
+    from django.db.models import Q
+    from apps.employees.models import Grade, Position
+    from apps.employees.search import reindex_employees, search_employee_pks
+
+    print(f"🔍 Employee search at {target} employees: icontains vs full-text index")
+    print("-" * 80)
+
+    def icontains_search(query):
+        q = Q()
+        for term in query.split():
+            q &= (
+                Q(first_name__icontains=term) | Q(last_name__icontains=term) |
+                Q(email__icontains=term) | Q(employee_id__icontains=term) |
+                Q(ppr__icontains=term) | Q(cin__icontains=term) | Q(phone__icontains=term) |
+                Q(position__name__icontains=term) | Q(grade__name__icontains=term) |
+                Q(direction__name__icontains=term) | Q(division__name__icontains=term) |
+                Q(service__name__icontains=term)
+            )
+        return list(Employee.objects.filter(q).values_list('pk', flat=True))
+
+    first_names = ['Amine', 'Sara', 'Youssef', 'Khadija', 'Omar', 'Salma', 'Hamza', 'Imane', 'Mehdi', 'Nadia']
+    last_names = ['Alaoui', 'Bennani', 'Chraibi', 'Idrissi', 'Tazi', 'Fassi', 'Berrada', 'Lahlou', 'Sqalli', 'Kettani']
+
+    with transaction.atomic():
+        missing = target - Employee.objects.count()
+        if missing > 0:
+            directions = list(Direction.objects.values_list('id', flat=True))
+            grades = list(Grade.objects.values_list('id', flat=True))
+            positions = list(Position.objects.values_list('id', flat=True))
+            if not (directions and grades and positions):
+                print("   ⚠ Seed org/taxonomy data first (manage.py seed_all)")
+                return
+            print(f"   Generating {missing} employees (rolled back afterwards)...")
+            Employee.objects.bulk_create([
+                Employee(
+                    first_name=random.choice(first_names), last_name=random.choice(last_names),
+                    cin=f'BENCH{i}', email=f'bench{i}@example.com', employee_id=f'B{i}', ppr=f'PB{i}',
+                    phone=f'06{i:08d}', date_of_birth=datetime.date(1980, 1, 1),
+                    hire_date=datetime.date(2010, 1, 1), direction_id=random.choice(directions),
+                    grade_id=random.choice(grades), position_id=random.choice(positions),
+                ) for i in range(missing)
+            ], batch_size=2000)
+            reindex_employees(Employee.objects.filter(cin__startswith='BENCH'))
+
+        sample = Employee.objects.order_by('-pk').first()
+        queries = ['sara', 'alaoui youssef', 'ing', sample.employee_id, 'tazi direction']
+        for query in queries:
+            old = measure_query_time(lambda: icontains_search(query), iterations=iterations)
+            new = measure_query_time(lambda: search_employee_pks(query), iterations=iterations)
+            print(f"   {query!r:<18} icontains {old['avg']:8.2f} ms  "
+                  f"full-text {new['avg']:8.2f} ms  ({old['avg'] / new['avg']:.1f}x)")
+        transaction.set_rollback(True)
+    print()
+
+
+def run_listing_benchmark(page_size=100, iterations=20):
+    """One list page: full instances with seven joins vs ``for_listing()`` rows (latency and memory)"""
+    import tracemalloc
+
+    total = Employee.objects.count()
+    print(f"📋 Employee list page of {page_size} rows over {total} employees: full rows vs for_listing()")
+    print("-" * 80)
+    if total < page_size:
+        print("   ⚠ Not enough employees (see the 'search' benchmark to generate some)")
+        return
+
+    def full_page(offset):
+        page = list(Employee.objects.select_related(
+            'direction', 'division', 'service', 'departement', 'filiere', 'grade', 'position', 'user'
+        ).prefetch_related('user__groups')[offset:offset + page_size])
+        return [(e.full_name, e.organizational_path, str(e.position), e.get_status_display()) for e in page]
+
+    def listing_page(offset):
+        page = list(Employee.objects.for_listing()[offset:offset + page_size])
+        return [(e.full_name, e.organizational_path, str(e.position), e.get_status_display()) for e in page]
+
+    def peak_memory(func):
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return peak
+
+    for label, offset in (('first page', 0), ('middle page', total // 2)):
+        old = measure_query_time(lambda: full_page(offset), iterations=iterations)
+        new = measure_query_time(lambda: listing_page(offset), iterations=iterations)
+        old_mem, new_mem = peak_memory(lambda: full_page(offset)), peak_memory(lambda: listing_page(offset))
+        print(f"   {label:<12} full {old['avg']:7.2f} ms {old_mem / 1024:7.0f} KiB   "
+              f"for_listing {new['avg']:7.2f} ms {new_mem / 1024:7.0f} KiB   "
+              f"({old['avg'] / new['avg']:.1f}x faster, {old_mem / new_mem:.1f}x less memory)")
+    print()
+
+
+def run_query_budget_check(username='rh'):
+    """Query counts of budgeted views at 10 and 1,000 rows (rows rolled back afterwards)"""
+    from django.contrib.auth.models import User
+    from django.db import transaction
+    from django.test import Client
+    from apps.employees.cache import invalidate_employee_cache
+    from apps.notifications.models import Notification
+    from hr_project.testing import (
+        QUERY_BUDGET_SIZES, QueryBudgetExceeded, check_query_budget, make_employees, make_history,
+    )
+
+    print(f"🧮 Query budgets at {' and '.join(map(str, QUERY_BUDGET_SIZES))} rows (as {username})")
+    print("-" * 80)
+    user = User.objects.filter(username=username).first()
+    if user is None:
+        print(f"   ⚠ No user {username!r}")
+        return
+    client = Client()
+    client.force_login(user)
+
+    def make_notifications(count):
+        missing = count - Notification.objects.filter(recipient=user).count()
+        Notification.objects.bulk_create([
+            Notification(recipient=user, title=f'Budget check {i}') for i in range(max(0, missing))
+        ])
+
+    employee = Employee.objects.order_by('pk').first()
+    checks = [
+        ('/employees/?page_size=100', make_employees),
+        (f'/employees/{employee.pk}/', make_history(employee)),
+        ('/notifications/', make_notifications),
+        ('/leaves/all/', lambda count: None),
+        ('/signatures/my-requests/', lambda count: None),
+    ]
+    with transaction.atomic():
+        for url, make_rows in checks:
+            try:
+                counts = check_query_budget(client, url, make_rows)
+                print(f"   ✓ {url:<28} " + '  '.join(f'{n} rows: {q} queries' for n, q in counts.items()))
+            except QueryBudgetExceeded as exc:
+                print(f"   ✗ {exc}")
+        transaction.set_rollback(True)
+    invalidate_employee_cache()
+    print()
+
+
+def run_import_benchmark(rows=300):
+    """Creating ``rows`` employees with users: one save() per row vs the bulk importer (rolled back)"""
+    import datetime
+    import io
+    from django.contrib.auth.models import Group, User
+    from django.db import transaction
+    from apps.employees.cache import invalidate_employee_cache
+    from apps.employees.importer import EmployeeImporter
+    from apps.employees.models import Grade, Position
+
+    print(f"📥 Importing {rows} employees with user accounts: per-row save() vs importer")
+    print("-" * 80)
+    direction, grade, position = Direction.objects.first(), Grade.objects.first(), Position.objects.first()
+    if not (direction and grade and position):
+        print("   ⚠ Seed directions, grades and positions first")
+        return
+
+    def per_row():
+        group = Group.objects.filter(name='Normal User').first()
+        for i in range(rows):
+            employee = Employee(
+                first_name='Bench', last_name=f'Import {i}', cin=f'BI{i}', email=f'bi{i}@example.com',
+                date_of_birth=datetime.date(1990, 1, 1), hire_date=datetime.date(2025, 1, 1),
+                direction=direction, grade=grade, position=position,
+            )
+            employee.save()
+            # EmployeeCreateView's account provisioning
+            base = username = ''.join(employee.full_name.split()).lower()
+            n = 1
+            while User.objects.filter(username=username).exists():
+                username, n = f'{base}{n}', n + 1
+            user = User.objects.create_user(username=username, email=employee.email, password='rabat2025')
+            if group:
+                user.groups.add(group)
+            employee.user = user
+            employee.save(update_fields=['user'])
+
+    def bulk():
+        lines = ['first_name,last_name,cin,email,date_of_birth,direction,position,grade,hire_date']
+        lines += [
+            f'Bench,Import {i},BI{i},bi{i}@example.com,1990-01-01,{direction.code},{position.code},{grade.code},2025-01-01'
+            for i in range(rows)
+        ]
+        EmployeeImporter().run(io.BytesIO('\n'.join(lines).encode()), 'bench.csv')
+
+    for label, func in (('per-row save()', per_row), ('importer', bulk)):
+        with transaction.atomic():
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        print(f"   {label:<16} {elapsed * 1000:9.0f} ms  ({elapsed * 1000 / rows:.2f} ms/employee)")
+    invalidate_employee_cache()
+    print()
+
+
+def run_export_benchmark():
+    """Full employee export: time to first chunk, total time and peak memory per format"""
+    import tempfile
+    import tracemalloc
+    from apps.employees.exports import employee_dataset
+    from hr_project.exports import EXPORT_FORMATS, buffered, iter_csv, iter_jsonl, write_xlsx
+
+    def export(fmt):
+        """``(seconds to first chunk, bytes)``"""
+        dataset = employee_dataset()
+        start = time.perf_counter()
+        if fmt == 'xlsx':
+            # Zip archive: nothing can be sent before the workbook is complete
+            with tempfile.TemporaryFile() as tmp:
+                write_xlsx(tmp, dataset.header, dataset.rows())
+                return time.perf_counter() - start, tmp.tell()
+        writer = iter_csv if fmt == 'csv' else iter_jsonl
+        chunks = buffered(writer(dataset.header, dataset.rows()))
+        size = len(next(chunks, '').encode())
+        first = time.perf_counter() - start
+        return first, size + sum(len(chunk.encode()) for chunk in chunks)
+
+    total = Employee.objects.count()
+    print(f"📤 Streaming export of {total} employees")
+    print("-" * 80)
+    for fmt in EXPORT_FORMATS:
+        start = time.perf_counter()
+        first, size = export(fmt)
+        elapsed = time.perf_counter() - start
+        peak = ''
+        if fmt != 'xlsx':  # Tracing openpyxl takes minutes
+            tracemalloc.start()
+            export(fmt)
+            peak = f"peak {tracemalloc.get_traced_memory()[1] / 2**20:5.1f} MiB"
+            tracemalloc.stop()
+        print(f"   {fmt:<6} first chunk {first * 1000:8.1f} ms   total {elapsed:6.2f} s   "
+              f"{size / 2**20:6.1f} MiB out   {peak}")
+    print()
+
+
+def run_employee_id_concurrency(threads=8, per_thread=25, block=10):
+    """Parallel matricule claims and employee creates must never hand out an id twice (advances the sequence)"""
+    import datetime
+    from concurrent.futures import ThreadPoolExecutor
+    from django.db import connection
+    from apps.employees.models import Grade, Position
+    from apps.employees.sequences import allocate_employee_ids, next_employee_id
+
+    print(f"🔢 employee_id allocation: {threads} threads in parallel")
+    print("-" * 80)
+    direction, grade, position = Direction.objects.first(), Grade.objects.first(), Position.objects.first()
+    if not (direction and grade and position):
+        print("   ⚠ Seed directions, grades and positions first")
+        return
+
+    def claims(worker):
+        try:
+            ids = [next_employee_id() for _ in range(per_thread)]
+            ids += allocate_employee_ids(block)
+            return ids
+        finally:
+            connection.close()
+
+    def creates(worker):
+        try:
+            created = []
+            for i in range(per_thread):
+                employee = Employee(
+                    first_name='Sequence', last_name=f'Test {worker}-{i}', cin=f'SEQ{worker}-{i}',
+                    email=f'seq{worker}-{i}@example.com', date_of_birth=datetime.date(1990, 1, 1),
+                    hire_date=datetime.date(2025, 1, 1), direction=direction, grade=grade, position=position,
+                )
+                employee.save()
+                created.append(employee.employee_id)
+            return created
+        finally:
+            connection.close()
+
+    for label, func in (('claims', claims), ('Employee.save()', creates)):
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            ids = [value for chunk in pool.map(func, range(threads)) for value in chunk]
+        elapsed = time.perf_counter() - start
+        duplicates = len(ids) - len(set(ids))
+        status = '✓' if not duplicates else '✗'
+        print(f"   {status} {label:<16} {len(ids)} ids in {elapsed * 1000:.0f} ms, {duplicates} duplicate(s)")
+    Employee.objects.filter(cin__startswith='SEQ').delete()
+    print()
+
+
+def run_history_save_benchmark(employees=200):
+    """Status change on ``employees`` rows: save() per employee vs bulk_update_with_history (rolled back)"""
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+    from apps.employees.cache import invalidate_employee_cache
+
+    print(f"🗂  Logging a status change on {employees} employees: save() vs bulk_update_with_history")
+    print("-" * 80)
+    pks = list(Employee.objects.order_by('pk').values_list('pk', flat=True)[:employees])
+    if not pks:
+        print("   ⚠ No employees")
+        return
+
+    def per_row():
+        for employee in Employee.objects.filter(pk__in=pks):
+            employee.status = 'suspended' if employee.status != 'suspended' else 'active'
+            employee.save(update_fields=['status'])
+
+    def bulk():
+        objs = list(Employee.objects.filter(pk__in=pks))
+        for employee in objs:
+            employee.status = 'suspended' if employee.status != 'suspended' else 'active'
+        Employee.objects.bulk_update_with_history(objs, ['status'])
+
+    for label, func in (('save()', per_row), ('bulk', bulk)):
+        with transaction.atomic(), CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        print(f"   {label:<8} {elapsed * 1000:9.0f} ms  {len(queries):6d} queries")
+    invalidate_employee_cache()
+    print()
+
+
+def run_eligibility_benchmark(sample=500):
+    """Promotion eligibility: next_grade_eligibility() per employee vs the batch report (rules rolled back)"""
+    from django.db import transaction
+    from apps.employees.cache import invalidate_taxonomy_cache
+    from apps.employees.eligibility import ELIGIBLE_STATUSES, EligibilityReport, active_rules, eligibility_report
+    from apps.employees.directory import get_directory
+    from apps.employees.models import Grade, GradeProgressionRule
+
+    total = Employee.objects.count()
+    print(f"🎓 Promotion eligibility of {total} employees: per employee vs batch report")
+    print("-" * 80)
+    with transaction.atomic():
+        if not GradeProgressionRule.objects.filter(is_active=True).exists():
+            grades = list(Grade.objects.order_by('pk').values_list('pk', flat=True))
+            print(f"   Generating {len(grades) - 1} progression rules (rolled back afterwards)...")
+            GradeProgressionRule.objects.bulk_create([
+                GradeProgressionRule(source_grade_id=source, target_grade_id=target, years_with_exam=4, years_without_exam=6)
+                for source, target in zip(grades, grades[1:])
+            ])
+        invalidate_taxonomy_cache()
+
+        employees = list(Employee.objects.filter(status__in=ELIGIBLE_STATUSES).order_by('pk')[:sample])
+        start = time.perf_counter()
+        expected = {e.pk: e.next_grade_eligibility() for e in employees}
+        per_employee = (time.perf_counter() - start) / max(len(employees), 1)
+
+        directory, rules = get_directory(), active_rules()
+        build = measure_query_time(lambda: EligibilityReport(directory, rules), iterations=3)
+        report = eligibility_report()
+        warm = measure_query_time(eligibility_report, iterations=20)
+        window = measure_query_time(lambda: report.select(start='2026-01-01', end='2026-12-31'), iterations=5)
+
+        mismatches = 0
+        for entry in report.entries:
+            if entry.employee_id in expected:
+                match = [r for r in expected[entry.employee_id] if r['target_grade'].pk == entry.rule.target_grade_id]
+                dates = (match[0]['with_exam_date'], match[0]['without_exam_date']) if match else None
+                mismatches += dates is None or tuple(d and d.isoformat() for d in dates) != (
+                    entry.with_exam_date, entry.without_exam_date)
+        transaction.set_rollback(True)
+    invalidate_taxonomy_cache()
+
+    print(f"   per employee   {per_employee * 1000:8.2f} ms/employee  (~{per_employee * total:6.1f} s for everyone)")
+    print(f"   batch (build)  {build['avg']:8.2f} ms for {len(report)} entries")
+    print(f"   batch (warm)   {warm['avg']:8.2f} ms")
+    print(f"   one-year window {window['avg']:7.2f} ms")
+    status = '✓' if not mismatches else '✗'
+    print(f"   {status} {mismatches} mismatch(es) against next_grade_eligibility() on {len(employees)} employees")
+    print()
+
+
+def run_forecast_benchmark(target=100000):
+    """Ten-year retirement forecast: retirement_date per employee vs the batch forecast at ``target`` rows"""
+    from collections import Counter
+    from django.utils import timezone
+    from apps.employees.directory import COLUMNS, DirectorySnapshot, _load_rows
+    from apps.employees.forecast import FORECAST_STATUSES, FORECAST_YEARS, WorkforceForecast
+
+    first_year = timezone.localdate().year
+    last_year = first_year + FORECAST_YEARS - 1
+    total = Employee.objects.count()
+    print(f"📅 {FORECAST_YEARS}-year retirement forecast: per employee vs batch ({total} employees, "
+          f"snapshot replicated to {target})")
+    print("-" * 80)
+    if not total:
+        print("   ⚠ No employees")
+        return
+
+    start = time.perf_counter()
+    per_direction = Counter()
+    for employee in Employee.objects.filter(status__in=FORECAST_STATUSES).only(
+            'direction_id', 'date_of_birth', 'retirement_age').iterator(chunk_size=2000):
+        date = employee.retirement_date
+        if date and date.year <= last_year:
+            per_direction[(employee.direction_id, max(date.year, first_year - 1))] += 1
+    per_row = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rows = _load_rows()
+    load = time.perf_counter() - start
+    forecast = WorkforceForecast(DirectorySnapshot(rows), first_year)
+    batch = {
+        (key, first_year - 1 + i): count
+        for key, counts in forecast._counts[('retirements', 'direction')].items()
+        for i, count in enumerate(counts) if count
+    }
+
+    # Same rows under new ids up to ``target``
+    id_column = COLUMNS.index('id')
+    replicated = list(rows)
+    while len(replicated) < target:
+        offset = len(replicated)
+        replicated += [[offset + row[id_column]] + row[id_column + 1:] for row in rows[:target - len(replicated)]]
+    snapshot = DirectorySnapshot(replicated)
+    build = measure_query_time(lambda: WorkforceForecast(snapshot, first_year), iterations=5)
+
+    print(f"   per employee      {per_row * 1000:9.0f} ms for {total} employees")
+    print(f"   batch (one query) {load * 1000:9.0f} ms to load {total} rows")
+    print(f"   batch (compute)   {build['avg']:9.0f} ms at {len(snapshot)} rows")
+    status = '✓' if batch == dict(per_direction) else '✗'
+    print(f"   {status} batch counts {'match' if status == '✓' else 'differ from'} retirement_date per employee")
+    print()
+
+
+def run_org_tree_benchmark(iterations=200):
+    """Org cascades: a query per lookup vs the cached org tree, and the tree against the ORM"""
+    from django.db.models import Q
+    from apps.employees.orgtree import build_org_tree, org_tree
+
+    directions = list(Direction.objects.values_list('pk', flat=True))
+    print(f"🌳 Org tree: {len(directions)} directions, {Division.objects.count()} divisions, "
+          f"{Service.objects.count()} services")
+    print("-" * 80)
+    if not directions:
+        print("   ⚠ No directions")
+        return
+
+    def orm_cascade():
+        for pk in directions:
+            list(Division.objects.filter(direction_id=pk, is_active=True).values('id', 'name'))
+            list(Service.objects.filter(direction_id=pk, division__isnull=True, is_active=True).values('id', 'name'))
+
+    def tree_cascade():
+        tree = org_tree()
+        for pk in directions:
+            tree.options('direction', pk, 'division')
+            tree.options('direction', pk, 'service')
+
+    build = measure_query_time(build_org_tree, iterations=5)
+    org_tree()
+    orm = measure_query_time(orm_cascade, iterations=max(iterations // 10, 1))
+    cached = measure_query_time(tree_cascade, iterations=iterations)
+    print(f"   build (one query per level) {build['avg']:8.2f} ms, {len(org_tree().json)} bytes of JSON")
+    print(f"   cascade, ORM                {orm['avg']:8.2f} ms for every direction")
+    print(f"   cascade, org tree           {cached['avg']:8.2f} ms for every direction")
+
+    tree = org_tree()
+    mismatches = 0
+    for service in Service.objects.select_related('division'):
+        direction_id = service.division.direction_id if service.division_id else service.direction_id
+        mismatches += tree.ancestor_id('service', service.pk, 'direction') != direction_id
+    for pk in directions:
+        services = set(Service.objects.filter(Q(direction_id=pk) | Q(division__direction_id=pk)).values_list('pk', flat=True))
+        mismatches += tree.descendant_ids('direction', pk, 'service') != services
+    status = '✓' if not mismatches else '✗'
+    print(f"   {status} {mismatches} ancestor/descendant mismatches against the ORM")
+    print()
+
+
+def run_supervisor_benchmark(sample=500):
+    """Supervisor lookups: three filtered queries per employee vs the cached supervisor map"""
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from apps.employees.supervisors import build_supervisor_map, find_supervisors_for, supervisor_map
+
+    employees = list(Employee.objects.order_by('pk')[:sample])
+    print(f"👔 Supervisor lookups for {len(employees)} employees")
+    print("-" * 80)
+    if not employees:
+        print("   ⚠ No employees")
+        return
+
+    def per_query(employee):
+        # The lookup find_supervisors_for used to run
+        for level, position_type in (('service', 'chef_service'), ('division', 'chef_division'),
+                                     ('direction', 'chef_direction')):
+            unit_id = getattr(employee, f'{level}_id')
+            if level != 'direction' and not unit_id:
+                continue
+            users = [e.user for e in Employee.objects.filter(
+                **{f'{level}_id': unit_id, 'position__position_type': position_type}).select_related('user') if e.user]
+            if users or level == 'direction':
+                return users
+
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as old_queries:
+        expected = [[u.pk for u in per_query(e)] for e in employees]
+    old = time.perf_counter() - start
+
+    build = measure_query_time(build_supervisor_map, iterations=5)
+    supervisor_map()
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as new_queries:
+        found = [[u.pk for u in find_supervisors_for(e)] for e in employees]
+    new = time.perf_counter() - start
+
+    print(f"   per query   {old * 1000:9.1f} ms, {len(old_queries)} queries")
+    print(f"   map build   {build['avg']:9.1f} ms (one query)")
+    print(f"   map         {new * 1000:9.1f} ms, {len(new_queries)} queries (users with supervisors only)")
+    mismatches = sum(a != b for a, b in zip(expected, found))
+    status = '✓' if not mismatches else '✗'
+    print(f"   {status} {mismatches} mismatches against the per-query lookup")
+    print()
 
 
 def run_performance_tests():
@@ -244,5 +882,77 @@ def run_performance_tests():
     print()
 
 
+def run_scope_benchmark(users=20, sample=50):
+    """Manager scope checks: one exists() query per check vs per-unit bitsets"""
+    from django.db import connection
+    from django.db.models import Q
+    from django.test.utils import CaptureQueriesContext
+    from apps.employees.scope import approval_scope
+
+    managers = list(Employee.objects.filter(
+        user__isnull=False, position__position_type__startswith='chef_',
+    ).select_related('user', 'position').order_by('pk')[:users])
+    employees = list(Employee.objects.order_by('?').values_list('pk', flat=True)[:sample])
+    print(f"🔭 Scope checks: {len(managers)} managers x {len(employees)} employees")
+    print("-" * 80)
+    if not managers or not employees:
+        print("   ⚠ No managers or employees")
+        return
+
+    def old_q(emp):
+        # The filter approvals_scope_q_for_user used to build (on Employee)
+        ptype = emp.position.position_type
+        if ptype == 'chef_service' and emp.service_id:
+            return Q(service_id=emp.service_id)
+        if ptype == 'chef_division' and emp.division_id:
+            return Q(division_id=emp.division_id, service__isnull=True)
+        if ptype == 'chef_direction' and emp.direction_id:
+            return Q(direction_id=emp.direction_id, division__isnull=True, service__isnull=True)
+        return Q(pk__in=[])
+
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as old_queries:
+        expected = [[Employee.objects.filter(old_q(m), pk=pk).exists() for pk in employees] for m in managers]
+    old = time.perf_counter() - start
+
+    for m in managers:
+        approval_scope(m.user)  # Warm the unit bitsets
+    start = time.perf_counter()
+    with CaptureQueriesContext(connection) as new_queries:
+        scopes = [approval_scope(m.user) for m in managers]
+        found = [[pk in scope for pk in employees] for scope in scopes]
+    new = time.perf_counter() - start
+
+    checks = len(managers) * len(employees)
+    print(f"   exists()    {old * 1000:9.1f} ms, {len(old_queries)} queries")
+    print(f"   bitsets     {new * 1000:9.1f} ms, {len(new_queries)} queries (role lookups only)")
+    print(f"   {checks} checks, {sum(len(scope.bits) for scope in scopes) // len(scopes)} bytes per scope")
+    mismatches = sum(a != b for a, b in zip(expected, found))
+    status = '✓' if not mismatches else '✗'
+    print(f"   {status} {mismatches} managers with mismatching checks")
+    print()
+
+
+BENCHMARKS = {
+    'all': lambda: run_performance_tests(),
+    'local-tier': lambda: run_local_tier_benchmark(),
+    'directory': lambda: run_directory_benchmark(),
+    'async-cache': lambda: run_async_cache_benchmark(),
+    'search': lambda: run_search_benchmark(),
+    'listing': lambda: run_listing_benchmark(),
+    'query-budget': lambda: run_query_budget_check(),
+    'import': lambda: run_import_benchmark(),
+    'export': lambda: run_export_benchmark(),
+    'employee-ids': lambda: run_employee_id_concurrency(),
+    'history-save': lambda: run_history_save_benchmark(),
+    'eligibility': lambda: run_eligibility_benchmark(),
+    'forecast': lambda: run_forecast_benchmark(),
+    'org-tree': lambda: run_org_tree_benchmark(),
+    'supervisors': lambda: run_supervisor_benchmark(),
+    'scope': lambda: run_scope_benchmark(),
+}
+
+
 if __name__ == '__main__':
-    run_performance_tests()
+    # Usage: python test_performance.py [benchmark]
+    BENCHMARKS[sys.argv[1] if len(sys.argv) > 1 else 'all']()